@@ -9,18 +9,41 @@
 # see <http://creativecommons.org/licenses/by/4.0/>.
 ##
 
+from classes.BuildCache import BuildCache
+from classes.CachePolicyStage import CachePolicyStage
+from classes.ClassMapStage import ClassMapStage
+from classes.CompileManifestsStage import CompileManifestsStage
 from classes.Context import Context
+from classes.Copier import Copier
 from classes.CreateTargetDirectoryStage import CreateTargetDirectoryStage
 from classes.DeployDirectoryStage import DeployDirectoryStage
 from classes.DeployFrontendStage import DeployFrontendStage
 from classes.DeployPagesStage import DeployPagesStage
 from classes.DeployRootStage import DeployRootStage
+from classes.Esbuild import Esbuild
+from classes.EsbuildMinifierBackend import EsbuildMinifierBackend
+from classes.LibraryUsageStage import LibraryUsageStage
 from classes.Minifier import Minifier
+from classes.MinifierBackend import MinifierBackend
+from classes.OptimizeImagesStage import OptimizeImagesStage
 from classes.Pipeline import Pipeline
+from classes.PrecompressStage import PrecompressStage
+from classes.PreloadStage import PreloadStage
+from classes.PurgeCssStage import PurgeCssStage
+from classes.Profiler import Profiler
+from classes.PythonMinifierBackend import PythonMinifierBackend
+from classes.ResourceHintsStage import ResourceHintsStage
+from classes.SlimBackendStage import SlimBackendStage
+from classes.SubsetIconsStage import SubsetIconsStage
+from classes.Watcher import Watcher
+from classes.WorkerPool import WorkerPool
 from pathlib import Path
 import argparse
 import sys
 
+MINIFIER_ESBUILD = 'esbuild'
+MINIFIER_PYTHON = 'python'
+
 def parseArgs(argv):
     parser = argparse.ArgumentParser(
         description='Deployment tool for the Daphne Web Framework.'
@@ -45,28 +68,402 @@ def parseArgs(argv):
             'within it to store the deployed content.'
         )
     )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help=(
+            'After deploying, keep watching the source directory and '
+            'redeploy only what changes, into the same target directory, '
+            'until interrupted.'
+        )
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=WorkerPool.defaultWorkerCount(),
+        help=(
+            'Maximum number of minifier invocations to run in parallel. '
+            'Defaults to the number of CPUs.'
+        )
+    )
+    parser.add_argument(
+        '--link-dest',
+        nargs='?',
+        const=Copier.LINK_COMPARE_MTIME,
+        choices=[Copier.LINK_COMPARE_MTIME, Copier.LINK_COMPARE_CONTENT],
+        help=(
+            'Hardlink files that are unchanged since the most recent previous '
+            'deployment instead of copying them. Files are compared by size '
+            'and modification time (`mtime`, the default) or byte by byte '
+            '(`content`).'
+        )
+    )
+    parser.add_argument(
+        '--js-minifier',
+        choices=[MINIFIER_ESBUILD, MINIFIER_PYTHON],
+        default=MINIFIER_ESBUILD,
+        help=(
+            'Minifier for JavaScript: `esbuild` (the default) or `python`, '
+            'which only removes comments and whitespace but runs in-process.'
+        )
+    )
+    parser.add_argument(
+        '--css-minifier',
+        choices=[MINIFIER_ESBUILD, MINIFIER_PYTHON],
+        default=MINIFIER_ESBUILD,
+        help='Minifier for CSS, as with `--js-minifier`.'
+    )
+    parser.add_argument(
+        '--small-file-threshold',
+        type=int,
+        default=0,
+        help=(
+            'Minify assets of at most this many kilobytes with the in-process '
+            '`python` minifier, saving an esbuild invocation each. Defaults '
+            'to 0, which disables this.'
+        )
+    )
+    parser.add_argument(
+        '--minifier-backend',
+        choices=[Esbuild.BACKEND_PROCESS, Esbuild.BACKEND_SERVICE],
+        default=Esbuild.BACKEND_PROCESS,
+        help=(
+            'How esbuild is invoked: `process` starts a new process for '
+            'each invocation (the default), `service` keeps a single '
+            'process running for the whole deployment.'
+        )
+    )
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        help=(
+            'Directory to store cached minifier outputs. Defaults to a '
+            '`.cache` subdirectory within the target directory.'
+        )
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=256,
+        help=(
+            'Maximum size of the cache in megabytes. Least recently used '
+            'entries are evicted when it is exceeded. Defaults to 256.'
+        )
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Minify every asset from scratch without consulting the cache.'
+    )
+    parser.add_argument(
+        '--fingerprint',
+        action='store_true',
+        help=(
+            'Name page bundles and frontend assets after a hash of their '
+            'content (e.g. `page.1a2b3c4d.min.js`) and refer to them by these '
+            'names in the deployed `manifest.json` files, so that browsers '
+            'and CDNs can cache them indefinitely.'
+        )
+    )
+    parser.add_argument(
+        '--purge-css',
+        action='store_true',
+        help=(
+            'Remove rules from deployed stylesheets whose class names, IDs or '
+            'element names occur nowhere in pages, master pages, templates, '
+            'frontend scripts or backend PHP files. Names that are built '
+            'dynamically can be listed in `.purgesafelist` in the source '
+            'directory, one per line, with wildcards (e.g. `bg-*`). Purged '
+            'frontend stylesheets are renamed after a hash of their content, '
+            'as with `--fingerprint`, and their source maps are left out.'
+        )
+    )
+    parser.add_argument(
+        '--subset-icons',
+        action='store_true',
+        help=(
+            'Trim the Bootstrap Icons stylesheet to the icons (`bi-*` '
+            'classes) that occur in pages, master pages, templates, frontend '
+            'scripts or backend PHP files, and subset its fonts to their '
+            'glyphs. Subsetting the fonts requires the `fontTools` module '
+            '(and `brotli` for WOFF2). Icons whose names are built '
+            'dynamically can be listed in `.purgesafelist` (e.g. `bi-arrow-*`). '
+            'The trimmed stylesheet is renamed after a hash of its content, '
+            'as with `--fingerprint`.'
+        )
+    )
+    parser.add_argument(
+        '--bundle-defaults',
+        action='store_true',
+        help=(
+            'Concatenate the scripts and stylesheets of the default frontend '
+            'libraries into `vendor.min.js` and `vendor.min.css`, which the '
+            'deployed frontend manifest declares in their place, so that '
+            'pages load them in one request each.'
+        )
+    )
+    parser.add_argument(
+        '--analyze-libraries',
+        action='store_true',
+        help=(
+            'Warn about frontend libraries that pages include but do not '
+            'appear to use, and about libraries they use but do not include.'
+        )
+    )
+    parser.add_argument(
+        '--library-report',
+        type=str,
+        metavar='REPORT',
+        help=(
+            'Analyze library usage as with `--analyze-libraries`, and save '
+            'the libraries each page needs as JSON to the given file.'
+        )
+    )
+    parser.add_argument(
+        '--precompress',
+        action='store_true',
+        help=(
+            'Write gzip and Brotli variants of deployed assets, and the '
+            '`.htaccess` rules that serve them. Variants are cached by the '
+            'content of the asset.'
+        )
+    )
+    parser.add_argument(
+        '--optimize-images',
+        action='store_true',
+        help=(
+            'Recompress deployed PNG images losslessly, strip metadata from '
+            'PNG and JPEG images, and minify SVG images. Results are cached '
+            'by image content.'
+        )
+    )
+    parser.add_argument(
+        '--webp',
+        action='store_true',
+        help=(
+            'With `--optimize-images`, also write WebP variants of PNG and '
+            'JPEG images (e.g. `logo.png.webp`) and serve them to browsers '
+            'that accept WebP. Requires the `PIL` module (Pillow).'
+        )
+    )
+    parser.add_argument(
+        '--slim-backend',
+        action='store_true',
+        help=(
+            'Deploy only the backend library files needed at runtime: the '
+            'PHP files of classes reachable from the root scripts, master '
+            'pages, pages and templates, or the files listed per library in '
+            '`.backendprofiles.json` in the source directory.'
+        )
+    )
+    parser.add_argument(
+        '--php-manifests',
+        action='store_true',
+        help=(
+            'Also save each deployed `manifest.json` as `manifest.php`, which '
+            'returns it as a PHP array that OPcache keeps in memory, and save '
+            'the assets each page loads by default (default libraries and '
+            'page bundle) as `manifest.resolved.php` in the page directory.'
+        )
+    )
+    parser.add_argument(
+        '--resource-hints',
+        action='store_true',
+        help=(
+            'Save the stylesheets, fonts and scripts each page loads as '
+            '`preloads.php` in the page directory, from which master pages '
+            'can emit `<link rel="preload">` tags or a `Link` header.'
+        )
+    )
+    parser.add_argument(
+        '--class-map',
+        action='store_true',
+        help=(
+            'Generate `classmap.php`, which maps the classes declared in the '
+            'deployed `backend` directory to their files so that the '
+            'autoloader can load them without checking the file system.'
+        )
+    )
+    parser.add_argument(
+        '--preload',
+        action='store_true',
+        help=(
+            'Generate `preload.php`, a script for the `opcache.preload` '
+            'setting that compiles the backend classes referred to by '
+            '`autoload.php`, `api.php` and the master pages, or those listed '
+            'in `.preloadlist` in the source directory (e.g. `Harmonia\\*`).'
+        )
+    )
+    parser.add_argument(
+        '--cache-headers',
+        action='store_true',
+        help=(
+            'Write `.htaccess` rules that set `Cache-Control` and `ETag` '
+            'headers for deployed files, caching fingerprinted assets and '
+            'versioned vendor directories as immutable. The rules can be '
+            'adjusted in `.cachepolicy.json` in the source directory.'
+        )
+    )
+    parser.add_argument(
+        '--precompress-min-size',
+        type=int,
+        default=1024,
+        help=(
+            'Minimum size in bytes of an asset to be precompressed. Defaults '
+            'to 1024.'
+        )
+    )
+    parser.add_argument(
+        '--profile',
+        type=str,
+        metavar='REPORT',
+        help=(
+            'Measure each stage (wall and CPU time, files copied, bytes '
+            'written, esbuild invocations), print a summary table and save '
+            'the measurements as JSON to the given file.'
+        )
+    )
+    parser.add_argument(
+        '--cprofile',
+        type=str,
+        metavar='OUTPUT',
+        help=(
+            'Profile the stages with cProfile and save the statistics to the '
+            'given file, for inspection with `pstats` or `snakeviz`.'
+        )
+    )
     return parser.parse_args(argv)
 
-def main(argv):
-    args = parseArgs(argv[1:])
-    rootPath = Path(__file__).resolve().parent
-    context = Context(
-        sourceDirectoryPath = Path(args.sourcedir).resolve(),
-        targetDirectoryPath = Path(args.targetdir).resolve(),
-        minifier = Minifier(rootPath)
+def createMinifier(
+    args,
+    rootPath: Path,
+    cache: BuildCache | None
+) -> Minifier:
+    backends: dict[str, MinifierBackend | None] = {
+        MINIFIER_ESBUILD: None,
+        MINIFIER_PYTHON: PythonMinifierBackend()
+    }
+    if MINIFIER_ESBUILD in (args.js_minifier, args.css_minifier):
+        backends[MINIFIER_ESBUILD] = EsbuildMinifierBackend(
+            Esbuild(rootPath, args.minifier_backend))
+    return Minifier(
+        {'js': backends[args.js_minifier], 'css': backends[args.css_minifier]},
+        cache,
+        smallFileBackend = backends[MINIFIER_PYTHON],
+        smallFileThreshold = args.small_file_threshold * 1024
     )
-    pipeline = Pipeline([
-        CreateTargetDirectoryStage(),
+
+def createCache(args) -> BuildCache | None:
+    # A single instance is shared by all its users, since it keeps track of
+    # the size of the store and evicts entries.
+    if args.no_cache:
+        return None
+    if args.cache_dir:
+        cacheDirectoryPath = Path(args.cache_dir).resolve()
+    else:
+        cacheDirectoryPath = Path(args.targetdir).resolve() / '.cache'
+    return BuildCache(cacheDirectoryPath, args.cache_size * 1024 * 1024)
+
+def createPipeline(args, cache: BuildCache | None) -> Pipeline:
+    stages = [CreateTargetDirectoryStage()]
+    if args.purge_css:
+        stages.append(PurgeCssStage())
+    if args.subset_icons:
+        stages.append(SubsetIconsStage(cache))
+    stages += [
         DeployDirectoryStage('assets'),
-        DeployDirectoryStage('backend'),
-        DeployFrontendStage(),
+        SlimBackendStage() if args.slim_backend
+            else DeployDirectoryStage('backend'),
+        DeployFrontendStage(
+            fingerprint=args.fingerprint,
+            bundleDefaults=args.bundle_defaults
+        ),
         DeployDirectoryStage('masterpages'),
-        DeployPagesStage(),
+        DeployPagesStage(fingerprint=args.fingerprint),
         DeployDirectoryStage('templates'),
         DeployRootStage(),
-    ])
-    pipeline.run(context)
-    return 0
+    ]
+    if args.optimize_images:
+        stages.append(OptimizeImagesStage(cache, webp=args.webp))
+    if args.php_manifests:
+        stages.append(CompileManifestsStage())
+    if args.resource_hints:
+        stages.append(ResourceHintsStage())
+    if args.class_map:
+        stages.append(ClassMapStage())
+    if args.preload:
+        stages.append(PreloadStage())
+    if args.precompress:
+        stages.append(PrecompressStage(
+            cache,
+            minimumSize=args.precompress_min_size
+        ))
+    if args.analyze_libraries or args.library_report:
+        stages.append(LibraryUsageStage(
+            Path(args.library_report).resolve() if args.library_report else None))
+    if args.cache_headers:
+        stages.append(CachePolicyStage())
+    return Pipeline(stages)
+
+def createContext(
+    args,
+    rootPath: Path,
+    cache: BuildCache | None
+) -> Context:
+    return Context(
+        sourceDirectoryPath = Path(args.sourcedir).resolve(),
+        targetDirectoryPath = Path(args.targetdir).resolve(),
+        minifier = createMinifier(args, rootPath, cache),
+        jobs = args.jobs,
+        linkCompare = args.link_dest,
+        profiler = createProfiler(args)
+    )
+
+def createProfiler(args) -> Profiler | None:
+    if not args.profile and not args.cprofile:
+        return None
+    return Profiler(withCProfile=bool(args.cprofile))
+
+def saveProfile(args, profiler: Profiler) -> None:
+    print(profiler.summary())
+    if args.profile:
+        profiler.saveReport(Path(args.profile))
+    if args.cprofile:
+        profiler.saveCProfile(Path(args.cprofile))
+
+def watch(pipeline: Pipeline, context: Context) -> int:
+    # Start watching before the initial deployment so that changes made
+    # while it runs are not missed.
+    watcher = Watcher(context.sourceDirectoryPath)
+    try:
+        if not pipeline.run(context):
+            return 1
+        print('Watching for changes. Press Ctrl+C to stop.')
+        for changedPaths in watcher.changes():
+            if context.ignoreRules.filePath() in changedPaths:
+                # Any file may be affected by changed rules.
+                context.reloadIgnoreRules()
+                changedPaths = {context.sourceDirectoryPath}
+            pipeline.update(context, changedPaths)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        watcher.close()
+
+def main(argv):
+    args = parseArgs(argv[1:])
+    rootPath = Path(__file__).resolve().parent
+    cache = createCache(args)
+    context = createContext(args, rootPath, cache)
+    pipeline = createPipeline(args, cache)
+    try:
+        if args.watch:
+            return watch(pipeline, context)
+        return 0 if pipeline.run(context) else 1
+    finally:
+        context.minifier.close()
+        if context.profiler is not None:
+            saveProfile(args, context.profiler)
 
 if __name__ == '__main__':
     try:
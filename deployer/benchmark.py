@@ -0,0 +1,198 @@
+##
+# benchmark.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from benchmarks.EsbuildStub import EsbuildStub
+from benchmarks.SourceTreeGenerator import SourceTreeGenerator
+from classes.Esbuild import Esbuild
+from classes.Profiler import Profiler
+import app
+from contextlib import redirect_stdout
+from pathlib import Path
+import argparse
+import io
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(
+        description=(
+            'Benchmarks the deployer on a synthetic source tree and reports '
+            'the time spent in each stage. Unrecognized options are passed '
+            'on to the deployer (e.g. `--jobs 4` or `--link-dest`).'
+        )
+    )
+    parser.add_argument(
+        '--pages',
+        type=int,
+        default=100,
+        help='Number of pages to generate. Defaults to 100.'
+    )
+    parser.add_argument(
+        '--backend-files',
+        type=int,
+        default=1000,
+        help='Number of backend PHP files to generate. Defaults to 1000.'
+    )
+    parser.add_argument(
+        '--ignored-depth',
+        type=int,
+        default=10,
+        help=(
+            'Nesting depth of the generated directories that `.deployignore` '
+            'excludes. Defaults to 10.'
+        )
+    )
+    parser.add_argument(
+        '--vendor-css-size',
+        type=int,
+        default=1024,
+        help='Size of the vendor stylesheet in kilobytes. Defaults to 1024.'
+    )
+    parser.add_argument(
+        '--runs',
+        type=int,
+        default=3,
+        help='Number of deployments to measure. Defaults to 3.'
+    )
+    parser.add_argument(
+        '--workdir',
+        type=str,
+        help=(
+            'Directory to generate the source tree and deploy into. It is '
+            'kept after the benchmark. Defaults to a temporary directory, '
+            'which is removed.'
+        )
+    )
+    parser.add_argument(
+        '--output',
+        type=str,
+        help='File to save the results to as JSON, for comparing commits.'
+    )
+    return parser.parse_known_args(argv)
+
+def gitCommit() -> str | None:
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+def runOnce(
+    workPath: Path,
+    rootPath: Path,
+    deployerArgv: list[str]
+) -> dict[str, object]:
+    targetDirectoryPath = workPath / 'target'
+    shutil.rmtree(targetDirectoryPath, ignore_errors=True)
+    deployerArgs = app.parseArgs([
+        '--sourcedir', str(workPath / 'source'),
+        '--targetdir', str(targetDirectoryPath),
+        *deployerArgv
+    ])
+    cache = app.createCache(deployerArgs)
+    context = app.createContext(deployerArgs, rootPath, cache)
+    if context.profiler is None:
+        context.profiler = Profiler()
+    output = io.StringIO()
+    try:
+        with redirect_stdout(output):
+            succeeded = app.createPipeline(deployerArgs, cache).run(context)
+    finally:
+        context.minifier.close()
+    if not succeeded:
+        raise RuntimeError(f'Deployment failed:\n{output.getvalue()}')
+    return context.profiler.report()
+
+def summarize(reports: list[dict[str, object]]) -> dict[str, dict[str, float]]:
+    result = {}
+    for report in reports:
+        for stage in report['stages']:
+            result.setdefault(stage['name'], []).append(stage['wallSeconds'])
+    result['Total'] = [report['totalWallSeconds'] for report in reports]
+    return {
+        name: {
+            'min': min(seconds),
+            'median': statistics.median(seconds),
+            'max': max(seconds)
+        }
+        for name, seconds in result.items()
+    }
+
+def printSummary(summary: dict[str, dict[str, float]]) -> None:
+    width = max(len(name) for name in summary)
+    print(f"{'Stage'.ljust(width)}  {'min s':>8}  {'median s':>8}  {'max s':>8}")
+    for name, seconds in summary.items():
+        print(f"{name.ljust(width)}  {seconds['min']:8.3f}  "
+            f"{seconds['median']:8.3f}  {seconds['max']:8.3f}")
+
+def main(argv):
+    args, deployerArgv = parseArgs(argv[1:])
+    if args.workdir:
+        workPath = Path(args.workdir).resolve()
+        workPath.mkdir(parents=True, exist_ok=True)
+    else:
+        workPath = Path(tempfile.mkdtemp(prefix='deployer-benchmark-'))
+    try:
+        sourceDirectoryPath = workPath / 'source'
+        shutil.rmtree(sourceDirectoryPath, ignore_errors=True)
+        SourceTreeGenerator(
+            sourceDirectoryPath,
+            pageCount = args.pages,
+            backendFileCount = args.backend_files,
+            ignoredDepth = args.ignored_depth,
+            vendorCssBytes = args.vendor_css_size * 1024
+        ).generate()
+        rootPath = workPath / 'root'
+        EsbuildStub.install(Esbuild.executablePath(rootPath))
+        reports = [runOnce(workPath, rootPath, deployerArgv)
+            for _ in range(args.runs)]
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workPath, ignore_errors=True)
+    summary = summarize(reports)
+    printSummary(summary)
+    if args.output:
+        results = {
+            'commit': gitCommit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parameters': {
+                'pages': args.pages,
+                'backendFiles': args.backend_files,
+                'ignoredDepth': args.ignored_depth,
+                'vendorCssSize': args.vendor_css_size,
+                'runs': args.runs,
+                'deployerOptions': deployerArgv
+            },
+            'summary': summary,
+            'runs': reports
+        }
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main(sys.argv))
+    except Exception as e:
+        print(f'Unhandled exception: {e}')
+        sys.exit(1)
@@ -0,0 +1,99 @@
+##
+# EsbuildStub.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from pathlib import Path
+import os
+import re
+import stat
+import sys
+
+class EsbuildStub:
+    """
+    Stands in for the esbuild executable so that benchmarks run on any
+    platform without the bundled win32 binary. It accepts the command lines
+    the `process` backend of `Esbuild` produces (a single entry point with
+    "--outfile", several entry points with "--outdir", or standard input) and
+    applies a cheap "minification": comments and indentation are removed.
+
+    The service protocol is not implemented.
+    """
+    _COMMENT_PATTERN = re.compile(rb'^\s*//.*$', re.MULTILINE)
+
+    @classmethod
+    def install(cls, executablePath: Path) -> None:
+        """
+        Writes a launcher at `executablePath` that runs `main` with the
+        current Python interpreter.
+        """
+        executablePath.parent.mkdir(parents=True, exist_ok=True)
+        deployerPath = Path(__file__).resolve().parent.parent
+        executablePath.write_text(
+            f'#!{sys.executable}\n'
+            'import sys\n'
+            f'sys.path.insert(0, {str(deployerPath)!r})\n'
+            'from benchmarks.EsbuildStub import EsbuildStub\n'
+            'sys.exit(EsbuildStub.main(sys.argv[1:]))\n',
+            encoding='utf-8'
+        )
+        executablePath.chmod(executablePath.stat().st_mode | stat.S_IXUSR)
+
+    @classmethod
+    def main(cls, argv: list[str]) -> int:
+        inputFilePaths = [Path(arg) for arg in argv if not arg.startswith('-')]
+        options = {}
+        outExtensions = {}
+        for arg in argv:
+            if not arg.startswith('-'):
+                continue
+            name, _, value = arg.partition('=')
+            if name.startswith('--out-extension:'):
+                outExtensions[name[len('--out-extension:'):]] = value
+            else:
+                options[name] = value
+        if any(name.startswith('--service') for name in options):
+            print('The esbuild stub does not support the service protocol.',
+                file=sys.stderr)
+            return 1
+        if not inputFilePaths:
+            cls._write(Path(options['--outfile']),
+                cls._minify(sys.stdin.buffer.read()))
+            return 0
+        if '--outfile' in options:
+            cls._write(Path(options['--outfile']),
+                cls._minify(inputFilePaths[0].read_bytes()))
+            return 0
+        outputDirectoryPath = Path(options['--outdir'])
+        baseDirectoryPath = Path(options.get('--outbase') or os.path.commonpath(
+            [inputFilePath.parent for inputFilePath in inputFilePaths]))
+        for inputFilePath in inputFilePaths:
+            outputFilePath = outputDirectoryPath / \
+                inputFilePath.relative_to(baseDirectoryPath)
+            outExtension = outExtensions.get(inputFilePath.suffix)
+            if outExtension:
+                outputFilePath = outputFilePath.with_name(
+                    outputFilePath.stem + outExtension)
+            outputFilePath.parent.mkdir(parents=True, exist_ok=True)
+            cls._write(outputFilePath, cls._minify(inputFilePath.read_bytes()))
+        return 0
+
+    #region private ------------------------------------------------------------
+
+    @classmethod
+    def _minify(cls, content: bytes) -> bytes:
+        content = cls._COMMENT_PATTERN.sub(b'', content)
+        lines = (line.strip() for line in content.splitlines())
+        return b''.join(line for line in lines if line) + b'\n'
+
+    @staticmethod
+    def _write(outputFilePath: Path, content: bytes) -> None:
+        outputFilePath.write_bytes(content)
+
+    #endregion private
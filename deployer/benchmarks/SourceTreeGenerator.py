@@ -0,0 +1,218 @@
+##
+# SourceTreeGenerator.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from pathlib import Path
+import json
+
+class SourceTreeGenerator:
+    """
+    Generates a synthetic Daphne source tree that exercises every deployment
+    stage: pages with Model/View/Controller/index assets, a backend with many
+    PHP files, frontend libraries including a large vendor stylesheet, and
+    deep directories that ".deployignore" excludes.
+
+    The content is deterministic, so trees generated with the same parameters
+    are identical and benchmark results are comparable.
+    """
+    _DEPLOYIGNORE = [
+        '.git',
+        'node_modules/',
+        '*.map',
+        'config.php',
+    ]
+    _IGNORED_FILES_PER_DIRECTORY = 20
+    _rootPath: Path
+    _pageCount: int
+    _backendFileCount: int
+    _ignoredDepth: int
+    _vendorCssBytes: int
+
+    def __init__(
+        self,
+        rootPath: Path,
+        *,
+        pageCount: int,
+        backendFileCount: int,
+        ignoredDepth: int,
+        vendorCssBytes: int
+    ):
+        self._rootPath = rootPath
+        self._pageCount = pageCount
+        self._backendFileCount = backendFileCount
+        self._ignoredDepth = ignoredDepth
+        self._vendorCssBytes = vendorCssBytes
+
+    def generate(self) -> None:
+        self._generateRoot()
+        self._generateAssets()
+        self._generateBackend()
+        self._generateFrontend()
+        self._generateMasterpages()
+        self._generatePages()
+        self._generateTemplates()
+
+    #region private ------------------------------------------------------------
+
+    def _generateRoot(self) -> None:
+        self._write('.deployignore', '\n'.join(self._DEPLOYIGNORE) + '\n')
+        self._write('index.php', self._php('Root', 'index'))
+        self._write('api.php', self._php('Root', 'api'))
+        self._write('autoload.php', self._php('Root', 'autoload'))
+        self._write('config.php', self._php('Root', 'config'))
+        self._write('config.live.php', self._php('Root', 'configLive'))
+        self._write('.htaccess', 'Options -Indexes\n')
+
+    def _generateAssets(self) -> None:
+        self._write('assets/image/logo.png', self._binary(4096))
+        self._write('assets/image/favicon.png', self._binary(1024))
+
+    def _generateBackend(self) -> None:
+        # Spread the files over a few vendor packages, each of which carries a
+        # ".git" directory that must be pruned.
+        packageCount = max(1, self._backendFileCount // 50)
+        for index in range(self._backendFileCount):
+            package = f'Package{index % packageCount}'
+            self._write(
+                f'backend/{package}/source/Class{index}.php',
+                self._php(package, f'Class{index}')
+            )
+        for index in range(packageCount):
+            self._generateIgnoredTree(f'backend/Package{index}/.git')
+
+    def _generateFrontend(self) -> None:
+        manifest = {
+            'vendor': {
+                'css': 'vendor-1.0.0/css/vendor',
+                'js': 'vendor-1.0.0/js/vendor',
+                'default': True
+            },
+            'widgets': {
+                'css': 'widgets/widgets',
+                'js': 'widgets/widgets'
+            },
+            'app': {
+                'css': 'app/app',
+                'js': 'app/app',
+                'default': True
+            }
+        }
+        self._write('frontend/manifest.json', json.dumps(manifest, indent=2))
+        # The vendor library ships both the source and a pre-minified copy,
+        # plus source maps, which are ignored.
+        vendorCss = self._css('vendor', self._vendorCssBytes)
+        self._write('frontend/vendor-1.0.0/css/vendor.css', vendorCss)
+        self._write('frontend/vendor-1.0.0/css/vendor.min.css', vendorCss)
+        self._write('frontend/vendor-1.0.0/css/vendor.css.map', '{}')
+        vendorJs = self._js('vendor', 200)
+        self._write('frontend/vendor-1.0.0/js/vendor.js', vendorJs)
+        self._write('frontend/vendor-1.0.0/js/vendor.min.js', vendorJs)
+        self._write('frontend/vendor-1.0.0/js/vendor.js.map', '{}')
+        for index in range(10):
+            self._write(
+                f'frontend/vendor-1.0.0/fonts/font{index}.woff2',
+                self._binary(8192)
+            )
+        # The other libraries are under development and need minification.
+        for name in ['widgets', 'app']:
+            self._write(f'frontend/{name}/{name}.css', self._css(name, 16 * 1024))
+            self._write(f'frontend/{name}/{name}.js', self._js(name, 100))
+        self._generateIgnoredTree('frontend/app/node_modules')
+
+    def _generateMasterpages(self) -> None:
+        for name in ['basic', 'standard', 'header', 'footer']:
+            self._write(f'masterpages/{name}.php', self._php('Masterpage', name))
+
+    def _generatePages(self) -> None:
+        manifest = {
+            'css': ['index'],
+            'js': ['Model', 'View', 'Controller', 'index']
+        }
+        for index in range(self._pageCount):
+            pageDirectory = f'pages/page{index}'
+            self._write(f'{pageDirectory}/manifest.json',
+                json.dumps(manifest, indent=2))
+            self._write(f'{pageDirectory}/index.php',
+                self._php('Page', f'page{index}'))
+            self._write(f'{pageDirectory}/index.css',
+                self._css(f'page{index}', 4 * 1024))
+            for name in manifest['js']:
+                self._write(f'{pageDirectory}/{name}.js',
+                    self._js(f'page{index}{name}', 30))
+            self._write(f'{pageDirectory}/image.png', self._binary(2048))
+
+    def _generateTemplates(self) -> None:
+        for name in ['page', 'email']:
+            self._write(f'templates/{name}.html',
+                f'<html><body>{name}</body></html>\n')
+
+    def _generateIgnoredTree(self, directory: str) -> None:
+        # A single chain of nested directories with files at every level,
+        # which is wasted work unless the walk prunes it at the top.
+        for depth in range(self._ignoredDepth):
+            for index in range(self._IGNORED_FILES_PER_DIRECTORY):
+                self._write(f'{directory}/object{index}', self._binary(256))
+            directory += f'/level{depth}'
+
+    def _write(self, relativePath: str, content: str | bytes) -> None:
+        path = self._rootPath / relativePath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(content, str):
+            path.write_text(content, encoding='utf-8')
+        else:
+            path.write_bytes(content)
+
+    @staticmethod
+    def _php(namespace: str, name: str) -> str:
+        return (
+            '<?php\n'
+            f'namespace {namespace};\n'
+            '\n'
+            f'class {name[0].upper()}{name[1:]}\n'
+            '{\n'
+            '    public function Run(): void\n'
+            '    {\n'
+            f"        echo '{name}';\n"
+            '    }\n'
+            '}\n'
+        )
+
+    @staticmethod
+    def _css(prefix: str, size: int) -> str:
+        rules = []
+        length = 0
+        index = 0
+        while length < size:
+            rule = (
+                f'.{prefix}-rule-{index} {{\n'
+                f'    margin: {index % 16}px;\n'
+                f'    color: #{index % 0xffffff:06x};\n'
+                '}\n'
+            )
+            rules.append(rule)
+            length += len(rule)
+            index += 1
+        return ''.join(rules)
+
+    @staticmethod
+    def _js(prefix: str, functionCount: int) -> str:
+        return ''.join(
+            f'function {prefix}_{index}(value) {{\n'
+            f'    // Returns the value scaled by {index}.\n'
+            f'    return value * {index};\n'
+            '}\n'
+            for index in range(functionCount)
+        )
+
+    @staticmethod
+    def _binary(size: int) -> bytes:
+        return bytes(index % 251 for index in range(size))
+
+    #endregion private
@@ -0,0 +1,95 @@
+##
+# AssetBundler.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .Profiler import Profiler
+from .Utility import Utility
+from pathlib import Path
+import posixpath
+import re
+
+class AssetBundler:
+    """
+    Concatenates minified scripts or stylesheets into a single bundle file.
+    """
+    _SOURCE_MAP_JS_PATTERN = re.compile(
+        r'^[ \t]*//[#@][ \t]*sourceMappingURL=.*$', re.MULTILINE)
+    _CHARSET_PATTERN = re.compile(r'@charset\s+(["\'])[^"\']*\1\s*;', re.IGNORECASE)
+    _IMPORT_PATTERN = re.compile(r'@import\b', re.IGNORECASE)
+    _URL_PATTERN = re.compile(r'url\(\s*(["\']?)([^"\')]+)\1\s*\)', re.IGNORECASE)
+    # URLs that do not refer to a file relative to the stylesheet.
+    _NON_RELATIVE_URL_PATTERN = re.compile(r'^(?:[a-z][a-z0-9+.-]*:|/|#)', re.IGNORECASE)
+
+    @classmethod
+    def bundleJs(cls, filePaths: list[Path], bundleFilePath: Path) -> None:
+        parts = []
+        for filePath in filePaths:
+            content = filePath.read_text(encoding='utf-8')
+            # Source maps of the parts do not apply to the bundle.
+            content = cls._SOURCE_MAP_JS_PATTERN.sub('', content)
+            parts.append(content.strip())
+        # The separator terminates a last statement that lacks a semicolon,
+        # and a trailing line comment.
+        cls._write(bundleFilePath, '\n;\n'.join(parts) + '\n')
+
+    @classmethod
+    def bundleCss(cls, filePaths: list[Path], bundleFilePath: Path) -> None:
+        parts = []
+        for index, filePath in enumerate(filePaths):
+            content = filePath.read_text(encoding='utf-8')
+            content = Utility.removeSourceMapComment(content)
+            # The bundle is written as UTF-8, which is what browsers assume
+            # without an "@charset" rule.
+            content = cls._CHARSET_PATTERN.sub('', content)
+            if index > 0 and cls._IMPORT_PATTERN.search(content):
+                print(f'Warning: "@import" rules in "{filePath.name}" are '
+                    'ignored by browsers once bundled.')
+            content = cls._rebaseUrls(
+                content,
+                filePath.parent,
+                bundleFilePath.parent
+            )
+            parts.append(content.strip())
+        cls._write(bundleFilePath, '\n'.join(parts) + '\n')
+
+    #region private ------------------------------------------------------------
+
+    @classmethod
+    def _rebaseUrls(
+        cls,
+        content: str,
+        directoryPath: Path,
+        bundleDirectoryPath: Path
+    ) -> str:
+        """
+        Rewrites relative "url()" references of a stylesheet in the given
+        directory so that they resolve from the bundle's directory.
+        """
+        if directoryPath == bundleDirectoryPath:
+            return content
+        prefix = posixpath.relpath(
+            Utility.normalizeSlashes(directoryPath),
+            Utility.normalizeSlashes(bundleDirectoryPath)
+        )
+        def rebase(match: re.Match) -> str:
+            quote, url = match.group(1), match.group(2).strip()
+            if cls._NON_RELATIVE_URL_PATTERN.match(url):
+                return match.group(0)
+            url = posixpath.normpath(f'{prefix}/{url}')
+            return f'url({quote}{url}{quote})'
+        return cls._URL_PATTERN.sub(rebase, content)
+
+    @classmethod
+    def _write(cls, bundleFilePath: Path, content: str) -> None:
+        data = content.encode('utf-8')
+        Utility.replaceFile(bundleFilePath, data)
+        Profiler.count(Profiler.BYTES_WRITTEN, len(data))
+
+    #endregion private
@@ -0,0 +1,159 @@
+##
+# BuildCache.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from collections.abc import Callable
+from pathlib import Path
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+
+class BuildCache:
+    """
+    Persistent, content-addressed store for build outputs. Entries are keyed by
+    a hash of everything that determines the output, so a hit can be copied to
+    its destination instead of being rebuilt. The total size of the store is
+    bounded; when it is exceeded, the least recently used entries are evicted.
+    """
+    _FORMAT_VERSION = '1'
+    _CHUNK_SIZE = 1024 * 1024
+    _directoryPath: Path
+    _maxSizeBytes: int
+    _totalSizeBytes: int | None
+    _lock: threading.Lock
+
+    def __init__(self, directoryPath: Path, maxSizeBytes: int):
+        self._directoryPath = directoryPath
+        self._maxSizeBytes = maxSizeBytes
+        self._totalSizeBytes = None
+        self._lock = threading.Lock()
+
+    def computeKey(
+        self,
+        parameters: list[str],
+        inputFilePaths: list[Path]
+    ) -> str:
+        hasher = hashlib.sha256()
+        for parameter in [self._FORMAT_VERSION, *parameters]:
+            value = parameter.encode('utf-8')
+            hasher.update(f'{len(value)}:'.encode('ascii'))
+            hasher.update(value)
+        for inputFilePath in inputFilePaths:
+            # Prefix each file with its size so that moving bytes from one
+            # input to the next cannot produce the same key.
+            hasher.update(f'{inputFilePath.stat().st_size}:'.encode('ascii'))
+            with open(inputFilePath, 'rb') as file:
+                while chunk := file.read(self._CHUNK_SIZE):
+                    hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def fetch(self, key: str, suffix: str, outputFilePath: Path) -> bool:
+        entryPath = self._entryPath(key, suffix)
+        try:
+            shutil.copyfile(entryPath, outputFilePath)
+        except FileNotFoundError:
+            return False
+        try:
+            # Refresh the modification time; it serves as the access time
+            # for least-recently-used eviction.
+            os.utime(entryPath)
+        except OSError:
+            pass
+        return True
+
+    def fetchBytes(self, key: str, suffix: str) -> bytes | None:
+        """
+        Returns the content of an entry, for outputs that are not written
+        to a file as they are (e.g. because the file may be a hardlink).
+        """
+        entryPath = self._entryPath(key, suffix)
+        try:
+            data = entryPath.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(entryPath)
+        except OSError:
+            pass
+        return data
+
+    def store(self, key: str, suffix: str, outputFilePath: Path) -> None:
+        self._write(key, suffix,
+            lambda tempFilePath: shutil.copyfile(outputFilePath, tempFilePath))
+
+    def storeBytes(self, key: str, suffix: str, data: bytes) -> None:
+        self._write(key, suffix,
+            lambda tempFilePath: tempFilePath.write_bytes(data))
+
+    #region private ------------------------------------------------------------
+
+    def _write(
+        self,
+        key: str,
+        suffix: str,
+        write: Callable[[Path], object]
+    ) -> None:
+        entryPath = self._entryPath(key, suffix)
+        entryPath.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a unique temporary name first so that concurrent readers
+        # never observe a partially written entry.
+        tempFilePath = entryPath.with_name(f'temp-{uuid.uuid4().hex}')
+        try:
+            write(tempFilePath)
+            os.replace(tempFilePath, entryPath)
+        finally:
+            tempFilePath.unlink(missing_ok=True)
+        with self._lock:
+            if self._totalSizeBytes is None:
+                self._totalSizeBytes = self._measure()
+            else:
+                self._totalSizeBytes += entryPath.stat().st_size
+            if self._totalSizeBytes > self._maxSizeBytes:
+                self._evict()
+
+    def _entryPath(self, key: str, suffix: str) -> Path:
+        return self._directoryPath / key[:2] / f'{key}.{suffix}'
+
+    def _entries(self) -> list[tuple[Path, os.stat_result]]:
+        entries = []
+        if not self._directoryPath.is_dir():
+            return entries
+        for bucketPath in self._directoryPath.iterdir():
+            if not bucketPath.is_dir():
+                continue
+            for entryPath in bucketPath.iterdir():
+                if entryPath.name.startswith('temp-'):
+                    continue
+                try:
+                    entries.append((entryPath, entryPath.stat()))
+                except FileNotFoundError:
+                    pass
+        return entries
+
+    def _measure(self) -> int:
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda entry: entry[1].st_mtime)
+        totalSizeBytes = sum(stat.st_size for _, stat in entries)
+        for entryPath, stat in entries:
+            if totalSizeBytes <= self._maxSizeBytes:
+                break
+            try:
+                entryPath.unlink()
+            except OSError as e:
+                print(f'Warning: Failed to evict cache entry: {entryPath} ({e})')
+                continue
+            totalSizeBytes -= stat.st_size
+        self._totalSizeBytes = totalSizeBytes
+
+    #endregion private
@@ -0,0 +1,131 @@
+##
+# CachePolicy.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .PathMatcher import PathMatcher
+from dataclasses import dataclass
+from pathlib import Path
+import json
+import re
+
+@dataclass
+class CacheClass:
+    # Value of the "Cache-Control" header, or None to leave it unset.
+    cacheControl: str | None
+    # Whether responses carry an "ETag" for revalidation.
+    etag: bool
+
+class CachePolicy:
+    """
+    Classifies deployed files for HTTP caching:
+
+    - "immutable": files whose content never changes under the same URL,
+      i.e. fingerprinted assets (e.g. "page.1a2b3c4d.min.js") and everything
+      in a versioned vendor directory (e.g. "bootstrap-5.3.8/");
+    - "bundle": other scripts, stylesheets and JSON files;
+    - "media": images and fonts;
+    - "entry": PHP entry points.
+
+    The optional policy file ".cachepolicy.json" in the source root adjusts
+    the classes and overrides the classification:
+
+        {
+          "classes": {
+            "bundle": {"cacheControl": "public, max-age=600", "etag": true}
+          },
+          "overrides": {
+            "frontend/gsi/": "bundle",
+            "*.pdf": "media"
+          }
+        }
+
+    Override patterns follow ".deployignore" syntax, relative to the
+    deployment root; the last matching one wins. A class of null leaves the
+    matching files unclassified.
+    """
+    FILENAME = '.cachepolicy.json'
+    CLASS_IMMUTABLE = 'immutable'
+    CLASS_BUNDLE = 'bundle'
+    CLASS_MEDIA = 'media'
+    CLASS_ENTRY = 'entry'
+    _DEFAULT_CLASSES = {
+        CLASS_IMMUTABLE: CacheClass('public, max-age=31536000, immutable', False),
+        CLASS_BUNDLE: CacheClass('public, max-age=3600', True),
+        CLASS_MEDIA: CacheClass('public, max-age=604800', True),
+        CLASS_ENTRY: CacheClass('no-cache', True)
+    }
+    _BUNDLE_SUFFIXES = {'.js', '.css', '.json', '.map'}
+    _MEDIA_SUFFIXES = {
+        '.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.svg', '.ico',
+        '.woff', '.woff2', '.ttf', '.otf', '.eot'
+    }
+    _ENTRY_SUFFIXES = {'.php'}
+    # Matches the names `Utility.fingerprintedPath` produces.
+    _FINGERPRINT_PATTERN = re.compile(r'\.[0-9a-f]{8}(\.min)?\.[^.]+$')
+    # e.g. "bootstrap-5.3.8", "jquery-ui-1.14.1.custom"
+    _VERSIONED_DIRECTORY_PATTERN = re.compile(
+        r'^[A-Za-z][\w.-]*?-\d+(\.\d+)+([.-][\w-]+)*$')
+    _classes: dict[str, CacheClass]
+    _overrides: list[tuple[PathMatcher, str | None]]
+
+    def __init__(self, filePath: Path | None = None):
+        self._classes = dict(self._DEFAULT_CLASSES)
+        self._overrides = []
+        if filePath is not None and filePath.is_file():
+            self._load(filePath)
+
+    def cacheClass(self, name: str) -> CacheClass:
+        return self._classes[name]
+
+    def isVersionedDirectory(self, name: str) -> bool:
+        return self._VERSIONED_DIRECTORY_PATTERN.match(name) is not None
+
+    def classify(self, relativePath: str) -> str | None:
+        """
+        Returns the class of a deployed file, given by its slash-separated
+        path relative to the deployment root, or None if it has none.
+        """
+        for matcher, name in reversed(self._overrides):
+            if matcher.isMatched(relativePath):
+                return name
+        parts = relativePath.split('/')
+        suffix = Path(parts[-1]).suffix.lower()
+        if suffix in self._ENTRY_SUFFIXES:
+            return self.CLASS_ENTRY
+        if self._FINGERPRINT_PATTERN.search(parts[-1]) or \
+            any(self.isVersionedDirectory(part) for part in parts[:-1]):
+            return self.CLASS_IMMUTABLE
+        if suffix in self._BUNDLE_SUFFIXES:
+            return self.CLASS_BUNDLE
+        if suffix in self._MEDIA_SUFFIXES:
+            return self.CLASS_MEDIA
+        return None
+
+    #region private ------------------------------------------------------------
+
+    def _load(self, filePath: Path) -> None:
+        with open(filePath, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        if not isinstance(data, dict):
+            raise ValueError(f'Cache policy must be a JSON object: {filePath}')
+        for name, value in data.get('classes', {}).items():
+            if not isinstance(value, dict):
+                raise ValueError(f'Cache class must be a JSON object: {name}')
+            base = self._classes.get(name, CacheClass(None, True))
+            self._classes[name] = CacheClass(
+                value.get('cacheControl', base.cacheControl),
+                bool(value.get('etag', base.etag))
+            )
+        for pattern, name in data.get('overrides', {}).items():
+            if name is not None and name not in self._classes:
+                raise ValueError(f'Unknown cache class: {name}')
+            self._overrides.append((PathMatcher([pattern]), name))
+
+    #endregion private
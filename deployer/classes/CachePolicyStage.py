@@ -0,0 +1,181 @@
+##
+# CachePolicyStage.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .CachePolicy import CachePolicy, CacheClass
+from .ClassMapStage import ClassMapStage
+from .CompileManifestsStage import CompileManifestsStage
+from .Context import Context
+from .DeployDirectoryStage import DeployDirectoryStage
+from .DeployFrontendStage import DeployFrontendStage
+from .DeployPagesStage import DeployPagesStage
+from .DeployRootStage import DeployRootStage
+from .Htaccess import Htaccess
+from .OptimizeImagesStage import OptimizeImagesStage
+from .PreloadStage import PreloadStage
+from .ResourceHintsStage import ResourceHintsStage
+from .Stage import Stage
+from pathlib import Path
+import os
+import re
+
+class CachePolicyStage(Stage):
+    """
+    Classifies the deployed files with `CachePolicy` and writes the resulting
+    "Cache-Control" and "ETag" rules into a ".htaccess" file in each directory
+    that contains classified files. Rules are per directory so that they do
+    not depend on the URL the application is served under.
+    """
+    _SUBDIRECTORY_NAMES = ['assets', 'frontend', 'pages']
+    _HTACCESS_FILENAME = '.htaccess'
+    _HTACCESS_SECTION = 'Cache policy'
+    # Suffixes of the variants `PrecompressStage` writes, which are served in
+    # place of the original file and must be cached the same way.
+    _VARIANT_SUFFIXES = ['.gz', '.br']
+    _directoryPaths: set[Path]
+    _fileCount: int
+
+    def __init__(self):
+        self._directoryPaths = set()
+        self._fileCount = 0
+
+    def run(self, context: Context) -> None:
+        policy = CachePolicy(context.sourceDirectoryPath / CachePolicy.FILENAME)
+        # Directory paths relative to the deployment root, mapped to the
+        # classified file names they contain, by class.
+        classifiedFiles: dict[Path, dict[str, list[str]]] = {}
+        self._fileCount = 0
+        self._classifyDirectory(
+            policy,
+            context.targetDirectoryPath,
+            Path(),
+            classifiedFiles,
+            recursive=False
+        )
+        for subdirectoryName in self._SUBDIRECTORY_NAMES:
+            self._classifyDirectory(
+                policy,
+                context.targetDirectoryPath,
+                Path(subdirectoryName),
+                classifiedFiles,
+                recursive=True
+            )
+        # Clear the rules of directories that no longer need them (when
+        # updating), then write the current ones.
+        for directoryPath in self._directoryPaths - set(classifiedFiles):
+            htaccessFilePath = (context.targetDirectoryPath / directoryPath /
+                self._HTACCESS_FILENAME)
+            if htaccessFilePath.is_file():
+                Htaccess.replaceSection(
+                    htaccessFilePath, self._HTACCESS_SECTION, [])
+        for directoryPath, filenamesByClass in classifiedFiles.items():
+            Htaccess.replaceSection(
+                context.targetDirectoryPath / directoryPath / self._HTACCESS_FILENAME,
+                self._HTACCESS_SECTION,
+                self._htaccessRules(policy, filenamesByClass)
+            )
+        self._directoryPaths = set(classifiedFiles)
+
+    def status(self) -> str:
+        return 'Generating cache policy...'
+
+    def dependencies(self) -> list[type[Stage]]:
+        # Files that later stages generate (e.g. WebP variants, "classmap.php")
+        # are classified too.
+        return [
+            DeployDirectoryStage,
+            DeployFrontendStage,
+            DeployPagesStage,
+            DeployRootStage,
+            CompileManifestsStage,
+            ClassMapStage,
+            PreloadStage,
+            OptimizeImagesStage,
+            ResourceHintsStage
+        ]
+
+    def summary(self) -> str | None:
+        return (f'{self._fileCount} files classified in '
+            f'{len(self._directoryPaths)} directories')
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        # The rules list file names, which change with fingerprinting, so any
+        # change to a served file, or to the policy, regenerates them.
+        if not self.affectsAny(context, changedPaths, self._SUBDIRECTORY_NAMES,
+            rootFilePatterns=['*']):
+            return False
+        self.run(context)
+        return True
+
+    #region private ------------------------------------------------------------
+
+    def _classifyDirectory(
+        self,
+        policy: CachePolicy,
+        targetDirectoryPath: Path,
+        relativeDirectoryPath: Path,
+        classifiedFiles: dict[Path, dict[str, list[str]]],
+        *,
+        recursive: bool
+    ) -> None:
+        directoryPath = targetDirectoryPath / relativeDirectoryPath
+        if not directoryPath.is_dir():
+            return
+        for parentPath, directoryNames, fileNames in os.walk(directoryPath):
+            if not recursive:
+                directoryNames.clear()
+            directoryNames.sort()
+            relativeParentPath = Path(parentPath).relative_to(targetDirectoryPath)
+            for fileName in sorted(fileNames):
+                if fileName == self._HTACCESS_FILENAME or \
+                    any(fileName.endswith(suffix) for suffix in self._VARIANT_SUFFIXES):
+                    continue
+                relativePath = (relativeParentPath / fileName).as_posix()
+                className = policy.classify(relativePath)
+                if className is None:
+                    continue
+                classifiedFiles.setdefault(relativeParentPath, {}) \
+                    .setdefault(className, []).append(fileName)
+                self._fileCount += 1
+
+    def _htaccessRules(
+        self,
+        policy: CachePolicy,
+        filenamesByClass: dict[str, list[str]]
+    ) -> list[str]:
+        lines = []
+        variants = '|'.join(re.escape(suffix) for suffix in self._VARIANT_SUFFIXES)
+        for className, filenames in sorted(filenamesByClass.items()):
+            cacheClass = policy.cacheClass(className)
+            names = '|'.join(re.escape(filename) for filename in filenames)
+            lines.append(f'# {className}')
+            lines.append(f'<FilesMatch "^(?:{names})(?:{variants})?$">')
+            lines += ['  ' + line for line in self._classRules(cacheClass)]
+            lines.append('</FilesMatch>')
+        return lines
+
+    def _classRules(self, cacheClass: CacheClass) -> list[str]:
+        # Without the inode, ETags stay the same across servers and for
+        # files hardlinked between deployments.
+        lines = ['FileETag MTime Size' if cacheClass.etag else 'FileETag None']
+        headers = []
+        if cacheClass.cacheControl is not None:
+            # "setifempty" keeps headers that PHP scripts set themselves.
+            headers.append(
+                f'Header setifempty Cache-Control "{cacheClass.cacheControl}"')
+        if not cacheClass.etag:
+            headers.append('Header unset ETag')
+        if headers:
+            lines.append('<IfModule mod_headers.c>')
+            lines += ['  ' + header for header in headers]
+            lines.append('</IfModule>')
+        return lines
+
+    #endregion private
@@ -0,0 +1,57 @@
+##
+# ClassMapStage.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .Context import Context
+from .DeployDirectoryStage import DeployDirectoryStage
+from .DeployRootStage import DeployRootStage
+from .PhpClassMap import PhpClassMap
+from .Stage import Stage
+from pathlib import Path
+
+class ClassMapStage(Stage):
+    """
+    Scans the deployed "backend" directory for class declarations and saves
+    a class map as "classmap.php" in the deployment root, which the
+    autoloader in "autoload.php" consults before it resolves class names to
+    file paths, so that autoloading a class costs no file system lookup.
+    Classes that are not in the map are still loaded by path.
+    """
+    _SUBDIRECTORY_NAME = 'backend'
+    _FILENAME = 'classmap.php'
+    _classCount: int
+    _fileCount: int
+
+    def __init__(self):
+        self._classCount = 0
+        self._fileCount = 0
+
+    def run(self, context: Context) -> None:
+        classMap = PhpClassMap.scanDirectory(
+            context.targetDirectoryPath / self._SUBDIRECTORY_NAME)
+        classMap.save(context.targetDirectoryPath / self._FILENAME)
+        context.classMap = classMap
+        self._classCount = len(classMap.classes())
+        self._fileCount = len(set(classMap.classes().values()))
+
+    def status(self) -> str:
+        return 'Generating class map...'
+
+    def dependencies(self) -> list[type[Stage]]:
+        return [DeployDirectoryStage, DeployRootStage]
+
+    def summary(self) -> str | None:
+        return f'{self._classCount} classes mapped in {self._fileCount} files'
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        if not self.affectsAny(context, changedPaths, [self._SUBDIRECTORY_NAME]):
+            return False
+        self.run(context)
+        return True
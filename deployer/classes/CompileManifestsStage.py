@@ -0,0 +1,118 @@
+##
+# CompileManifestsStage.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .Context import Context
+from .DeployFrontendStage import DeployFrontendStage
+from .DeployPagesStage import DeployPagesStage
+from .ManifestService import ManifestService, ManifestBlock
+from .Stage import Stage
+from .Utility import Utility
+from pathlib import Path
+
+class CompileManifestsStage(Stage):
+    """
+    Saves a "manifest.php" next to each deployed "manifest.json", returning
+    the same data as a PHP array, so that OPcache keeps the manifests in
+    shared memory instead of them being decoded on every page render.
+
+    Each page also gets "manifest.resolved.php", which lists the assets the
+    page loads before any library is added or removed at runtime: those of
+    the default libraries, in manifest order, followed by the page's own.
+    Paths are relative to the deployment root (e.g. "frontend/app/app",
+    "pages/home/page.min.js") and given in the form the manifests use;
+    URLs are kept as they are.
+    """
+    _FRONTEND_DIRECTORY_NAME = 'frontend'
+    _PAGES_DIRECTORY_NAME = 'pages'
+    _MANIFEST_FILENAME = 'manifest.json'
+    _PHP_MANIFEST_FILENAME = 'manifest.php'
+    _RESOLVED_FILENAME = 'manifest.resolved.php'
+    _ASSET_TYPES = ['css', 'js']
+    _pageCount: int
+
+    def __init__(self):
+        self._pageCount = 0
+
+    def run(self, context: Context) -> None:
+        frontendDirectoryPath = (
+            context.targetDirectoryPath / self._FRONTEND_DIRECTORY_NAME)
+        frontendManifestPath = frontendDirectoryPath / self._MANIFEST_FILENAME
+        defaultAssets: dict[str, list[str]] = {
+            assetType: [] for assetType in self._ASSET_TYPES}
+        if frontendManifestPath.is_file():
+            manifestBlocks = ManifestService.loadFrontendManifest(
+                frontendManifestPath)
+            ManifestService.saveFrontendManifestPhp(
+                manifestBlocks,
+                frontendDirectoryPath / self._PHP_MANIFEST_FILENAME
+            )
+            for manifestBlock in manifestBlocks.values():
+                if manifestBlock.default_:
+                    self._appendAssets(defaultAssets, manifestBlock,
+                        self._FRONTEND_DIRECTORY_NAME)
+        self._pageCount = 0
+        pagesDirectoryPath = context.targetDirectoryPath / self._PAGES_DIRECTORY_NAME
+        if not pagesDirectoryPath.is_dir():
+            return
+        for pageDirectoryPath in sorted(pagesDirectoryPath.iterdir()):
+            if not pageDirectoryPath.is_dir():
+                continue
+            assets = {assetType: list(assetPaths)
+                for assetType, assetPaths in defaultAssets.items()}
+            manifestPath = pageDirectoryPath / self._MANIFEST_FILENAME
+            if manifestPath.is_file():
+                manifestBlock = ManifestService.loadPageManifest(manifestPath)
+                ManifestService.savePageManifestPhp(
+                    manifestBlock,
+                    pageDirectoryPath / self._PHP_MANIFEST_FILENAME
+                )
+                self._appendAssets(assets, manifestBlock,
+                    f'{self._PAGES_DIRECTORY_NAME}/{pageDirectoryPath.name}')
+            ManifestService.savePhpArray(
+                assets, pageDirectoryPath / self._RESOLVED_FILENAME)
+            self._pageCount += 1
+
+    def status(self) -> str:
+        return 'Compiling manifests...'
+
+    def dependencies(self) -> list[type[Stage]]:
+        return [DeployFrontendStage, DeployPagesStage]
+
+    def summary(self) -> str | None:
+        return f'{self._pageCount} pages resolved'
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        if not self.affectsAny(context, changedPaths, [
+            self._FRONTEND_DIRECTORY_NAME,
+            self._PAGES_DIRECTORY_NAME
+        ]):
+            return False
+        self.run(context)
+        return True
+
+    #region private ------------------------------------------------------------
+
+    def _appendAssets(
+        self,
+        assets: dict[str, list[str]],
+        manifestBlock: ManifestBlock,
+        directoryPath: str
+    ) -> None:
+        for assetType in self._ASSET_TYPES:
+            assetPaths = getattr(manifestBlock, assetType)
+            if assetPaths is None:
+                continue
+            for assetPath in Utility.ensureList(assetPaths):
+                if not Utility.isUrl(assetPath):
+                    assetPath = f'{directoryPath}/{assetPath}'
+                assets[assetType].append(assetPath)
+
+    #endregion private
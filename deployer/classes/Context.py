@@ -10,8 +10,12 @@
 ##
 
 from .Copier import Copier
+from .CssPurger import CssPurger
+from .IconSubsetter import IconSubsetter
 from .IgnoreRules import IgnoreRules
 from .Minifier import Minifier
+from .PhpClassMap import PhpClassMap
+from .Profiler import Profiler
 from pathlib import Path
 
 class Context:
@@ -20,15 +24,37 @@ class Context:
     ignoreRules: IgnoreRules
     copier: Copier
     minifier: Minifier
+    jobs: int
+    linkCompare: str | None
+    profiler: Profiler | None
+    # Set by `PurgeCssStage`, if it is part of the pipeline.
+    cssPurger: CssPurger | None
+    # Set by `SubsetIconsStage`, if it is part of the pipeline.
+    iconSubsetter: IconSubsetter | None
+    # Set by `ClassMapStage`, if it is part of the pipeline.
+    classMap: PhpClassMap | None
 
     def __init__(
         self,
         sourceDirectoryPath: Path,
         targetDirectoryPath: Path,
-        minifier: Minifier
+        minifier: Minifier,
+        jobs: int,
+        linkCompare: str | None = None,
+        profiler: Profiler | None = None
     ):
         self.sourceDirectoryPath = sourceDirectoryPath
         self.targetDirectoryPath = targetDirectoryPath
         self.ignoreRules = IgnoreRules(sourceDirectoryPath)
         self.copier = Copier(self.ignoreRules)
         self.minifier = minifier
+        self.jobs = jobs
+        self.linkCompare = linkCompare
+        self.profiler = profiler
+        self.cssPurger = None
+        self.iconSubsetter = None
+        self.classMap = None
+
+    def reloadIgnoreRules(self) -> None:
+        self.ignoreRules = IgnoreRules(self.sourceDirectoryPath)
+        self.copier.setIgnoreRules(self.ignoreRules)
@@ -10,16 +10,108 @@
 ##
 
 from .IgnoreRules import IgnoreRules
-from .Utility import Utility
-from fnmatch import fnmatch
+from .PathMatcher import PathMatcher
+from .Profiler import Profiler
+from dataclasses import dataclass
 from pathlib import Path
-from shutil import copy2
+from shutil import copy2, copystat, rmtree
+import filecmp
+import os
+import sys
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Not available on Windows
+
+@dataclass
+class CopyStatistics:
+    visited: int = 0
+    copied: int = 0
+    skipped: int = 0
+
+    def __iadd__(self, other: 'CopyStatistics') -> 'CopyStatistics':
+        self.visited += other.visited
+        self.copied += other.copied
+        self.skipped += other.skipped
+        return self
+
+    def __str__(self) -> str:
+        return f'{self.visited} entries visited, {self.copied} files copied'
 
 class Copier:
+    LINK_COMPARE_MTIME = 'mtime'
+    LINK_COMPARE_CONTENT = 'content'
+    _FICLONE = 0x40049409  # Linux ioctl request code for reflink copies
     _ignoreRules: IgnoreRules
+    _linkSourceDirectoryPath: Path | None
+    _linkTargetDirectoryPath: Path | None
+    _linkCompare: str
+    _reflinkSupported: bool
+    _excludeMatchers: dict[frozenset[str], PathMatcher]
 
     def __init__(self, ignoreRules: IgnoreRules):
         self._ignoreRules = ignoreRules
+        self._excludeMatchers = {}
+        self._linkSourceDirectoryPath = None
+        self._linkTargetDirectoryPath = None
+        self._linkCompare = self.LINK_COMPARE_MTIME
+        self._reflinkSupported = (
+            fcntl is not None and sys.platform.startswith('linux'))
+
+    def setIgnoreRules(self, ignoreRules: IgnoreRules) -> None:
+        self._ignoreRules = ignoreRules
+
+    def enableLinkDest(
+        self,
+        previousDirectoryPath: Path,
+        targetDirectoryPath: Path,
+        compare: str
+    ) -> None:
+        """
+        Makes subsequent copies into `targetDirectoryPath` hardlink the
+        corresponding file of `previousDirectoryPath` when it is unchanged,
+        like rsync's `--link-dest`. Unchanged means equal size and
+        modification time, or identical bytes when `compare` is "content".
+
+        Files that are hardlinked this way are shared with the previous
+        deployment, so they must never be modified in place; write a new file
+        and rename it over the old one instead.
+        """
+        if compare not in (self.LINK_COMPARE_MTIME, self.LINK_COMPARE_CONTENT):
+            raise ValueError(f'Unknown comparison method: {compare}')
+        self._linkSourceDirectoryPath = previousDirectoryPath
+        self._linkTargetDirectoryPath = targetDirectoryPath
+        self._linkCompare = compare
+
+    def linkDerivedFile(
+        self,
+        derivedFilePath: Path,
+        originFilePath: Path
+    ) -> bool:
+        """
+        Hardlinks a file generated from another deployed file (such as its
+        compressed variant) from the previous deployment, provided the origin
+        was itself linked from there and is therefore unchanged. Returns
+        whether the file was linked.
+        """
+        if self._linkSourceDirectoryPath is None:
+            return False
+        try:
+            previousOriginFilePath = self._linkSourceDirectoryPath / \
+                originFilePath.relative_to(self._linkTargetDirectoryPath)
+            previousDerivedFilePath = self._linkSourceDirectoryPath / \
+                derivedFilePath.relative_to(self._linkTargetDirectoryPath)
+        except ValueError:
+            return False
+        try:
+            if not originFilePath.samefile(previousOriginFilePath):
+                return False
+            derivedFilePath.unlink(missing_ok=True)
+            os.link(previousDerivedFilePath, derivedFilePath)
+        except OSError:
+            return False
+        Profiler.count(Profiler.FILES_LINKED)
+        return True
 
     def copyFile(
         self,
@@ -28,16 +120,18 @@ class Copier:
         *,
         createTargetDirectory: bool = True
     ) -> None:
-        if self._ignoreRules.isIgnored(sourceFilePath):
+        if self._ignoreRules.isIgnored(sourceFilePath, isDirectory=False):
+            Profiler.count(Profiler.FILES_SKIPPED)
             return
         if sourceFilePath.is_symlink():
             print(f'Warning: Skipping symlink: {sourceFilePath}')
+            Profiler.count(Profiler.FILES_SKIPPED)
             return
         if not sourceFilePath.is_file():
             raise FileNotFoundError(f'Missing file: {sourceFilePath}')
         if createTargetDirectory:
             targetFilePath.parent.mkdir(parents=True, exist_ok=True)
-        copy2(sourceFilePath, targetFilePath)
+        self._copy(sourceFilePath, targetFilePath)
 
     def copyFilesRecursive(
         self,
@@ -45,14 +139,213 @@ class Copier:
         targetDirectoryPath: Path,
         *,
         excludePatterns: set[str] = None
+    ) -> CopyStatistics:
+        statistics = CopyStatistics()
+        if not sourceDirectoryPath.is_dir():
+            return statistics
+        excludeMatcher = self._excludeMatcher(excludePatterns)
+        try:
+            self._walk(
+                sourceDirectoryPath,
+                targetDirectoryPath,
+                excludeMatcher,
+                statistics
+            )
+        finally:
+            Profiler.count(Profiler.FILES_VISITED, statistics.visited)
+            Profiler.count(Profiler.FILES_SKIPPED, statistics.skipped)
+        return statistics
+
+    def moveFile(self, sourceFilePath: Path, targetFilePath: Path) -> None:
+        """
+        Renames a deployed file. If the previous deployment has an unchanged
+        file at the new path, that file is hardlinked instead, so that both
+        deployments share it.
+        """
+        if self._linkSourceDirectoryPath is not None and \
+            self._tryLink(sourceFilePath, targetFilePath, None):
+            Profiler.count(Profiler.FILES_LINKED)
+            sourceFilePath.unlink()
+            return
+        os.replace(sourceFilePath, targetFilePath)
+
+    def syncPath(
+        self,
+        sourcePath: Path,
+        targetPath: Path,
+        *,
+        excludePatterns: set[str] = None
+    ) -> None:
+        """
+        Mirrors a single changed source path: a file is copied, a directory is
+        copied recursively, and a path that no longer exists is removed from
+        the target.
+        """
+        if sourcePath.is_dir():
+            if self._ignoreRules.isIgnored(sourcePath, isDirectory=True):
+                return
+            self.copyFilesRecursive(
+                sourcePath,
+                targetPath,
+                excludePatterns=excludePatterns
+            )
+        elif sourcePath.exists():
+            excludeMatcher = self._excludeMatcher(excludePatterns)
+            if excludeMatcher and excludeMatcher.isMatched(sourcePath.name):
+                return
+            self.copyFile(sourcePath, targetPath)
+        else:
+            self.removePath(targetPath)
+
+    def removePath(self, targetPath: Path) -> None:
+        if targetPath.is_dir() and not targetPath.is_symlink():
+            rmtree(targetPath)
+        else:
+            targetPath.unlink(missing_ok=True)
+
+    #region private ------------------------------------------------------------
+
+    def _walk(
+        self,
+        sourceDirectoryPath: Path,
+        targetDirectoryPath: Path,
+        excludeMatcher: PathMatcher | None,
+        statistics: CopyStatistics
+    ) -> None:
+        # Directories still to be scanned, relative to the source directory,
+        # with forward slashes ('' denotes the source directory itself).
+        pendingDirectoryPaths = ['']
+        while pendingDirectoryPaths:
+            relativeDirectoryPath = pendingDirectoryPaths.pop()
+            targetSubdirectoryPath = targetDirectoryPath / relativeDirectoryPath
+            targetSubdirectoryCreated = False
+            with os.scandir(sourceDirectoryPath / relativeDirectoryPath) as entries:
+                for entry in entries:
+                    statistics.visited += 1
+                    if relativeDirectoryPath:
+                        relativePath = f'{relativeDirectoryPath}/{entry.name}'
+                    else:
+                        relativePath = entry.name
+                    sourcePath = Path(entry.path)
+                    isDirectory = entry.is_dir()
+                    # Checking directories before descending into them prunes
+                    # ignored subtrees without visiting their contents.
+                    if self._ignoreRules.isIgnored(sourcePath, isDirectory):
+                        statistics.skipped += 1
+                        continue
+                    if entry.is_symlink():
+                        print(f'Warning: Skipping symlink: {sourcePath}')
+                        statistics.skipped += 1
+                        continue
+                    if isDirectory:
+                        pendingDirectoryPaths.append(relativePath)
+                        continue
+                    if excludeMatcher and excludeMatcher.isMatched(relativePath):
+                        statistics.skipped += 1
+                        continue
+                    if not targetSubdirectoryCreated:
+                        targetSubdirectoryPath.mkdir(parents=True, exist_ok=True)
+                        targetSubdirectoryCreated = True
+                    # `DirEntry` caches the result of `stat`, so the link
+                    # comparison does not need another system call.
+                    self._copy(
+                        sourcePath,
+                        targetSubdirectoryPath / entry.name,
+                        entry.stat()
+                    )
+                    statistics.copied += 1
+
+    def _excludeMatcher(
+        self,
+        excludePatterns: set[str] | None
+    ) -> PathMatcher | None:
+        # Exclude patterns use the same gitignore-style semantics as
+        # ".deployignore", relative to the directory being copied. Each
+        # distinct set is compiled only once.
+        if not excludePatterns:
+            return None
+        key = frozenset(excludePatterns)
+        matcher = self._excludeMatchers.get(key)
+        if matcher is None:
+            matcher = PathMatcher(sorted(excludePatterns))
+            self._excludeMatchers[key] = matcher
+        return matcher
+
+    def _copy(
+        self,
+        sourceFilePath: Path,
+        targetFilePath: Path,
+        sourceStat: os.stat_result | None = None
     ) -> None:
-        for sourceFilePath in sourceDirectoryPath.rglob('*'):
-            if sourceFilePath.is_dir():
-                continue
-            relativePath = sourceFilePath.relative_to(sourceDirectoryPath)
-            if excludePatterns:
-                if any(fnmatch(Utility.normalizeSlashes(relativePath), pattern)
-                    for pattern in excludePatterns):
-                    continue
-            targetFilePath = targetDirectoryPath / relativePath
-            self.copyFile(sourceFilePath, targetFilePath)
+        if self._linkSourceDirectoryPath is None:
+            copy2(sourceFilePath, targetFilePath)
+        elif self._tryLink(sourceFilePath, targetFilePath, sourceStat):
+            Profiler.count(Profiler.FILES_LINKED)
+            return
+        else:
+            self._clone(sourceFilePath, targetFilePath)
+        Profiler.count(Profiler.FILES_COPIED)
+        if sourceStat is None:
+            sourceStat = sourceFilePath.stat()
+        Profiler.count(Profiler.BYTES_WRITTEN, sourceStat.st_size)
+
+    def _tryLink(
+        self,
+        sourceFilePath: Path,
+        targetFilePath: Path,
+        sourceStat: os.stat_result | None
+    ) -> bool:
+        try:
+            previousFilePath = self._linkSourceDirectoryPath / \
+                targetFilePath.relative_to(self._linkTargetDirectoryPath)
+        except ValueError:
+            return False
+        if not self._isUnchanged(sourceFilePath, previousFilePath, sourceStat):
+            return False
+        try:
+            targetFilePath.unlink(missing_ok=True)
+            os.link(previousFilePath, targetFilePath)
+        except OSError:
+            # e.g. the deployments are on different file systems, or the
+            # file system does not support hardlinks.
+            return False
+        return True
+
+    def _isUnchanged(
+        self,
+        sourceFilePath: Path,
+        previousFilePath: Path,
+        sourceStat: os.stat_result | None
+    ) -> bool:
+        try:
+            if sourceStat is None:
+                sourceStat = sourceFilePath.stat()
+            previousStat = previousFilePath.stat()
+        except FileNotFoundError:
+            return False
+        if sourceStat.st_size != previousStat.st_size:
+            return False
+        if self._linkCompare == self.LINK_COMPARE_MTIME:
+            # `copy2` preserves modification times, so an unchanged source
+            # file has the same timestamp as its previously deployed copy.
+            return sourceStat.st_mtime_ns == previousStat.st_mtime_ns
+        return filecmp.cmp(sourceFilePath, previousFilePath, shallow=False)
+
+    def _clone(self, sourceFilePath: Path, targetFilePath: Path) -> None:
+        # The target may be a hardlink into the previous deployment, so it
+        # must be replaced rather than overwritten in place.
+        targetFilePath.unlink(missing_ok=True)
+        # Prefer a reflink (copy-on-write clone) where the file system offers
+        # one; it shares data blocks like a hardlink but is a separate file.
+        if self._reflinkSupported:
+            try:
+                with open(sourceFilePath, 'rb') as source, \
+                     open(targetFilePath, 'wb') as target:
+                    fcntl.ioctl(target.fileno(), self._FICLONE, source.fileno())
+                copystat(sourceFilePath, targetFilePath)
+                return
+            except OSError:
+                self._reflinkSupported = False
+        copy2(sourceFilePath, targetFilePath)
+
+    #endregion private
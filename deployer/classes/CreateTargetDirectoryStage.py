@@ -13,12 +13,47 @@ from .Context import Context
 from .Stage import Stage
 from datetime import datetime
 from pathlib import Path
+import re
 
 class CreateTargetDirectoryStage(Stage):
+    _TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
+    _TIMESTAMP_PATTERN = re.compile(r'^\d{8}_\d{6}$')
+
     def run(self, context: Context) -> None:
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        context.targetDirectoryPath /= timestamp
+        timestamp = datetime.now().strftime(self._TIMESTAMP_FORMAT)
+        parentDirectoryPath = context.targetDirectoryPath
+        context.targetDirectoryPath = parentDirectoryPath / timestamp
         context.targetDirectoryPath.mkdir(parents=True, exist_ok=False)
+        if context.linkCompare is None:
+            return
+        previousDirectoryPath = self._findPreviousDeployment(
+            parentDirectoryPath, timestamp)
+        if previousDirectoryPath is None:
+            return
+        context.copier.enableLinkDest(
+            previousDirectoryPath,
+            context.targetDirectoryPath,
+            context.linkCompare
+        )
 
     def status(self) -> str:
         return 'Creating target directory...'
+
+    #region private ------------------------------------------------------------
+
+    def _findPreviousDeployment(
+        self,
+        parentDirectoryPath: Path,
+        timestamp: str
+    ) -> Path | None:
+        # Timestamped names sort chronologically, so the most recent previous
+        # deployment is the greatest name below the current one.
+        candidates = [
+            path for path in parentDirectoryPath.iterdir()
+            if self._TIMESTAMP_PATTERN.match(path.name)
+                and path.name < timestamp
+                and path.is_dir()
+        ]
+        return max(candidates, default=None)
+
+    #endregion private
@@ -0,0 +1,260 @@
+##
+# CssPurger.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .Profiler import Profiler
+from .Utility import Utility
+from pathlib import Path
+import fnmatch
+import re
+
+class CssPurger:
+    """
+    Removes style rules whose selectors refer to class names, IDs or element
+    names that occur nowhere in the application's markup and scripts.
+
+    Usage is decided by tokens: every word in the scanned files counts as a
+    possible name, so a selector is kept if each of its class, ID and element
+    names is a token, starts with a token that ends with a hyphen (e.g.
+    `'alert-' + type` keeps "alert-danger"), or matches the safelist. Names
+    inside attribute selectors and functional pseudo-classes such as `:not()`
+    are not required. At-rules other than conditional group rules (e.g.
+    "@font-face", "@keyframes") are kept as they are.
+    """
+    SAFELIST_FILENAME = '.purgesafelist'
+    # Directories scanned for names, relative to the source root, and the
+    # suffixes of the files scanned in each.
+    SOURCE_SUFFIXES = {
+        'pages': {'.php', '.js', '.html', '.htm'},
+        'masterpages': {'.php', '.js', '.html', '.htm'},
+        'templates': {'.php', '.js', '.html', '.htm'},
+        'frontend': {'.js'},
+        'backend': {'.php'}
+    }
+    # Elements that browsers create without them appearing in markup.
+    _DEFAULT_SAFELIST = ['html', 'head', 'body', 'tbody']
+    _CONDITIONAL_AT_RULES = {'media', 'supports', 'layer', 'container', 'scope'}
+    _TOKEN_PATTERN = re.compile(r'[A-Za-z][A-Za-z0-9_-]*')
+    _GAP_PATTERN = re.compile(r'(?:\s+|/\*.*?\*/)*', re.DOTALL)
+    _AT_RULE_NAME_PATTERN = re.compile(r'@([\w-]+)')
+    _PSEUDO_PATTERN = re.compile(r'::?[\w-]+')
+    _CLASS_PATTERN = re.compile(r'\.([\w-]+)')
+    _ID_PATTERN = re.compile(r'#([\w-]+)')
+    _TYPE_PATTERN = re.compile(r'(?:^|[\s>+~])([A-Za-z][\w-]*)')
+    _tokens: set[str]
+    _prefixes: tuple[str, ...]
+    _safelistPattern: re.Pattern
+
+    def __init__(self, tokens: set[str], safelist: list[str] | None = None):
+        """
+        The safelist holds names, or wildcard patterns such as "bg-*", that
+        are kept even if they are not among the tokens.
+        """
+        self._tokens = tokens
+        self._prefixes = tuple(sorted(token for token in tokens
+            if token.endswith('-')))
+        patterns = self._DEFAULT_SAFELIST + (safelist or [])
+        self._safelistPattern = re.compile('|'.join(
+            fnmatch.translate(pattern) for pattern in patterns))
+
+    @classmethod
+    def collectTokens(cls, filePaths: list[Path]) -> set[str]:
+        result = set()
+        for filePath in filePaths:
+            content = filePath.read_text(encoding='utf-8', errors='replace')
+            result.update(cls._TOKEN_PATTERN.findall(content))
+        return result
+
+    @classmethod
+    def loadSafelist(cls, filePath: Path) -> list[str]:
+        """
+        Reads a safelist file, which lists one name or pattern per line, with
+        empty lines and lines starting with "#" ignored.
+        """
+        if not filePath.is_file():
+            return []
+        result = []
+        with open(filePath, 'r', encoding='utf-8') as file:
+            for line in file:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    result.append(line)
+        return result
+
+    def isUsed(self, name: str) -> bool:
+        return name in self._tokens \
+            or name.startswith(self._prefixes) \
+            or self._safelistPattern.match(name) is not None
+
+    def purge(self, css: str) -> str:
+        return self._purgeRules(css)
+
+    def purgeFile(self, filePath: Path) -> int:
+        """
+        Purges a stylesheet and returns the number of bytes removed. The file
+        is replaced rather than modified, since it may be a hardlink. A
+        purged stylesheet no longer matches its source map, so the reference
+        to it is removed.
+        """
+        data = filePath.read_bytes()
+        css = data.decode('utf-8')
+        purged = self.purge(css)
+        if purged == css:
+            return 0
+        purged = Utility.removeSourceMapComment(purged).encode('utf-8')
+        Utility.replaceFile(filePath, purged)
+        Profiler.count(Profiler.BYTES_WRITTEN, len(purged))
+        return len(data) - len(purged)
+
+    #region private ------------------------------------------------------------
+
+    def _purgeRules(self, css: str) -> str:
+        result = []
+        index = 0
+        length = len(css)
+        while index < length:
+            # Whitespace and comments between rules are copied as they are.
+            gap = self._GAP_PATTERN.match(css, index).end()
+            if gap > index:
+                result.append(css[index:gap])
+                index = gap
+                continue
+            if css[index] == '}':
+                # Unbalanced; copy rather than guess.
+                result.append('}')
+                index += 1
+                continue
+            preludeEnd = self._scan(css, index, '{;}')
+            if preludeEnd == length or css[preludeEnd] != '{':
+                # A statement without a block, e.g. "@import" or "@charset".
+                if preludeEnd < length and css[preludeEnd] == ';':
+                    preludeEnd += 1
+                result.append(css[index:preludeEnd])
+                index = preludeEnd
+                continue
+            blockEnd = self._blockEnd(css, preludeEnd)
+            prelude = css[index:preludeEnd]
+            body = css[preludeEnd + 1:blockEnd]
+            index = blockEnd + 1
+            if prelude.startswith('@'):
+                match = self._AT_RULE_NAME_PATTERN.match(prelude)
+                name = match.group(1).lower() if match else ''
+                if name in self._CONDITIONAL_AT_RULES:
+                    body = self._purgeRules(body)
+                    if self._GAP_PATTERN.fullmatch(body):
+                        continue
+                result.append(f'{prelude}{{{body}}}')
+                continue
+            selectors = [selector for selector in self._splitSelectors(prelude)
+                if self._isSelectorUsed(selector)]
+            if selectors:
+                result.append(f"{','.join(selectors)}{{{body}}}")
+        return ''.join(result)
+
+    def _splitSelectors(self, prelude: str) -> list[str]:
+        result = []
+        index = 0
+        while True:
+            end = self._scan(prelude, index, ',')
+            result.append(prelude[index:end])
+            if end == len(prelude):
+                return result
+            index = end + 1
+
+    def _isSelectorUsed(self, selector: str) -> bool:
+        if '\\' in selector:
+            return True  # Escaped names are not decoded; keep the rule.
+        selector = self._PSEUDO_PATTERN.sub('', self._stripGroups(selector))
+        names = self._CLASS_PATTERN.findall(selector) \
+            + self._ID_PATTERN.findall(selector) \
+            + [name.lower() for name in self._TYPE_PATTERN.findall(selector)]
+        return all(self.isUsed(name) for name in names)
+
+    def _stripGroups(self, selector: str) -> str:
+        """
+        Removes the contents of attribute selectors and of the arguments of
+        functional pseudo-classes, including the brackets and parentheses.
+        """
+        result = []
+        depth = 0
+        index = 0
+        while index < len(selector):
+            char = selector[index]
+            if char in '"\'':
+                index = self._skipString(selector, index)
+                continue
+            if char in '([':
+                depth += 1
+            elif char in ')]':
+                depth = max(0, depth - 1)
+            elif depth == 0:
+                result.append(char)
+            index += 1
+        return ''.join(result)
+
+    def _scan(self, css: str, index: int, stops: str) -> int:
+        """
+        Returns the index of the first of the stop characters outside of
+        comments, strings, parentheses and brackets, or the length of the
+        text if there is none.
+        """
+        depth = 0
+        length = len(css)
+        while index < length:
+            char = css[index]
+            if char == '/' and css.startswith('/*', index):
+                end = css.find('*/', index + 2)
+                index = length if end < 0 else end + 2
+                continue
+            if char in '"\'':
+                index = self._skipString(css, index)
+                continue
+            if char == '\\':
+                index += 2
+                continue
+            if char in '([':
+                depth += 1
+            elif char in ')]':
+                depth = max(0, depth - 1)
+            elif depth == 0 and char in stops:
+                return index
+            index += 1
+        return length
+
+    def _blockEnd(self, css: str, openIndex: int) -> int:
+        # Returns the index of the brace that closes the block.
+        depth = 0
+        index = openIndex
+        length = len(css)
+        while index < length:
+            index = self._scan(css, index, '{}')
+            if index == length:
+                break
+            depth += 1 if css[index] == '{' else -1
+            if depth == 0:
+                return index
+            index += 1
+        return length
+
+    def _skipString(self, css: str, index: int) -> int:
+        quote = css[index]
+        index += 1
+        length = len(css)
+        while index < length:
+            char = css[index]
+            if char == '\\':
+                index += 2
+                continue
+            index += 1
+            if char == quote or char == '\n':
+                break
+        return index
+
+    #endregion private
@@ -10,19 +10,50 @@
 ##
 
 from .Context import Context
+from .Copier import CopyStatistics
+from .CreateTargetDirectoryStage import CreateTargetDirectoryStage
 from .Stage import Stage
+from pathlib import Path
 
 class DeployDirectoryStage(Stage):
     _subdirectoryName: str
+    _statistics: CopyStatistics | None
 
     def __init__(self, subdirectoryName: str):
         self._subdirectoryName = subdirectoryName
+        self._statistics = None
 
     def run(self, context: Context) -> None:
-        context.copier.copyFilesRecursive(
+        self._statistics = context.copier.copyFilesRecursive(
             context.sourceDirectoryPath / self._subdirectoryName,
             context.targetDirectoryPath / self._subdirectoryName
         )
 
     def status(self) -> str:
         return f"Deploying '{self._subdirectoryName}' directory..."
+
+    def dependencies(self) -> list[type[Stage]]:
+        return [CreateTargetDirectoryStage]
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        sourceSubdirectoryPath = (
+            context.sourceDirectoryPath / self._subdirectoryName)
+        targetSubdirectoryPath = (
+            context.targetDirectoryPath / self._subdirectoryName)
+        updated = False
+        for changedPath in sorted(changedPaths):
+            if sourceSubdirectoryPath.is_relative_to(changedPath):
+                self.run(context)
+                return True
+            if not changedPath.is_relative_to(sourceSubdirectoryPath):
+                continue
+            context.copier.syncPath(
+                changedPath,
+                targetSubdirectoryPath /
+                    changedPath.relative_to(sourceSubdirectoryPath)
+            )
+            updated = True
+        return updated
+
+    def summary(self) -> str | None:
+        return str(self._statistics) if self._statistics else None
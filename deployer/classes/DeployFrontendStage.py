@@ -9,10 +9,19 @@
 # see <http://creativecommons.org/licenses/by/4.0/>.
 ##
 
+from .AssetBundler import AssetBundler
 from .Context import Context
+from .Copier import CopyStatistics
+from .CreateTargetDirectoryStage import CreateTargetDirectoryStage
+from .CssPurger import CssPurger
+from .IconSubsetter import IconSubsetter
 from .ManifestService import ManifestService, ManifestBlock
+from .Minifier import MinifyJob
+from .PurgeCssStage import PurgeCssStage
 from .Stage import Stage
+from .SubsetIconsStage import SubsetIconsStage
 from .Utility import Utility
+from .WorkerPool import WorkerPool
 from pathlib import Path
 
 class DeployFrontendStage(Stage):
@@ -20,43 +29,529 @@ class DeployFrontendStage(Stage):
     _MANIFEST_FILENAME = 'manifest.json'
     _ASSET_TYPE_JS = 'js'
     _ASSET_TYPE_CSS = 'css'
+    _VENDOR_BLOCK_NAME = 'vendor'
+    _fingerprint: bool
+    _bundleDefaults: bool
+    _fingerprintedPaths: dict[Path, Path]
+    _rewrittenPaths: set[Path]
+    _replacedFontPaths: dict[Path, set[Path]]
+    _bundledPaths: set[Path]
+    _vendorBlock: ManifestBlock | None = None
+    _cssPurger: CssPurger | None = None
+    _iconSubsetter: IconSubsetter | None = None
+    _statistics: CopyStatistics | None = None
+    _manifestBlocks: dict[str, ManifestBlock] | None = None
+
+    def __init__(
+        self,
+        *,
+        fingerprint: bool = False,
+        bundleDefaults: bool = False
+    ):
+        """
+        If `fingerprint` is set, manifest-declared assets are renamed after a
+        hash of their content (e.g. "app/app.1a2b3c4d.min.js"), so that they
+        can be cached indefinitely, and the deployed "manifest.json" refers
+        to them by these names. Stylesheets that are purged or have their
+        icons subset are renamed this way regardless, since their versioned
+        directories (e.g. "bootstrap-5.3.8/") are cached as immutable.
+
+        If `bundleDefaults` is set, the assets of the default libraries are
+        concatenated, in manifest order, into "vendor.min.js" and
+        "vendor.min.css", which the deployed "manifest.json" declares as the
+        default library "vendor". The bundled libraries stay declared without
+        assets, so that pages adding them by name keep working. Libraries that
+        refer to URLs are not bundled.
+        """
+        self._fingerprint = fingerprint
+        self._bundleDefaults = bundleDefaults
+        # Fingerprinted paths by the paths the assets are deployed to
+        # initially, both relative to the target subdirectory.
+        self._fingerprintedPaths = {}
+        # Stylesheets whose content differs from the library's, relative to
+        # the target subdirectory.
+        self._rewrittenPaths = set()
+        # Icon fonts that subsets replace, by the stylesheets that refer to
+        # the subsets, all relative to the target subdirectory.
+        self._replacedFontPaths = {}
+        # Assets of bundled libraries that no other library refers to, along
+        # with their source maps, relative to the target subdirectory.
+        self._bundledPaths = set()
 
     def run(self, context: Context) -> None:
         sourceSubdirectoryPath = (
             context.sourceDirectoryPath / self._SUBDIRECTORY_NAME)
         targetSubdirectoryPath = (
             context.targetDirectoryPath / self._SUBDIRECTORY_NAME)
+        # Fingerprinted names of an earlier run (when updating) are stale.
+        for fingerprintedPath in self._fingerprintedPaths.values():
+            context.copier.removePath(targetSubdirectoryPath / fingerprintedPath)
+        self._fingerprintedPaths = {}
+        self._rewrittenPaths = set()
+        self._replacedFontPaths = {}
+        self._bundledPaths = set()
+        self._cssPurger = context.cssPurger
+        self._iconSubsetter = context.iconSubsetter
         # 1. Load and deploy manifest-declared assets.
         manifestBlocks = ManifestService.loadFrontendManifest(
             sourceSubdirectoryPath / self._MANIFEST_FILENAME)
-        for _, manifestBlock in manifestBlocks.items():
-            self._deployManifestBlock(
-                context,
-                manifestBlock,
-                sourceSubdirectoryPath,
-                targetSubdirectoryPath
-            )
+        self._deployManifestBlocks(
+            context,
+            list(manifestBlocks.values()),
+            sourceSubdirectoryPath,
+            targetSubdirectoryPath,
+            rebundle=self._bundleDefaults
+        )
+        if self._bundleDefaults:
+            self._removeBundledAssets(
+                context, manifestBlocks, targetSubdirectoryPath)
+        self._manifestBlocks = manifestBlocks
         # 2. Save a minified copy of "manifest.json".
         ManifestService.saveFrontendManifest(
-            manifestBlocks,
+            self._transformManifestBlocks(manifestBlocks),
             targetSubdirectoryPath / self._MANIFEST_FILENAME
         )
-        # 3. Copy remaining files (images, fonts, etc.) excluding js/css and the
-        #    manifest file.
-        context.copier.copyFilesRecursive(
+        # 3. Copy remaining files (images, fonts, etc.) excluding js/css, the
+        #    manifest file, the source maps of rewritten stylesheets, and the
+        #    files that are dropped (see `_droppedPaths`).
+        self._statistics = context.copier.copyFilesRecursive(
             sourceSubdirectoryPath,
             targetSubdirectoryPath,
-            excludePatterns={'*.js', '*.css', self._MANIFEST_FILENAME}
+            excludePatterns={'*.js', '*.css', f'/{self._MANIFEST_FILENAME}',
+                *self._staleSourceMapPatterns(), *self._droppedPatterns()}
         )
 
     def status(self) -> str:
         return f"Deploying '{self._SUBDIRECTORY_NAME}' directory..."
 
+    def dependencies(self) -> list[type[Stage]]:
+        return [CreateTargetDirectoryStage, PurgeCssStage, SubsetIconsStage]
+
+    def summary(self) -> str | None:
+        return str(self._statistics) if self._statistics else None
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        sourceSubdirectoryPath = (
+            context.sourceDirectoryPath / self._SUBDIRECTORY_NAME)
+        targetSubdirectoryPath = (
+            context.targetDirectoryPath / self._SUBDIRECTORY_NAME)
+        # A different purger (see `PurgeCssStage.update`) or icon subsetter
+        # (see `SubsetIconsStage.update`) may keep different rules in every
+        # stylesheet.
+        if self._manifestBlocks is None \
+            or context.cssPurger is not self._cssPurger \
+            or context.iconSubsetter is not self._iconSubsetter \
+            or any(sourceSubdirectoryPath.is_relative_to(path)
+                for path in changedPaths):
+            self.run(context)
+            return True
+        changedPaths = {path for path in changedPaths
+            if path.is_relative_to(sourceSubdirectoryPath)}
+        if not changedPaths:
+            return False
+        droppedPaths = self._droppedPaths()
+        manifestFilePath = sourceSubdirectoryPath / self._MANIFEST_FILENAME
+        manifestBlocks = ManifestService.loadFrontendManifest(manifestFilePath)
+        # Redeploy the blocks whose declaration changed, and the blocks that
+        # reference a changed asset file.
+        changedNames = [
+            name for name, block in manifestBlocks.items()
+            if (manifestFilePath in changedPaths
+                    and self._manifestBlocks.get(name) != block)
+                or changedPaths & self._sourceAssetPaths(block, sourceSubdirectoryPath)
+        ]
+        # The bundle is rebuilt from all bundled blocks if any of them
+        # changed, or if a block was removed from it.
+        rebundle = self._bundleDefaults and any(
+            self._isBundled(manifestBlocks[name])
+                or self._isBundled(self._manifestBlocks.get(name))
+            for name in changedNames
+        )
+        changedBlocks = [
+            block for name, block in manifestBlocks.items()
+            if name in changedNames or (rebundle and self._isBundled(block))
+        ]
+        self._deployManifestBlocks(
+            context,
+            changedBlocks,
+            sourceSubdirectoryPath,
+            targetSubdirectoryPath,
+            rebundle=rebundle
+        )
+        if self._bundleDefaults and changedBlocks:
+            self._removeBundledAssets(
+                context, manifestBlocks, targetSubdirectoryPath)
+        # Fingerprinted names change with the content of the assets.
+        if manifestFilePath in changedPaths or (changedBlocks
+            and (self._fingerprint or self._rewritesStylesheets(context))):
+            ManifestService.saveFrontendManifest(
+                self._transformManifestBlocks(manifestBlocks),
+                targetSubdirectoryPath / self._MANIFEST_FILENAME
+            )
+        self._manifestBlocks = manifestBlocks
+        # Restore files that are no longer dropped, and mirror other files
+        # (images, fonts, etc.) individually.
+        droppedPaths -= self._droppedPaths()
+        for changedPath in sorted(changedPaths | {sourceSubdirectoryPath / path
+            for path in droppedPaths}):
+            if changedPath == manifestFilePath:
+                continue
+            context.copier.syncPath(
+                changedPath,
+                targetSubdirectoryPath /
+                    changedPath.relative_to(sourceSubdirectoryPath),
+                excludePatterns={'*.js', '*.css', *self._staleSourceMapPatterns()}
+            )
+        # Patterns anchored to the subdirectory do not apply to files and
+        # directories mirrored by themselves.
+        for path in self._droppedPaths():
+            context.copier.removePath(targetSubdirectoryPath / path)
+        return True
+
     #region private ------------------------------------------------------------
 
+    def _deployManifestBlocks(
+        self,
+        context: Context,
+        manifestBlocks: list[ManifestBlock],
+        sourceSubdirectoryPath: Path,
+        targetSubdirectoryPath: Path,
+        *,
+        rebundle: bool = False
+    ) -> None:
+        # Assets are resolved and copied in parallel. Those that need to be
+        # minified are collected and minified together in one batch.
+        with WorkerPool(context.jobs) as pool:
+            for manifestBlock in manifestBlocks:
+                self._deployManifestBlock(
+                    context,
+                    pool,
+                    manifestBlock,
+                    sourceSubdirectoryPath,
+                    targetSubdirectoryPath
+                )
+            minifyJobs = [job for job in pool.wait() if job is not None]
+        context.minifier.minifyBatch(
+            minifyJobs,
+            sourceSubdirectoryPath,
+            targetSubdirectoryPath
+        )
+        if self._rewritesStylesheets(context):
+            self._processStylesheets(
+                context,
+                manifestBlocks,
+                sourceSubdirectoryPath,
+                targetSubdirectoryPath
+            )
+        if rebundle:
+            self._bundleManifestBlocks(
+                context,
+                [block for block in manifestBlocks if self._isBundled(block)],
+                targetSubdirectoryPath
+            )
+        if self._bundleDefaults:
+            # Bundled assets are no longer referred to by the manifest.
+            manifestBlocks = [block for block in manifestBlocks
+                if not self._isBundled(block)]
+            if rebundle and self._vendorBlock is not None:
+                manifestBlocks.append(self._vendorBlock)
+        if self._fingerprint or self._rewritesStylesheets(context):
+            self._fingerprintAssets(
+                context,
+                manifestBlocks,
+                targetSubdirectoryPath
+            )
+
+    def _rewritesStylesheets(self, context: Context) -> bool:
+        return context.cssPurger is not None or context.iconSubsetter is not None
+
+    def _processStylesheets(
+        self,
+        context: Context,
+        manifestBlocks: list[ManifestBlock],
+        sourceSubdirectoryPath: Path,
+        targetSubdirectoryPath: Path
+    ) -> None:
+        # Unused rules are purged first, then icon glyphs are trimmed and the
+        # icon fonts subset. The source maps of rewritten stylesheets no longer
+        # apply.
+        processedPaths = set()
+        for manifestBlock in manifestBlocks:
+            for assetType, assetPath in self._localAssetPaths(manifestBlock):
+                if assetType != self._ASSET_TYPE_CSS:
+                    continue
+                targetAssetPath = targetSubdirectoryPath / \
+                    self._targetAssetPath(assetType, assetPath)
+                # The asset may be ignored, or shared with another block.
+                if not targetAssetPath.is_file() or targetAssetPath in processedPaths:
+                    continue
+                relativePath = targetAssetPath.relative_to(targetSubdirectoryPath)
+                self._rewrittenPaths.discard(relativePath)
+                self._replacedFontPaths.pop(relativePath, None)
+                if context.cssPurger is not None \
+                    and context.cssPurger.purgeFile(targetAssetPath) > 0:
+                    self._rewrittenPaths.add(relativePath)
+                if context.iconSubsetter is not None:
+                    replacedFontPaths = context.iconSubsetter.subsetStylesheet(
+                        targetAssetPath,
+                        (sourceSubdirectoryPath / assetPath).parent,
+                        context.copier
+                    )
+                    if replacedFontPaths is not None:
+                        self._rewrittenPaths.add(relativePath)
+                        self._replacedFontPaths[relativePath] = {
+                            path.relative_to(targetSubdirectoryPath)
+                            for path in replacedFontPaths
+                            if path.is_relative_to(targetSubdirectoryPath)}
+                        # The originals may be deployed already (when updating).
+                        for path in self._replacedFontPaths[relativePath]:
+                            context.copier.removePath(targetSubdirectoryPath / path)
+                if relativePath in self._rewrittenPaths:
+                    context.copier.removePath(
+                        self._sourceMapPath(targetAssetPath))
+                processedPaths.add(targetAssetPath)
+
+    def _sourceMapPath(self, path: Path) -> Path:
+        return path.with_name(f'{path.name}.map')
+
+    def _staleSourceMapPatterns(self) -> set[str]:
+        return {f'/{Utility.normalizeSlashes(self._sourceMapPath(path))}'
+            for path in self._rewrittenPaths}
+
+    def _droppedPaths(self) -> set[Path]:
+        """
+        Returns the files that are not deployed since nothing refers to them:
+        icon fonts that subsets replace, and the assets of bundled libraries.
+        """
+        return self._bundledPaths.union(*self._replacedFontPaths.values())
+
+    def _droppedPatterns(self) -> set[str]:
+        return {f'/{Utility.normalizeSlashes(path)}'
+            for path in self._droppedPaths()}
+
+    def _isBundled(self, manifestBlock: ManifestBlock | None) -> bool:
+        if manifestBlock is None or not manifestBlock.default_:
+            return False
+        for assetType in [self._ASSET_TYPE_JS, self._ASSET_TYPE_CSS]:
+            assetPaths = getattr(manifestBlock, assetType)
+            if assetPaths is None:
+                continue
+            if any(Utility.isUrl(assetPath)
+                for assetPath in Utility.ensureList(assetPaths)):
+                return False
+        return True
+
+    def _bundleManifestBlocks(
+        self,
+        context: Context,
+        manifestBlocks: list[ManifestBlock],
+        targetSubdirectoryPath: Path
+    ) -> None:
+        """
+        Concatenates the deployed assets of the given blocks into the vendor
+        bundle, and sets `_vendorBlock` to the block that declares it.
+        """
+        vendorBlock = ManifestBlock(css=None, js=None, default_=True)
+        for assetType in [self._ASSET_TYPE_JS, self._ASSET_TYPE_CSS]:
+            filePaths = []
+            for manifestBlock in manifestBlocks:
+                for type_, assetPath in self._localAssetPaths(manifestBlock):
+                    if type_ != assetType:
+                        continue
+                    filePath = targetSubdirectoryPath / \
+                        self._targetAssetPath(assetType, assetPath)
+                    # The asset may be ignored, or shared with another block.
+                    if filePath.is_file() and filePath not in filePaths:
+                        filePaths.append(filePath)
+            bundleFilePath = targetSubdirectoryPath / self._targetAssetPath(
+                assetType, Path(self._VENDOR_BLOCK_NAME))
+            if not filePaths:
+                context.copier.removePath(bundleFilePath)
+                continue
+            if assetType == self._ASSET_TYPE_JS:
+                AssetBundler.bundleJs(filePaths, bundleFilePath)
+            else:
+                AssetBundler.bundleCss(filePaths, bundleFilePath)
+            setattr(vendorBlock, assetType, self._VENDOR_BLOCK_NAME)
+        if vendorBlock.css is None and vendorBlock.js is None:
+            self._vendorBlock = None
+        else:
+            self._vendorBlock = vendorBlock
+
+    def _removeBundledAssets(
+        self,
+        context: Context,
+        manifestBlocks: dict[str, ManifestBlock],
+        targetSubdirectoryPath: Path
+    ) -> None:
+        """
+        Removes the deployed assets of bundled blocks, and their source maps,
+        unless a block that is not bundled refers to them too.
+        """
+        bundledPaths = set()
+        referencedPaths = set()
+        for manifestBlock in manifestBlocks.values():
+            paths = {self._targetAssetPath(assetType, assetPath)
+                for assetType, assetPath in self._localAssetPaths(manifestBlock)}
+            if self._vendorBlock is not None and self._isBundled(manifestBlock):
+                bundledPaths |= paths
+            else:
+                referencedPaths |= paths
+        # Parts that are referenced again are deployed with their blocks.
+        # Source maps are named after either the file (e.g. "x.min.js.map")
+        # or its stem (e.g. "x.min.map").
+        self._bundledPaths = set()
+        for path in bundledPaths - referencedPaths:
+            self._bundledPaths |= {path, self._sourceMapPath(path),
+                path.with_suffix('.map')}
+        for path in self._bundledPaths:
+            context.copier.removePath(targetSubdirectoryPath / path)
+        # Remove the directories this leaves empty, deepest first.
+        directoryPaths = {parent for path in self._bundledPaths
+            for parent in path.parents if parent != Path('.')}
+        for directoryPath in sorted(directoryPaths,
+            key=lambda path: len(path.parts), reverse=True):
+            directoryPath = targetSubdirectoryPath / directoryPath
+            if directoryPath.is_dir() and not any(directoryPath.iterdir()):
+                directoryPath.rmdir()
+
+    def _bundledManifestBlocks(
+        self,
+        manifestBlocks: dict[str, ManifestBlock]
+    ) -> dict[str, ManifestBlock]:
+        """
+        Returns the manifest blocks with the vendor block declared in place of
+        the first bundled block, and the bundled blocks emptied.
+        """
+        if self._VENDOR_BLOCK_NAME in manifestBlocks:
+            raise ValueError(f'Library name "{self._VENDOR_BLOCK_NAME}" is '
+                'reserved for the bundle of default libraries.')
+        if self._vendorBlock is None:
+            return manifestBlocks
+        result = {}
+        for name, block in manifestBlocks.items():
+            if not self._isBundled(block):
+                result[name] = block
+                continue
+            if self._VENDOR_BLOCK_NAME not in result:
+                result[self._VENDOR_BLOCK_NAME] = self._vendorBlock
+            result[name] = ManifestBlock(css=None, js=None)
+        return result
+
+    def _fingerprintAssets(
+        self,
+        context: Context,
+        manifestBlocks: list[ManifestBlock],
+        targetSubdirectoryPath: Path
+    ) -> None:
+        for manifestBlock in manifestBlocks:
+            for assetType, assetPath in self._localAssetPaths(manifestBlock):
+                relativePath = self._targetAssetPath(assetType, assetPath)
+                targetAssetPath = targetSubdirectoryPath / relativePath
+                # The asset may be ignored, or shared with a block that has
+                # already been processed.
+                if not targetAssetPath.is_file():
+                    continue
+                if not self._fingerprint and relativePath not in self._rewrittenPaths:
+                    # Drop the name given when the stylesheet was rewritten on
+                    # an earlier update.
+                    previousPath = self._fingerprintedPaths.pop(relativePath, None)
+                    if previousPath is not None:
+                        context.copier.removePath(
+                            targetSubdirectoryPath / previousPath)
+                    continue
+                fingerprintedPath = Utility.fingerprintedPath(targetAssetPath)
+                context.copier.moveFile(targetAssetPath, fingerprintedPath)
+                fingerprintedPath = fingerprintedPath.relative_to(
+                    targetSubdirectoryPath)
+                # Remove the previous version when redeploying.
+                previousPath = self._fingerprintedPaths.get(relativePath)
+                if previousPath is not None and previousPath != fingerprintedPath:
+                    context.copier.removePath(targetSubdirectoryPath / previousPath)
+                self._fingerprintedPaths[relativePath] = fingerprintedPath
+
+    def _transformManifestBlocks(
+        self,
+        manifestBlocks: dict[str, ManifestBlock]
+    ) -> dict[str, ManifestBlock]:
+        """
+        Returns the manifest blocks with the default blocks replaced by the
+        vendor block if bundling is enabled, and local assets referred to by
+        their fingerprinted names, including the suffix (e.g. ".min.js"), if
+        they were fingerprinted.
+        """
+        if self._bundleDefaults:
+            manifestBlocks = self._bundledManifestBlocks(manifestBlocks)
+        if not self._fingerprintedPaths:
+            return manifestBlocks
+        def transformAssetPaths(assetType, assetPaths):
+            if assetPaths is None:
+                return None
+            result = []
+            for assetPath in Utility.ensureList(assetPaths):
+                if not Utility.isUrl(assetPath):
+                    fingerprintedPath = self._fingerprintedPaths.get(
+                        self._targetAssetPath(assetType, Path(assetPath)))
+                    if fingerprintedPath is not None:
+                        assetPath = Utility.normalizeSlashes(fingerprintedPath)
+                result.append(assetPath)
+            return result if isinstance(assetPaths, list) else result[0]
+        return {
+            name: ManifestBlock(
+                css=transformAssetPaths(self._ASSET_TYPE_CSS, block.css),
+                js=transformAssetPaths(self._ASSET_TYPE_JS, block.js),
+                default_=block.default_
+            )
+            for name, block in manifestBlocks.items()
+        }
+
+    def _localAssetPaths(
+        self,
+        manifestBlock: ManifestBlock
+    ) -> list[tuple[str, Path]]:
+        result = []
+        for assetType in [self._ASSET_TYPE_JS, self._ASSET_TYPE_CSS]:
+            assetPaths = getattr(manifestBlock, assetType)
+            if assetPaths is None:
+                continue
+            for assetPath in Utility.ensureList(assetPaths):
+                if not Utility.isUrl(assetPath):
+                    result.append((assetType, Path(assetPath)))
+        return result
+
+    def _targetAssetPath(self, assetType: str, assetPath: Path) -> Path:
+        # The path an asset is deployed to; see `_deployAsset`.
+        if assetPath.suffix == f'.{assetType}':
+            return assetPath
+        return Utility.addSuffix(assetPath, assetType, isMinified=True)
+
+    def _sourceAssetPaths(
+        self,
+        manifestBlock: ManifestBlock,
+        sourceSubdirectoryPath: Path
+    ) -> set[Path]:
+        # All source files a block's assets may resolve to; see `_deployAsset`.
+        result = set()
+        for assetType in [self._ASSET_TYPE_JS, self._ASSET_TYPE_CSS]:
+            assetPaths = getattr(manifestBlock, assetType)
+            if assetPaths is None:
+                continue
+            for assetPath in Utility.ensureList(assetPaths):
+                if Utility.isUrl(assetPath):
+                    continue
+                assetPath = Path(assetPath)
+                if assetPath.suffix == f'.{assetType}':
+                    result.add(sourceSubdirectoryPath / assetPath)
+                    continue
+                for isMinified in [True, False]:
+                    result.add(sourceSubdirectoryPath / Utility.addSuffix(
+                        assetPath, assetType, isMinified=isMinified))
+        return result
+
     def _deployManifestBlock(
         self,
         context: Context,
+        pool: WorkerPool,
         manifestBlock: ManifestBlock,
         sourceSubdirectoryPath: Path,
         targetSubdirectoryPath: Path
@@ -67,6 +562,7 @@ class DeployFrontendStage(Stage):
                 continue
             self._deployAssetGroup(
                 context,
+                pool,
                 assetType,
                 Utility.ensureList(assetPaths),
                 sourceSubdirectoryPath,
@@ -76,6 +572,7 @@ class DeployFrontendStage(Stage):
     def _deployAssetGroup(
         self,
         context: Context,
+        pool: WorkerPool,
         assetType: str,
         assetPaths: list[str],
         sourceSubdirectoryPath: Path,
@@ -85,7 +582,10 @@ class DeployFrontendStage(Stage):
             if Utility.isUrl(assetPath):
                 # Skip URLs (e.g. CDN links)
                 continue
-            self._deployAsset(
+            # Each asset is resolved and copied independently, so they can be
+            # processed in parallel.
+            pool.submit(
+                self._deployAsset,
                 context,
                 assetType,
                 Path(assetPath),
@@ -100,7 +600,7 @@ class DeployFrontendStage(Stage):
         assetPath: Path,
         sourceSubdirectoryPath: Path,
         targetSubdirectoryPath: Path
-    ) -> None:
+    ) -> MinifyJob | None:
         # If the asset path has an explicit suffix (".js", ".min.js", ".css", or
         # ".min.css"), simply copy it as-is without transformation. This respects
         # the author's intent - either they provided only a minified file, or
@@ -110,7 +610,7 @@ class DeployFrontendStage(Stage):
                 sourceSubdirectoryPath / assetPath,
                 targetSubdirectoryPath / assetPath
             )
-            return
+            return None
         # If the asset path is suffixless, resolve it to a minified variant by
         # appending ".min.js" or ".min.css", and if that file exists, copy it.
         minifiedAssetPath = Utility.addSuffix(assetPath, assetType, isMinified=True)
@@ -121,7 +621,7 @@ class DeployFrontendStage(Stage):
                 sourceMinifiedAssetPath,
                 targetMinifiedAssetPath
             )
-            return
+            return None
         # If the minified variant is missing but the unminified file exists,
         # minify it to a file with a ".min.js" or ".min.css" suffix. This supports
         # assets that are under active development, where pre-minified versions
@@ -129,32 +629,28 @@ class DeployFrontendStage(Stage):
         unminifiedAssetPath = Utility.addSuffix(assetPath, assetType, isMinified=False)
         sourceUnminifiedAssetPath = sourceSubdirectoryPath / unminifiedAssetPath
         if sourceUnminifiedAssetPath.is_file():
-            self._minifyAsset(
+            return self._createMinifyJob(
                 context,
                 assetType,
                 sourceUnminifiedAssetPath,
                 targetMinifiedAssetPath
             )
-            return
         # If neither the minified nor the unminified file exists, raise
         # an error.
         raise FileNotFoundError(
             f'Missing file: {sourceMinifiedAssetPath} or {sourceUnminifiedAssetPath}')
 
-    def _minifyAsset(
+    def _createMinifyJob(
         self,
         context: Context,
         assetType: str,
         sourceAssetPath: Path,
         targetAssetPath: Path
-    ) -> None:
-        if context.ignoreRules.isIgnored(sourceAssetPath):
-            return
-        if assetType == self._ASSET_TYPE_JS:
-            context.minifier.minifyJs(sourceAssetPath, targetAssetPath)
-        elif assetType == self._ASSET_TYPE_CSS:
-            context.minifier.minifyCss(sourceAssetPath, targetAssetPath)
-        else:
+    ) -> MinifyJob | None:
+        if context.ignoreRules.isIgnored(sourceAssetPath, isDirectory=False):
+            return None
+        if assetType not in (self._ASSET_TYPE_JS, self._ASSET_TYPE_CSS):
             raise ValueError(f'Unknown asset type: {assetType}')
+        return MinifyJob(sourceAssetPath, targetAssetPath, assetType)
 
     #endregion private
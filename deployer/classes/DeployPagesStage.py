@@ -10,9 +10,14 @@
 ##
 
 from .Context import Context
+from .Copier import CopyStatistics
+from .CreateTargetDirectoryStage import CreateTargetDirectoryStage
+from .CssPurger import CssPurger
 from .ManifestService import ManifestService, ManifestBlock
+from .PurgeCssStage import PurgeCssStage
 from .Stage import Stage
 from .Utility import Utility
+from .WorkerPool import WorkerPool
 from pathlib import Path
 
 class DeployPagesStage(Stage):
@@ -22,29 +27,94 @@ class DeployPagesStage(Stage):
     _TARGET_FILENAME_CSS = 'page.min.css'
     _ASSET_TYPE_JS = 'js'
     _ASSET_TYPE_CSS = 'css'
+    _fingerprint: bool
+    _statistics: CopyStatistics | None = None
+    _cssPurger: CssPurger | None = None
+
+    def __init__(self, *, fingerprint: bool = False):
+        """
+        If `fingerprint` is set, the bundles are named after a hash of their
+        content (e.g. "page.1a2b3c4d.min.js"), so that they can be cached
+        indefinitely.
+        """
+        self._fingerprint = fingerprint
 
     def run(self, context: Context) -> None:
         sourceSubdirectoryPath = (
             context.sourceDirectoryPath / self._SUBDIRECTORY_NAME)
         targetSubdirectoryPath = (
             context.targetDirectoryPath / self._SUBDIRECTORY_NAME)
-        for sourcePageDirectoryPath in sourceSubdirectoryPath.iterdir():
+        self._cssPurger = context.cssPurger
+        # Pages are independent of each other, so they are deployed in
+        # parallel. Sorting keeps the order of reported errors stable.
+        with WorkerPool(context.jobs) as pool:
+            for sourcePageDirectoryPath in sorted(sourceSubdirectoryPath.iterdir()):
+                if not sourcePageDirectoryPath.is_dir():
+                    continue
+                # Skip the page directory entirely if it's ignored. This
+                # prevents accidental generation of empty `page.min.js` and
+                # `page.min.css`, and avoids writing a `manifest.json` that
+                # references them despite the page being excluded.
+                if context.ignoreRules.isIgnored(
+                    sourcePageDirectoryPath, isDirectory=True):
+                    continue
+                pool.submit(
+                    self._deployPage,
+                    context,
+                    sourcePageDirectoryPath,
+                    targetSubdirectoryPath / sourcePageDirectoryPath.name
+                )
+            self._statistics = CopyStatistics()
+            for statistics in pool.wait():
+                self._statistics += statistics
+
+    def status(self) -> str:
+        return f"Deploying '{self._SUBDIRECTORY_NAME}' directory..."
+
+    def dependencies(self) -> list[type[Stage]]:
+        return [CreateTargetDirectoryStage, PurgeCssStage]
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        sourceSubdirectoryPath = (
+            context.sourceDirectoryPath / self._SUBDIRECTORY_NAME)
+        targetSubdirectoryPath = (
+            context.targetDirectoryPath / self._SUBDIRECTORY_NAME)
+        pageNames = set()
+        # A different purger (see `PurgeCssStage.update`) may keep different
+        # rules in every page's stylesheet.
+        purgerChanged = context.cssPurger is not self._cssPurger
+        self._cssPurger = context.cssPurger
+        for changedPath in changedPaths:
+            if purgerChanged or sourceSubdirectoryPath.is_relative_to(changedPath):
+                # Revisit every page, including deployed pages that have been
+                # deleted or ignored since.
+                for directoryPath in [sourceSubdirectoryPath, targetSubdirectoryPath]:
+                    if directoryPath.is_dir():
+                        pageNames.update(path.name for path in directoryPath.iterdir()
+                            if path.is_dir())
+            elif changedPath.is_relative_to(sourceSubdirectoryPath):
+                pageNames.add(
+                    changedPath.relative_to(sourceSubdirectoryPath).parts[0])
+        # A page is small, so it is redeployed from scratch. This also drops
+        # files that were deleted from its source.
+        for pageName in sorted(pageNames):
+            sourcePageDirectoryPath = sourceSubdirectoryPath / pageName
+            targetPageDirectoryPath = targetSubdirectoryPath / pageName
+            context.copier.removePath(targetPageDirectoryPath)
             if not sourcePageDirectoryPath.is_dir():
                 continue
-            # Skip the page directory entirely if it's ignored. This prevents
-            # accidental generation of empty `page.min.js` and `page.min.css`,
-            # and avoids writing a `manifest.json` that references them despite
-            # the page being excluded.
-            if context.ignoreRules.isIgnored(sourcePageDirectoryPath):
+            if context.ignoreRules.isIgnored(
+                sourcePageDirectoryPath, isDirectory=True):
                 continue
             self._deployPage(
                 context,
                 sourcePageDirectoryPath,
-                targetSubdirectoryPath / sourcePageDirectoryPath.name
+                targetPageDirectoryPath
             )
+        return bool(pageNames)
 
-    def status(self) -> str:
-        return f"Deploying '{self._SUBDIRECTORY_NAME}' directory..."
+    def summary(self) -> str | None:
+        return str(self._statistics) if self._statistics else None
 
     #region private ------------------------------------------------------------
 
@@ -53,7 +123,7 @@ class DeployPagesStage(Stage):
         context: Context,
         sourcePageDirectoryPath: Path,
         targetPageDirectoryPath: Path
-    ) -> None:
+    ) -> CopyStatistics:
         manifestFilePath = sourcePageDirectoryPath / self._MANIFEST_FILENAME
         # Presence of page-level manifest is optional.
         if manifestFilePath.is_file():
@@ -66,18 +136,33 @@ class DeployPagesStage(Stage):
                 sourcePageDirectoryPath,
                 targetPageDirectoryPath
             )
+            targetCssPath = targetPageDirectoryPath / self._TARGET_FILENAME_CSS
+            if context.cssPurger is not None and targetCssPath.is_file():
+                context.cssPurger.purgeFile(targetCssPath)
+            targetFilenames = {
+                self._ASSET_TYPE_JS: self._TARGET_FILENAME_JS,
+                self._ASSET_TYPE_CSS: self._TARGET_FILENAME_CSS
+            }
+            if self._fingerprint:
+                for assetType, targetFilename in targetFilenames.items():
+                    targetAssetPath = targetPageDirectoryPath / targetFilename
+                    if not targetAssetPath.is_file():
+                        continue
+                    fingerprintedPath = Utility.fingerprintedPath(targetAssetPath)
+                    context.copier.moveFile(targetAssetPath, fingerprintedPath)
+                    targetFilenames[assetType] = fingerprintedPath.name
             # 2. Save a minified, transformed copy of "manifest.json" reflecting
             #    bundled assets.
             ManifestService.savePageManifest(
-                self._transformManifestBlock(manifestBlock),
+                self._transformManifestBlock(manifestBlock, targetFilenames),
                 targetPageDirectoryPath / self._MANIFEST_FILENAME
             )
         # 3. Copy remaining files (images, fonts, etc.) excluding js/css and the
         #    manifest file.
-        context.copier.copyFilesRecursive(
+        return context.copier.copyFilesRecursive(
             sourcePageDirectoryPath,
             targetPageDirectoryPath,
-            excludePatterns={'*.js', '*.css', self._MANIFEST_FILENAME}
+            excludePatterns={'*.js', '*.css', f'/{self._MANIFEST_FILENAME}'}
         )
 
     def _deployManifestBlock(
@@ -162,7 +247,7 @@ class DeployPagesStage(Stage):
             sourceAssetPath = sourcePageDirectoryPath / assetPath
             if not sourceAssetPath.is_file():
                 raise FileNotFoundError(f'Missing file: {sourceAssetPath}')
-            if context.ignoreRules.isIgnored(sourceAssetPath):
+            if context.ignoreRules.isIgnored(sourceAssetPath, isDirectory=False):
                 continue
             # Note that even if an asset is already minified (e.g. ends with
             # ".min.js"), it will still be combined with the others and passed
@@ -172,12 +257,14 @@ class DeployPagesStage(Stage):
 
     def _transformManifestBlock(
         self,
-        manifestBlock: ManifestBlock
+        manifestBlock: ManifestBlock,
+        targetFilenames: dict[str, str]
     ) -> ManifestBlock:
         """
         Returns a new ManifestBlock with local asset references replaced by
-        page.min.js/css, and remote URLs preserved. Single-item lists are
-        flattened into a string if only one path remains.
+        the bundle of their type (page.min.js/css, or its fingerprinted name),
+        and remote URLs preserved. Single-item lists are flattened into a
+        string if only one path remains.
         """
         def classifyAssets(assetPaths):
             remote, local = [], []
@@ -193,8 +280,10 @@ class DeployPagesStage(Stage):
                 return None
             return transformed[0] if len(transformed) == 1 else transformed
         return ManifestBlock(
-            js=transformAssetBlock(manifestBlock.js,  self._TARGET_FILENAME_JS),
-            css=transformAssetBlock(manifestBlock.css, self._TARGET_FILENAME_CSS)
+            js=transformAssetBlock(manifestBlock.js,
+                targetFilenames[self._ASSET_TYPE_JS]),
+            css=transformAssetBlock(manifestBlock.css,
+                targetFilenames[self._ASSET_TYPE_CSS])
         )
 
     #endregion private
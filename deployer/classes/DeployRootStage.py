@@ -10,7 +10,9 @@
 ##
 
 from .Context import Context
+from .CreateTargetDirectoryStage import CreateTargetDirectoryStage
 from .Stage import Stage
+from pathlib import Path
 
 class DeployRootStage(Stage):
     _SOURCE_CONFIG_FILENAME = 'config.live.php'
@@ -20,20 +22,48 @@ class DeployRootStage(Stage):
         for sourceFilePath in context.sourceDirectoryPath.iterdir():
             if sourceFilePath.is_dir():
                 continue
-            if sourceFilePath.name == self._TARGET_CONFIG_FILENAME:
-                # Don't copy developer's config file
-                continue
-            if sourceFilePath.name == self._SOURCE_CONFIG_FILENAME:
-                # Copy live config as default config
-                targetFileName = self._TARGET_CONFIG_FILENAME
-            else:
-                # Copy other files as they are
-                targetFileName = sourceFilePath.name
-            context.copier.copyFile(
-                sourceFilePath,
-                context.targetDirectoryPath / targetFileName,
-                createTargetDirectory = False
-            )
+            self._deployFile(context, sourceFilePath)
 
     def status(self) -> str:
         return 'Deploying root files...'
+
+    def dependencies(self) -> list[type[Stage]]:
+        return [CreateTargetDirectoryStage]
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        if context.sourceDirectoryPath in changedPaths:
+            self.run(context)
+            return True
+        updated = False
+        for changedPath in sorted(changedPaths):
+            if changedPath.parent != context.sourceDirectoryPath:
+                continue
+            if changedPath.is_dir():
+                continue
+            self._deployFile(context, changedPath)
+            updated = True
+        return updated
+
+    #region private ------------------------------------------------------------
+
+    def _deployFile(self, context: Context, sourceFilePath: Path) -> None:
+        if sourceFilePath.name == self._TARGET_CONFIG_FILENAME:
+            # Don't copy developer's config file
+            return
+        if sourceFilePath.name == self._SOURCE_CONFIG_FILENAME:
+            # Copy live config as default config
+            targetFileName = self._TARGET_CONFIG_FILENAME
+        else:
+            # Copy other files as they are
+            targetFileName = sourceFilePath.name
+        targetFilePath = context.targetDirectoryPath / targetFileName
+        if not sourceFilePath.exists():
+            context.copier.removePath(targetFilePath)
+            return
+        context.copier.copyFile(
+            sourceFilePath,
+            targetFilePath,
+            createTargetDirectory = False
+        )
+
+    #endregion private
@@ -9,20 +9,119 @@
 # see <http://creativecommons.org/licenses/by/4.0/>.
 ##
 
+from .EsbuildService import EsbuildService
+from .Profiler import Profiler
 from pathlib import Path
+import platform
+import shutil
 import subprocess
+import sys
+import time
 
 class Esbuild:
+    BACKEND_PROCESS = 'process'
+    BACKEND_SERVICE = 'service'
+    _VERSION = '0.25.5'
+    # esbuild names its platform builds (and npm packages, e.g.
+    # "@esbuild/linux-x64") after Node's `process.platform` and `process.arch`.
+    _OPERATING_SYSTEMS = {
+        'win32': 'win32',
+        'linux': 'linux',
+        'darwin': 'darwin',
+        'freebsd': 'freebsd'
+    }
+    _ARCHITECTURES = {
+        'amd64': 'x64',
+        'x86_64': 'x64',
+        'arm64': 'arm64',
+        'aarch64': 'arm64',
+        'x86': 'ia32',
+        'i386': 'ia32',
+        'i686': 'ia32'
+    }
+    _SERVICE_TIMEOUT = 120.0  # seconds
     _executablePath: Path
+    _version: str
+    _service: EsbuildService | None
 
-    def __init__(self, rootDirectoryPath: Path):
-        self._executablePath = (
+    def __init__(
+        self,
+        rootDirectoryPath: Path,
+        backend: str = BACKEND_PROCESS
+    ):
+        self._executablePath = self.resolveExecutablePath(rootDirectoryPath)
+        if self._executablePath == self.executablePath(rootDirectoryPath):
+            self._version = self._VERSION
+        else:
+            # An esbuild found on the PATH may be of any version, which must
+            # not share cache entries with the bundled one.
+            self._version = self._queryVersion()
+        if backend == self.BACKEND_PROCESS:
+            self._service = None
+        elif backend == self.BACKEND_SERVICE:
+            self._service = EsbuildService(
+                self._executablePath, self._version, self._SERVICE_TIMEOUT)
+        else:
+            raise ValueError(f'Unknown esbuild backend: {backend}')
+
+    @classmethod
+    def platformName(cls) -> str:
+        """
+        Returns esbuild's name for the running platform, e.g. "win32-x64" or
+        "linux-arm64".
+        """
+        operatingSystem = next(
+            (name for prefix, name in cls._OPERATING_SYSTEMS.items()
+                if sys.platform.startswith(prefix)),
+            sys.platform
+        )
+        machine = platform.machine().lower()
+        architecture = cls._ARCHITECTURES.get(machine, machine)
+        return f'{operatingSystem}-{architecture}'
+
+    @classmethod
+    def executablePath(cls, rootDirectoryPath: Path) -> Path:
+        """
+        Returns the path of the bundled esbuild binary for the running
+        platform, whether or not it exists.
+        """
+        platformName = cls.platformName()
+        fileName = 'esbuild.exe' if platformName.startswith('win32') else 'esbuild'
+        return (
             rootDirectoryPath /
             'esbuild' /
-            'win32-x64-0.25.5' /
-            'esbuild.exe'
+            f'{platformName}-{cls._VERSION}' /
+            fileName
         )
 
+    @classmethod
+    def resolveExecutablePath(cls, rootDirectoryPath: Path) -> Path:
+        """
+        Returns the bundled binary for the running platform if present,
+        otherwise an esbuild found on the PATH. If neither exists, the bundled
+        path is returned so that the error names the expected location.
+        """
+        executablePath = cls.executablePath(rootDirectoryPath)
+        if executablePath.is_file():
+            return executablePath
+        systemExecutablePath = shutil.which('esbuild')
+        if systemExecutablePath is not None:
+            return Path(systemExecutablePath)
+        return executablePath
+
+    def close(self) -> None:
+        if self._service is not None:
+            self._service.close()
+
+    def version(self) -> str:
+        return self._version
+
+    def flags(self, *, minify: bool = True) -> list[str]:
+        flags = ['--log-level=warning']
+        if minify:
+            flags.append('--minify')
+        return flags
+
     def run(
         self,
         inputFilePath: Path,
@@ -30,12 +129,135 @@ class Esbuild:
         *,
         minify: bool = True
     ) -> None:
+        if self._service is not None:
+            self._transform([inputFilePath], outputFilePath,
+                loader=inputFilePath.suffix[1:], minify=minify)
+            return
         command = [
             str(self._executablePath),
             str(inputFilePath),
             f'--outfile={outputFilePath}',
-            '--log-level=warning'
+            *self.flags(minify=minify)
         ]
-        if minify:
-            command.append('--minify')
-        subprocess.run(command, check=True)
+        self._runProcess(command)
+
+    def runBatch(
+        self,
+        inputFilePaths: list[Path],
+        outputDirectoryPath: Path,
+        baseDirectoryPath: Path,
+        *,
+        outExtensions: dict[str, str] | None = None,
+        minify: bool = True
+    ) -> None:
+        """
+        Processes several entry points in a single esbuild process. Each output
+        is written to `outputDirectoryPath`, at the input's path relative to
+        `baseDirectoryPath`, with its extension mapped by `outExtensions` (for
+        example, ".js" to ".min.js").
+        """
+        if self._service is not None:
+            for inputFilePath in inputFilePaths:
+                outputFilePath = outputDirectoryPath / \
+                    inputFilePath.relative_to(baseDirectoryPath)
+                outExtension = (outExtensions or {}).get(inputFilePath.suffix)
+                if outExtension:
+                    outputFilePath = outputFilePath.with_name(
+                        outputFilePath.stem + outExtension)
+                outputFilePath.parent.mkdir(parents=True, exist_ok=True)
+                self._transform([inputFilePath], outputFilePath,
+                    loader=inputFilePath.suffix[1:], minify=minify)
+            return
+        command = [
+            str(self._executablePath),
+            *(str(inputFilePath) for inputFilePath in inputFilePaths),
+            f'--outdir={outputDirectoryPath}',
+            f'--outbase={baseDirectoryPath}',
+            *(f'--out-extension:{extension}={outExtension}'
+                for extension, outExtension in (outExtensions or {}).items()),
+            *self.flags(minify=minify)
+        ]
+        self._runProcess(command)
+
+    def runStdin(
+        self,
+        inputFilePaths: list[Path],
+        outputFilePath: Path,
+        *,
+        loader: str,
+        minify: bool = True
+    ) -> None:
+        """
+        Streams the inputs, each followed by a newline, through esbuild's
+        standard input as if they were a single file.
+        """
+        if self._service is not None:
+            self._transform(inputFilePaths, outputFilePath,
+                loader=loader, minify=minify)
+            return
+        command = [
+            str(self._executablePath),
+            f'--loader={loader}',
+            f'--outfile={outputFilePath}',
+            *self.flags(minify=minify)
+        ]
+        Profiler.count(Profiler.ESBUILD_SPAWNS)
+        startTime = time.perf_counter()
+        with subprocess.Popen(command, stdin=subprocess.PIPE) as process:
+            try:
+                for inputFilePath in inputFilePaths:
+                    with open(inputFilePath, 'rb') as inputFile:
+                        shutil.copyfileobj(inputFile, process.stdin)
+                    process.stdin.write(b'\n')
+            except BrokenPipeError:
+                pass  # The process exited early; its exit code tells why.
+            finally:
+                process.stdin.close()
+            returnCode = process.wait()
+        Profiler.recordEsbuild(time.perf_counter() - startTime)
+        if returnCode != 0:
+            raise subprocess.CalledProcessError(returnCode, command)
+
+    #region private ------------------------------------------------------------
+
+    def _queryVersion(self) -> str:
+        Profiler.count(Profiler.ESBUILD_SPAWNS)
+        result = subprocess.run(
+            [str(self._executablePath), '--version'],
+            check=True,
+            capture_output=True,
+            text=True
+        )
+        return result.stdout.strip()
+
+    def _runProcess(self, command: list[str]) -> None:
+        Profiler.count(Profiler.ESBUILD_SPAWNS)
+        startTime = time.perf_counter()
+        try:
+            subprocess.run(command, check=True)
+        finally:
+            Profiler.recordEsbuild(time.perf_counter() - startTime)
+
+    def _transform(
+        self,
+        inputFilePaths: list[Path],
+        outputFilePath: Path,
+        *,
+        loader: str,
+        minify: bool
+    ) -> None:
+        flags = [f'--loader={loader}', *self.flags(minify=minify)]
+        if len(inputFilePaths) == 1:
+            input = inputFilePaths[0].read_bytes()
+            # Name the file in error messages.
+            flags.append(f'--sourcefile={inputFilePaths[0]}')
+        else:
+            input = b''.join(path.read_bytes() + b'\n' for path in inputFilePaths)
+        startTime = time.perf_counter()
+        try:
+            output = self._service.transform(input, flags)
+        finally:
+            Profiler.recordEsbuild(time.perf_counter() - startTime)
+        outputFilePath.write_bytes(output)
+
+    #endregion private
@@ -0,0 +1,66 @@
+##
+# EsbuildMinifierBackend.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .Esbuild import Esbuild
+from .MinifierBackend import MinifierBackend, MinifyJob
+from pathlib import Path
+
+class EsbuildMinifierBackend(MinifierBackend):
+    _esbuild: Esbuild
+
+    def __init__(self, esbuild: Esbuild):
+        self._esbuild = esbuild
+
+    def cacheParameters(self) -> list[str]:
+        return [self._esbuild.version(), *self._esbuild.flags()]
+
+    def minify(self, job: MinifyJob) -> None:
+        # If there's only one input file, run esbuild directly.
+        if isinstance(job.inputFilePathOrPaths, Path):
+            self._esbuild.run(job.inputFilePathOrPaths, job.outputFilePath)
+            return
+        # If there are multiple input files, stream their concatenated contents
+        # to esbuild's standard input. Since there's no file name, the loader
+        # must be given explicitly.
+        self._esbuild.runStdin(
+            job.inputFilePathOrPaths,
+            job.outputFilePath,
+            loader=job.suffix
+        )
+
+    def minifyMirrored(
+        self,
+        jobs: list[MinifyJob],
+        sourceBaseDirectoryPath: Path,
+        targetBaseDirectoryPath: Path
+    ) -> None:
+        # A single esbuild process handles all of them as multiple entry
+        # points. esbuild picks the loader and the output extension by the
+        # input's suffix, so only jobs whose suffix agrees qualify.
+        batchJobs = []
+        for job in jobs:
+            if job.inputFilePathOrPaths.suffix == f'.{job.suffix}':
+                batchJobs.append(job)
+            else:
+                self.minify(job)
+        if not batchJobs:
+            return
+        self._esbuild.runBatch(
+            [job.inputFilePathOrPaths for job in batchJobs],
+            targetBaseDirectoryPath,
+            sourceBaseDirectoryPath,
+            outExtensions={
+                f'.{job.suffix}': f'.min.{job.suffix}' for job in batchJobs
+            }
+        )
+
+    def close(self) -> None:
+        self._esbuild.close()
@@ -0,0 +1,316 @@
+##
+# EsbuildService.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .Profiler import Profiler
+from pathlib import Path
+import struct
+import subprocess
+import threading
+
+class EsbuildServiceError(Exception):
+    pass
+
+class _PendingRequest:
+    event: threading.Event
+    response: object
+    error: Exception | None
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.response = None
+        self.error = None
+
+class EsbuildService:
+    """
+    Keeps a single esbuild process running in service mode (the protocol its
+    JavaScript API uses) and sends transform requests to it, so process
+    startup is paid once per deploy instead of once per file. Requests from
+    several threads are multiplexed over the same pipes. If the process dies
+    it is restarted on the next request; a request that hangs longer than the
+    timeout kills the process.
+    """
+    _executablePath: Path
+    _version: str
+    _timeout: float
+    _process: subprocess.Popen | None
+    _reader: threading.Thread | None
+    _lock: threading.Lock
+    _pending: dict[int, _PendingRequest]
+    _nextId: int
+
+    def __init__(self, executablePath: Path, version: str, timeout: float):
+        self._executablePath = executablePath
+        self._version = version
+        self._timeout = timeout
+        self._process = None
+        self._reader = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._nextId = 0
+
+    def transform(self, input: bytes, flags: list[str]) -> bytes:
+        request = {
+            'command': 'transform',
+            'flags': flags,
+            'input': input,
+            'inputFS': False
+        }
+        try:
+            response = self._request(request)
+        except EsbuildServiceError as e:
+            # The process may have crashed for reasons unrelated to this
+            # request, so retry once on a fresh process.
+            print(f'Warning: Restarting esbuild service ({e})')
+            response = self._request(request)
+        if not isinstance(response, dict):
+            raise EsbuildServiceError('Unexpected response from esbuild service.')
+        if response.get('error'):
+            raise EsbuildServiceError(response['error'])
+        errors = response.get('errors') or []
+        if errors:
+            raise EsbuildServiceError(
+                '\n'.join(self._formatMessage(error) for error in errors))
+        code = response.get('code', b'')
+        if response.get('codeFS'):
+            # The output was written to a file, whose path is in "code".
+            codeFilePath = Path(self._asText(code))
+            code = codeFilePath.read_bytes()
+            codeFilePath.unlink(missing_ok=True)
+        return code if isinstance(code, bytes) else code.encode('utf-8')
+
+    def close(self) -> None:
+        with self._lock:
+            process, reader = self._process, self._reader
+            self._process, self._reader = None, None
+        if process is None:
+            return
+        # Closing standard input asks the service to exit.
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=self._timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        if reader is not None:
+            reader.join()
+
+    #region private ------------------------------------------------------------
+
+    def _request(self, value: dict) -> object:
+        pending = _PendingRequest()
+        with self._lock:
+            if self._process is None:
+                self._start()
+            requestId = self._nextId
+            self._nextId += 1
+            self._pending[requestId] = pending
+            try:
+                self._process.stdin.write(self._encodePacket(requestId, True, value))
+                self._process.stdin.flush()
+            except OSError as e:
+                self._pending.pop(requestId, None)
+                self._discard(self._process)
+                raise EsbuildServiceError(f'Failed to write request: {e}')
+            process = self._process
+        if not pending.event.wait(self._timeout):
+            with self._lock:
+                self._pending.pop(requestId, None)
+                self._discard(process)
+            raise TimeoutError(
+                f'esbuild service did not respond within {self._timeout} seconds.')
+        if pending.error is not None:
+            raise pending.error
+        return pending.response
+
+    def _start(self) -> None:
+        # Must be called with the lock held.
+        Profiler.count(Profiler.ESBUILD_SPAWNS)
+        self._process = subprocess.Popen(
+            [str(self._executablePath), f'--service={self._version}'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        )
+        self._reader = threading.Thread(
+            target=self._readLoop,
+            args=(self._process,),
+            daemon=True
+        )
+        self._reader.start()
+
+    def _discard(self, process: subprocess.Popen) -> None:
+        # Must be called with the lock held. Kills the process; the reader
+        # thread then fails every request still waiting on it.
+        if self._process is process:
+            self._process = None
+            self._reader = None
+        try:
+            process.kill()
+        except OSError:
+            pass
+
+    def _readLoop(self, process: subprocess.Popen) -> None:
+        error: Exception | None = None
+        try:
+            # The first packet carries the binary's version as plain bytes.
+            version = self._readPacket(process.stdout)
+            if version is None:
+                raise EsbuildServiceError('esbuild service exited during startup.')
+            if version.decode('utf-8') != self._version:
+                raise EsbuildServiceError(
+                    f'esbuild service version mismatch: {version!r}')
+            while (packet := self._readPacket(process.stdout)) is not None:
+                requestId, isRequest, value = self._decodePacket(packet)
+                if isRequest:
+                    # Nothing is registered on our side (no plugins, no
+                    # watch mode), so acknowledge requests such as pings.
+                    with self._lock:
+                        process.stdin.write(self._encodePacket(requestId, False, {}))
+                        process.stdin.flush()
+                    continue
+                with self._lock:
+                    pending = self._pending.pop(requestId, None)
+                if pending is not None:
+                    pending.response = value
+                    pending.event.set()
+            error = EsbuildServiceError(
+                f'esbuild service exited with code {process.wait()}.')
+        except Exception as e:
+            error = e if isinstance(e, EsbuildServiceError) \
+                else EsbuildServiceError(str(e))
+            try:
+                process.kill()
+            except OSError:
+                pass
+        with self._lock:
+            if self._process is process:
+                self._process = None
+                self._reader = None
+            # Requests are only ever sent to the current process, so anything
+            # still pending was sent to this one.
+            pending, self._pending = self._pending, {}
+        for request in pending.values():
+            request.error = error
+            request.event.set()
+
+    @classmethod
+    def _readPacket(cls, stream) -> bytes | None:
+        header = cls._readExactly(stream, 4)
+        if header is None:
+            return None
+        (length,) = struct.unpack('<I', header)
+        packet = cls._readExactly(stream, length)
+        if packet is None:
+            raise EsbuildServiceError('Truncated packet from esbuild service.')
+        return packet
+
+    @staticmethod
+    def _readExactly(stream, size: int) -> bytes | None:
+        data = b''
+        while len(data) < size:
+            chunk = stream.read(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    @classmethod
+    def _encodePacket(cls, requestId: int, isRequest: bool, value: object) -> bytes:
+        body = bytearray(struct.pack('<I', (requestId << 1) | (0 if isRequest else 1)))
+        cls._encodeValue(body, value)
+        return struct.pack('<I', len(body)) + bytes(body)
+
+    @classmethod
+    def _encodeValue(cls, buffer: bytearray, value: object) -> None:
+        if value is None:
+            buffer += b'\x00'
+        elif isinstance(value, bool):
+            buffer += struct.pack('<BB', 1, int(value))
+        elif isinstance(value, int):
+            buffer += struct.pack('<Bi', 2, value)
+        elif isinstance(value, str):
+            encoded = value.encode('utf-8')
+            buffer += struct.pack('<BI', 3, len(encoded)) + encoded
+        elif isinstance(value, (bytes, bytearray)):
+            buffer += struct.pack('<BI', 4, len(value)) + value
+        elif isinstance(value, list):
+            buffer += struct.pack('<BI', 5, len(value))
+            for item in value:
+                cls._encodeValue(buffer, item)
+        elif isinstance(value, dict):
+            buffer += struct.pack('<BI', 6, len(value))
+            for key, item in value.items():
+                encoded = key.encode('utf-8')
+                buffer += struct.pack('<I', len(encoded)) + encoded
+                cls._encodeValue(buffer, item)
+        else:
+            raise TypeError(f'Cannot encode value of type {type(value).__name__}')
+
+    @classmethod
+    def _decodePacket(cls, packet: bytes) -> tuple[int, bool, object]:
+        (header,) = struct.unpack_from('<I', packet, 0)
+        value, _ = cls._decodeValue(packet, 4)
+        return header >> 1, (header & 1) == 0, value
+
+    @classmethod
+    def _decodeValue(cls, data: bytes, offset: int) -> tuple[object, int]:
+        kind = data[offset]
+        offset += 1
+        if kind == 0:
+            return None, offset
+        if kind == 1:
+            return data[offset] != 0, offset + 1
+        if kind == 2:
+            return struct.unpack_from('<i', data, offset)[0], offset + 4
+        if kind in (3, 4):
+            (length,) = struct.unpack_from('<I', data, offset)
+            offset += 4
+            raw = data[offset:offset + length]
+            return (raw.decode('utf-8') if kind == 3 else raw), offset + length
+        if kind == 5:
+            (count,) = struct.unpack_from('<I', data, offset)
+            offset += 4
+            items = []
+            for _ in range(count):
+                item, offset = cls._decodeValue(data, offset)
+                items.append(item)
+            return items, offset
+        if kind == 6:
+            (count,) = struct.unpack_from('<I', data, offset)
+            offset += 4
+            result = {}
+            for _ in range(count):
+                (length,) = struct.unpack_from('<I', data, offset)
+                offset += 4
+                key = data[offset:offset + length].decode('utf-8')
+                offset += length
+                result[key], offset = cls._decodeValue(data, offset)
+            return result, offset
+        raise EsbuildServiceError(f'Unknown value type in packet: {kind}')
+
+    @staticmethod
+    def _asText(value: object) -> str:
+        return value.decode('utf-8') if isinstance(value, bytes) else str(value)
+
+    @staticmethod
+    def _formatMessage(message: object) -> str:
+        if not isinstance(message, dict):
+            return str(message)
+        text = message.get('text', '')
+        location = message.get('location')
+        if isinstance(location, dict):
+            return (f"{location.get('file', '<stdin>')}:{location.get('line')}:"
+                f"{location.get('column')}: {text}")
+        return text
+
+    #endregion private
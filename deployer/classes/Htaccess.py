@@ -0,0 +1,57 @@
+##
+# Htaccess.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .Utility import Utility
+from pathlib import Path
+import threading
+
+class Htaccess:
+    """
+    Maintains generated sections of a deployed ".htaccess" file. Each section
+    is delimited by "# BEGIN <name>" and "# END <name>" comment lines, so that
+    stages can replace their own rules without touching the rest.
+    """
+    # Several stages may update the same file concurrently.
+    _lock = threading.Lock()
+
+    @classmethod
+    def replaceSection(cls, filePath: Path, name: str, lines: list[str]) -> None:
+        """
+        Replaces the named section with the given lines, appending it if the
+        file does not contain it yet. An empty list removes the section.
+        """
+        beginMarker = f'# BEGIN {name}'
+        endMarker = f'# END {name}'
+        with cls._lock:
+            if filePath.is_file():
+                content = filePath.read_bytes().decode('utf-8')
+            else:
+                content = ''
+            newline = '\r\n' if '\r\n' in content else '\n'
+            result = []
+            inSection = False
+            for line in content.splitlines():
+                if line == beginMarker:
+                    inSection = True
+                elif line == endMarker:
+                    inSection = False
+                elif not inSection:
+                    result.append(line)
+            while result and not result[-1]:
+                result.pop()
+            if lines:
+                if result:
+                    result.append('')
+                result += [beginMarker, *lines, endMarker]
+            Utility.replaceFile(
+                filePath,
+                (newline.join(result) + newline).encode('utf-8')
+            )
@@ -0,0 +1,253 @@
+##
+# IconSubsetter.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .BuildCache import BuildCache
+from .Copier import Copier
+from .Profiler import Profiler
+from .Utility import Utility
+from pathlib import Path
+import fnmatch
+import logging
+import os
+import posixpath
+import re
+try:
+    import fontTools
+    from fontTools import subset as fontSubset
+except ImportError:
+    fontTools = None  # Optional; only the stylesheet is trimmed without it
+    fontSubset = None
+
+class IconSubsetter:
+    """
+    Trims the Bootstrap Icons stylesheet to the icons in use, and replaces
+    its fonts with subsets that contain only their glyphs.
+
+    Subset fonts are written next to the originals under names that include
+    a hash of their content (e.g. "bootstrap-icons.subset.1a2b3c4d.woff2"),
+    since the set of icons, and thus the font, changes between deployments
+    while the original URL may be cached as immutable. For the same reason,
+    `DeployFrontendStage` renames the trimmed stylesheet that refers to them
+    after a hash of its content. The original fonts are then no longer
+    referred to, and `DeployFrontendStage` does not deploy them. Writing the
+    subsets requires the `fontTools` module, and the `brotli` module for
+    WOFF2; a format that cannot be written keeps referring to the original
+    font.
+    """
+    _NAME_PATTERN = re.compile(r'\bbi-([a-z0-9]+(?:-[a-z0-9]+)*)')
+    # "bi-" followed by anything but a name, e.g. `bi-${icon}` or 'bi-' . $icon
+    _DYNAMIC_NAME_PATTERN = re.compile(r'\bbi-(?![a-z0-9])')
+    # e.g. ".bi-alarm::before{content:"\f102"}", also with several selectors
+    _GLYPH_RULE_PATTERN = re.compile(
+        r'(?P<selectors>(?:\.bi-[\w-]+::?before\s*,\s*)*\.bi-[\w-]+::?before)'
+        r'\s*\{\s*content:\s*(?P<quote>["\'])\\(?P<code>[0-9a-fA-F]{1,6})'
+        r'(?P=quote)\s*;?\s*\}'
+    )
+    _SELECTOR_NAME_PATTERN = re.compile(r'\.bi-([\w-]+)::?before')
+    _FONT_FACE_PATTERN = re.compile(r'@font-face\s*\{[^}]*\}', re.IGNORECASE)
+    _FONT_FAMILY_PATTERN = re.compile(
+        r'font-family\s*:\s*(["\']?)bootstrap-icons\1\s*[;}]', re.IGNORECASE)
+    _FONT_URL_PATTERN = re.compile(
+        r'url\(\s*(?P<quote>["\']?)(?P<url>[^"\')?#]+)[^"\')]*(?P=quote)\s*\)'
+        r'\s*format\(\s*["\']?(?P<format>woff2?)["\']?\s*\)', re.IGNORECASE)
+    _SUBSET_SUFFIX = 'subset'
+    _VERSION = '1'
+    _names: set[str] | None
+    _safelistPattern: re.Pattern | None
+    _cache: BuildCache | None
+
+    def __init__(
+        self,
+        names: set[str] | None,
+        safelist: list[str] | None = None,
+        cache: BuildCache | None = None
+    ):
+        """
+        `names` are the icon names in use, without the "bi-" prefix, or None
+        to keep every icon. Icons whose class name (e.g. "bi-alarm") matches
+        a name or wildcard pattern in `safelist` are kept too.
+        """
+        self._names = names
+        if safelist:
+            self._safelistPattern = re.compile('|'.join(
+                fnmatch.translate(pattern) for pattern in safelist))
+        else:
+            self._safelistPattern = None
+        self._cache = cache
+
+    @staticmethod
+    def isFontSubsettingAvailable() -> bool:
+        return fontSubset is not None
+
+    @classmethod
+    def collectNames(cls, filePaths: list[Path]) -> tuple[set[str], list[Path]]:
+        """
+        Returns the icon names that occur in the files, and the files that
+        build icon names dynamically.
+        """
+        names = set()
+        dynamicFilePaths = []
+        for filePath in filePaths:
+            content = filePath.read_text(encoding='utf-8', errors='replace')
+            names.update(cls._NAME_PATTERN.findall(content))
+            if cls._DYNAMIC_NAME_PATTERN.search(content):
+                dynamicFilePaths.append(filePath)
+        return names, dynamicFilePaths
+
+    def isUsed(self, name: str) -> bool:
+        if self._names is None or name in self._names:
+            return True
+        return self._safelistPattern is not None \
+            and self._safelistPattern.match(f'bi-{name}') is not None
+
+    def subsetStylesheet(
+        self,
+        filePath: Path,
+        sourceDirectoryPath: Path,
+        copier: Copier
+    ) -> set[Path] | None:
+        """
+        Subsets a deployed stylesheet if it declares the icon font. Returns
+        `None` if it did not, otherwise the deployed paths of the fonts that
+        subsets replaced. Font URLs are resolved against the source directory
+        of the stylesheet, since fonts may not be deployed yet.
+        """
+        if self._names is None:
+            return None
+        css = filePath.read_text(encoding='utf-8')
+        if not any(self._FONT_FAMILY_PATTERN.search(match.group())
+            for match in self._FONT_FACE_PATTERN.finditer(css)):
+            return None
+        codepoints = set()
+        replacedFontPaths = set()
+        def trimRule(match: re.Match) -> str:
+            selectors = [selector.strip()
+                for selector in match.group('selectors').split(',')
+                if self.isUsed(
+                    self._SELECTOR_NAME_PATTERN.match(selector.strip()).group(1))]
+            if not selectors:
+                return ''
+            codepoints.add(int(match.group('code'), 16))
+            quote, code = match.group('quote'), match.group('code')
+            return f"{','.join(selectors)}{{content:{quote}\\{code}{quote}}}"
+        css = self._GLYPH_RULE_PATTERN.sub(trimRule, css)
+        # The source map, if any, no longer applies.
+        css = Utility.removeSourceMapComment(css)
+        if fontSubset is not None:
+            def subsetFontFace(match: re.Match) -> str:
+                fontFace = match.group()
+                if not self._FONT_FAMILY_PATTERN.search(fontFace):
+                    return fontFace
+                return self._FONT_URL_PATTERN.sub(
+                    lambda urlMatch: self._subsetFontUrl(
+                        urlMatch,
+                        codepoints,
+                        filePath.parent,
+                        sourceDirectoryPath,
+                        copier,
+                        replacedFontPaths
+                    ),
+                    fontFace
+                )
+            css = self._FONT_FACE_PATTERN.sub(subsetFontFace, css)
+        data = css.encode('utf-8')
+        Utility.replaceFile(filePath, data)
+        Profiler.count(Profiler.BYTES_WRITTEN, len(data))
+        return replacedFontPaths
+
+    #region private ------------------------------------------------------------
+
+    def _subsetFontUrl(
+        self,
+        match: re.Match,
+        codepoints: set[int],
+        targetDirectoryPath: Path,
+        sourceDirectoryPath: Path,
+        copier: Copier,
+        replacedFontPaths: set[Path]
+    ) -> str:
+        url = match.group('url').strip()
+        flavor = match.group('format').lower()
+        if re.match(r'^(?:[a-z][a-z0-9+.-]*:|/)', url, re.IGNORECASE):
+            return match.group()  # Not a relative URL
+        sourceFontPath = sourceDirectoryPath / url
+        if not sourceFontPath.is_file():
+            return match.group()
+        targetFontPath = targetDirectoryPath / url
+        subsetFontPath = targetFontPath.with_name(
+            f'{targetFontPath.stem}.{self._SUBSET_SUFFIX}{targetFontPath.suffix}')
+        subsetFontPath.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._writeSubset(sourceFontPath, subsetFontPath, flavor, codepoints)
+        except ImportError:
+            # WOFF2 needs the `brotli` module; keep the original font.
+            subsetFontPath.unlink(missing_ok=True)
+            return match.group()
+        fingerprintedPath = Utility.fingerprintedPath(subsetFontPath)
+        # Remove subsets of earlier runs (when updating).
+        for path in subsetFontPath.parent.glob(
+            f'{targetFontPath.stem}.{self._SUBSET_SUFFIX}.*{targetFontPath.suffix}'):
+            if path != fingerprintedPath:
+                path.unlink(missing_ok=True)
+        copier.moveFile(subsetFontPath, fingerprintedPath)
+        replacedFontPaths.add(Path(os.path.normpath(targetFontPath)))
+        subsetUrl = posixpath.join(
+            posixpath.dirname(url), fingerprintedPath.name)
+        quote = match.group('quote') or '"'
+        return f'url({quote}{subsetUrl}{quote}) format("{flavor}")'
+
+    def _writeSubset(
+        self,
+        sourceFontPath: Path,
+        subsetFontPath: Path,
+        flavor: str,
+        codepoints: set[int]
+    ) -> None:
+        cacheKey = None
+        if self._cache is not None:
+            cacheKey = self._cache.computeKey(
+                [
+                    'icon-subset',
+                    self._VERSION,
+                    fontTools.version,
+                    flavor,
+                    ','.join(f'{codepoint:x}' for codepoint in sorted(codepoints))
+                ],
+                [sourceFontPath]
+            )
+            if self._cache.fetch(cacheKey, flavor, subsetFontPath):
+                Profiler.count(Profiler.CACHE_HITS)
+                return
+            Profiler.count(Profiler.CACHE_MISSES)
+        options = fontSubset.Options()
+        options.flavor = flavor
+        options.layout_features = ['*']
+        # fontTools logs quirks of the font it works around (e.g. "2 extra
+        # bytes in post.stringData array"), which would clutter the output.
+        logger = logging.getLogger('fontTools')
+        level = logger.level
+        logger.setLevel(logging.ERROR)
+        try:
+            font = fontSubset.load_font(str(sourceFontPath), options)
+            try:
+                subsetter = fontSubset.Subsetter(options)
+                subsetter.populate(unicodes=codepoints)
+                subsetter.subset(font)
+                fontSubset.save_font(font, str(subsetFontPath), options)
+            finally:
+                font.close()
+        finally:
+            logger.setLevel(level)
+        Profiler.count(Profiler.BYTES_WRITTEN, subsetFontPath.stat().st_size)
+        if cacheKey is not None:
+            self._cache.store(cacheKey, flavor, subsetFontPath)
+
+    #endregion private
@@ -9,21 +9,26 @@
 # see <http://creativecommons.org/licenses/by/4.0/>.
 ##
 
+from .PathMatcher import PathMatcher
 from .Utility import Utility
-from fnmatch import fnmatch
 from pathlib import Path
-from typing import List
+import os
 
 class IgnoreRules:
     _IGNORE_FILENAME: str = '.deployignore'
+    # Other files in the source root that configure the deployer.
+    _CONFIGURATION_FILENAMES: list[str] = [
+        '.backendprofiles.json',
+        '.cachepolicy.json',
+        '.preloadlist',
+        '.purgesafelist'
+    ]
     _baseDirectoryPath: Path
-    _ignoredPatterns: List[str]
-    _ignoredDirectoryPaths: List[str]
+    _matcher: PathMatcher
 
     def __init__(self, baseDirectoryPath: Path):
         self._baseDirectoryPath = baseDirectoryPath.resolve()
-        self._ignoredPatterns = []
-        self._ignoredDirectoryPaths = []
+        patterns = []
         ignoreFilePath = self._baseDirectoryPath / self._IGNORE_FILENAME
         if ignoreFilePath.exists():
             with ignoreFilePath.open(encoding='utf-8') as file:
@@ -31,26 +36,58 @@ class IgnoreRules:
                     rule = line.strip()
                     if not rule or rule.startswith('#'):
                         continue  # Skip empty lines and comments
-                    rule = Utility.normalizeSlashes(rule)
-                    if rule.endswith('/') and '*' not in rule and '?' not in rule:
-                        self._ignoredDirectoryPaths.append(rule.rstrip('/'))
-                    else:
-                        self._ignoredPatterns.append(rule)
-        # Always exclude the ".deployignore" file from deployment
-        self._ignoredPatterns.append(self._IGNORE_FILENAME)
+                    patterns.append(Utility.normalizeSlashes(rule))
+        # Always exclude the ".deployignore" file and other configuration
+        # files from deployment. Being the last rules, they cannot be negated.
+        patterns.append(f'/{self._IGNORE_FILENAME}')
+        for filename in self._CONFIGURATION_FILENAMES:
+            patterns.append(f'/{filename}')
+        self._matcher = PathMatcher(patterns)
 
-    def isIgnored(self, path: Path) -> bool:
+    def filePath(self) -> Path:
+        return self._baseDirectoryPath / self._IGNORE_FILENAME
+
+    def isIgnored(self, path: Path, isDirectory: bool | None = None) -> bool:
+        """
+        Checks the path against the rules in ".deployignore", which follow
+        gitignore semantics. A path inside an ignored directory is ignored
+        too. Pass `isDirectory` when it is known, to avoid a file system
+        query for rules that apply only to directories.
+        """
         if path.is_absolute():
             try:
-                path = path.relative_to(self._baseDirectoryPath)
+                relativePath = path.relative_to(self._baseDirectoryPath)
             except ValueError:
                 print(f"Warning: Path is outside of the base directory: {path}")
                 return False
-        path = Utility.normalizeSlashes(path)
-        for pattern in self._ignoredPatterns:
-            if fnmatch(path, pattern):
-                return True
-        for directoryPath in self._ignoredDirectoryPaths:
-            if path == directoryPath or path.startswith(directoryPath + '/'):
-                return True
-        return False
+        else:
+            relativePath = path
+        relativePath = Utility.normalizeSlashes(relativePath)
+        if relativePath in ('', '.'):
+            return False
+        if isDirectory is None:
+            isDirectory = path.is_dir()
+        return self._matcher.isMatched(relativePath, isDirectory)
+
+    def filePaths(
+        self,
+        directoryPath: Path,
+        suffixes: set[str] | None = None
+    ) -> list[Path]:
+        """
+        Returns the files below the directory that are not ignored, in sorted
+        order, optionally only those with one of the given suffixes (e.g.
+        ".js", compared case-insensitively).
+        """
+        result = []
+        for parentPath, directoryNames, fileNames in os.walk(directoryPath):
+            parentPath = Path(parentPath)
+            directoryNames[:] = sorted(name for name in directoryNames
+                if not self.isIgnored(parentPath / name, isDirectory=True))
+            for fileName in sorted(fileNames):
+                filePath = parentPath / fileName
+                if suffixes is not None and filePath.suffix.lower() not in suffixes:
+                    continue
+                if not self.isIgnored(filePath, isDirectory=False):
+                    result.append(filePath)
+        return result
@@ -0,0 +1,253 @@
+##
+# ImageOptimizer.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+import io
+import re
+import struct
+import zlib
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None  # Optional; WebP variants are not written without it
+    ImageOps = None
+
+class ImageOptimizer:
+    """
+    Reduces the size of PNG, JPEG and SVG images without changing how they
+    render:
+
+    - PNG: drops metadata chunks (text, time, EXIF and other ancillary chunks
+      browsers ignore), replaces an embedded sRGB ICC profile with the
+      equivalent "sRGB" chunk, and recompresses the image data at the highest
+      zlib level;
+    - JPEG: drops metadata segments (EXIF, XMP, comments and the like) while
+      keeping ICC profiles, Adobe color transforms and EXIF data that
+      rotates the image;
+    - SVG: drops comments, metadata, the XML declaration and, where it cannot
+      be significant, whitespace between elements.
+
+    Each method returns the original data if it cannot be made smaller.
+    WebP variants require the `PIL` module (Pillow).
+    """
+    _PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+    # Ancillary chunks that affect rendering; all others are dropped.
+    _PNG_RENDERING_CHUNKS = {b'tRNS', b'gAMA', b'cHRM', b'sRGB', b'iCCP', b'sBIT'}
+    # Chunks of animated PNGs, whose frames are left as they are.
+    _APNG_CHUNKS = {b'acTL', b'fcTL', b'fdAT'}
+    _JPEG_APP0 = 0xE0
+    _JPEG_APP1 = 0xE1
+    _JPEG_APP2 = 0xE2
+    _JPEG_APP14 = 0xEE
+    _JPEG_COM = 0xFE
+    _JPEG_SOS = 0xDA
+    _EXIF_ORIENTATION_TAG = 0x0112
+    _SVG_COMMENT_PATTERN = re.compile(r'<!--.*?-->', re.DOTALL)
+    _SVG_DECLARATION_PATTERN = re.compile(r'^\s*<\?xml[^>]*\?>\s*')
+    _SVG_METADATA_PATTERN = re.compile(
+        r'<metadata\b[^>]*(?:/>|>.*?</metadata\s*>)', re.DOTALL)
+    # Elements whose text content, and thus whitespace, may be rendered.
+    _SVG_TEXT_PATTERN = re.compile(r'<(?:text|textPath|tspan|style|script|pre)\b')
+    _SVG_WHITESPACE_PATTERN = re.compile(r'>\s+<')
+
+    @staticmethod
+    def isWebpAvailable() -> bool:
+        return Image is not None
+
+    @classmethod
+    def optimizePng(cls, data: bytes) -> bytes:
+        if not data.startswith(cls._PNG_SIGNATURE):
+            return data
+        chunks = cls._pngChunks(data)
+        if chunks is None:
+            return data  # Malformed; left alone
+        chunkTypes = {chunkType for chunkType, _ in chunks}
+        isAnimated = bool(chunkTypes & cls._APNG_CHUNKS)
+        result = [cls._PNG_SIGNATURE]
+        idatWritten = False
+        for chunkType, chunkData in chunks:
+            if chunkType == b'IDAT':
+                if isAnimated:
+                    result.append(cls._pngChunk(chunkType, chunkData))
+                elif not idatWritten:
+                    imageData = b''.join(idatData for idatType, idatData
+                        in chunks if idatType == b'IDAT')
+                    result.append(cls._pngChunk(b'IDAT',
+                        cls._recompress(imageData)))
+                    idatWritten = True
+                continue
+            if chunkType == b'iCCP' and cls._isSrgbProfile(chunkData):
+                if b'sRGB' not in chunkTypes:
+                    # Rendering intent 0 (perceptual), as most profiles use.
+                    result.append(cls._pngChunk(b'sRGB', b'\x00'))
+                continue
+            isCritical = chunkType[0:1].isupper()
+            if isCritical or chunkType in cls._PNG_RENDERING_CHUNKS \
+                or (isAnimated and chunkType in cls._APNG_CHUNKS):
+                result.append(cls._pngChunk(chunkType, chunkData))
+        optimized = b''.join(result)
+        return optimized if len(optimized) < len(data) else data
+
+    @classmethod
+    def optimizeJpeg(cls, data: bytes) -> bytes:
+        if not data.startswith(b'\xff\xd8'):
+            return data
+        result = [data[:2]]
+        position = 2
+        while position + 4 <= len(data):
+            if data[position] != 0xFF:
+                return data  # Malformed; left alone
+            marker = data[position + 1]
+            if marker == 0xFF:  # Fill byte
+                position += 1
+                continue
+            if marker == cls._JPEG_SOS:
+                result.append(data[position:])  # Scan data and the rest
+                break
+            length, = struct.unpack('>H', data[position + 2:position + 4])
+            segment = data[position:position + 2 + length]
+            payload = segment[4:]
+            if cls._isKeptJpegSegment(marker, payload):
+                result.append(segment)
+            position += 2 + length
+        else:
+            return data
+        optimized = b''.join(result)
+        return optimized if len(optimized) < len(data) else data
+
+    @classmethod
+    def minifySvg(cls, data: bytes) -> bytes:
+        try:
+            svg = data.decode('utf-8')
+        except UnicodeDecodeError:
+            return data
+        if '<!ENTITY' in svg or '<![CDATA[' in svg:
+            return data  # Comments may be significant; left alone
+        svg = cls._SVG_DECLARATION_PATTERN.sub('', svg)
+        svg = cls._SVG_COMMENT_PATTERN.sub('', svg)
+        svg = cls._SVG_METADATA_PATTERN.sub('', svg)
+        if not cls._SVG_TEXT_PATTERN.search(svg):
+            svg = cls._SVG_WHITESPACE_PATTERN.sub('><', svg)
+        optimized = svg.strip().encode('utf-8')
+        return optimized if len(optimized) < len(data) else data
+
+    @classmethod
+    def toWebp(cls, data: bytes, *, lossless: bool) -> bytes:
+        """
+        Encodes an image as WebP, losslessly or at a high quality, keeping
+        its ICC profile. An image that EXIF data rotates is rotated, since
+        the WebP file is written without EXIF data.
+        """
+        with Image.open(io.BytesIO(data)) as image:
+            image.load()
+            iccProfile = image.info.get('icc_profile')
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ('RGB', 'RGBA'):
+                hasAlpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+                image = image.convert('RGBA' if hasAlpha else 'RGB')
+            output = io.BytesIO()
+            options = {'lossless': True, 'quality': 100, 'method': 6} if lossless \
+                else {'quality': 90, 'method': 6}
+            if iccProfile:
+                options['icc_profile'] = iccProfile
+            image.save(output, format='WEBP', **options)
+            return output.getvalue()
+
+    #region private ------------------------------------------------------------
+
+    @classmethod
+    def _pngChunks(cls, data: bytes) -> list[tuple[bytes, bytes]] | None:
+        chunks = []
+        position = len(cls._PNG_SIGNATURE)
+        while position + 12 <= len(data):
+            length, chunkType = struct.unpack('>I4s', data[position:position + 8])
+            chunkData = data[position + 8:position + 8 + length]
+            if len(chunkData) != length:
+                return None
+            chunks.append((chunkType, chunkData))
+            position += 12 + length
+            if chunkType == b'IEND':
+                return chunks
+        return None
+
+    @staticmethod
+    def _pngChunk(chunkType: bytes, chunkData: bytes) -> bytes:
+        crc = zlib.crc32(chunkType + chunkData)
+        return struct.pack('>I4s', len(chunkData), chunkType) + chunkData \
+            + struct.pack('>I', crc)
+
+    @staticmethod
+    def _recompress(imageData: bytes) -> bytes:
+        raw = zlib.decompress(imageData)
+        best = imageData
+        for strategy in [zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED]:
+            compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+            compressed = compressor.compress(raw) + compressor.flush()
+            if len(compressed) < len(best):
+                best = compressed
+        return best
+
+    @staticmethod
+    def _isSrgbProfile(chunkData: bytes) -> bool:
+        """
+        Checks whether an "iCCP" chunk holds an sRGB profile, judged by the
+        profile's description.
+        """
+        try:
+            _, compressed = chunkData.split(b'\x00', 1)
+            profile = zlib.decompress(compressed[1:])
+            tagCount, = struct.unpack('>I', profile[128:132])
+            for index in range(tagCount):
+                offset = 132 + index * 12
+                signature, tagOffset, tagSize = struct.unpack(
+                    '>4sII', profile[offset:offset + 12])
+                if signature == b'desc':
+                    description = profile[tagOffset:tagOffset + tagSize]
+                    return b'sRGB IEC61966-2' in description \
+                        or 'sRGB IEC61966-2'.encode('utf-16-be') in description
+        except (ValueError, struct.error, zlib.error):
+            pass
+        return False
+
+    @classmethod
+    def _isKeptJpegSegment(cls, marker: int, payload: bytes) -> bool:
+        if marker == cls._JPEG_COM:
+            return False
+        if marker < cls._JPEG_APP0 or marker > cls._JPEG_APP0 + 15:
+            return True  # Not metadata (tables, frame header, etc.)
+        if marker == cls._JPEG_APP0:
+            return payload.startswith(b'JFIF\x00')
+        if marker == cls._JPEG_APP1:
+            return payload.startswith(b'Exif\x00\x00') \
+                and cls._exifOrientation(payload[6:]) not in (None, 1)
+        if marker == cls._JPEG_APP2:
+            return payload.startswith(b'ICC_PROFILE\x00')
+        if marker == cls._JPEG_APP14:
+            return payload.startswith(b'Adobe')
+        return False
+
+    @classmethod
+    def _exifOrientation(cls, tiff: bytes) -> int | None:
+        try:
+            byteOrder = {b'II': '<', b'MM': '>'}[tiff[:2]]
+            ifdOffset, = struct.unpack(f'{byteOrder}I', tiff[4:8])
+            entryCount, = struct.unpack(f'{byteOrder}H',
+                tiff[ifdOffset:ifdOffset + 2])
+            for index in range(entryCount):
+                offset = ifdOffset + 2 + index * 12
+                tag, _, _, value = struct.unpack(f'{byteOrder}HHIH',
+                    tiff[offset:offset + 10])
+                if tag == cls._EXIF_ORIENTATION_TAG:
+                    return value
+        except (KeyError, struct.error):
+            pass
+        return None
+
+    #endregion private
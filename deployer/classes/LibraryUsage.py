@@ -0,0 +1,166 @@
+##
+# LibraryUsage.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .ManifestService import ManifestBlock
+from dataclasses import dataclass, field
+from pathlib import Path
+import re
+
+@dataclass
+class PageLibraries:
+    # Libraries the page loads: the default libraries, plus those it adds,
+    # minus those it removes, in manifest order.
+    included: list[str] = field(default_factory=list)
+    # Libraries whose usage patterns occur in the page's code.
+    used: list[str] = field(default_factory=list)
+    # Included libraries that have usage patterns, none of which occur.
+    unused: list[str] = field(default_factory=list)
+    # Used libraries that the page does not include.
+    missing: list[str] = field(default_factory=list)
+
+    def required(self) -> list[str]:
+        """
+        Returns the libraries the page needs, in manifest order as far as
+        `included` goes.
+        """
+        return [name for name in self.included if name not in self.unused] \
+            + self.missing
+
+class LibraryUsage:
+    """
+    Estimates which frontend libraries a page uses by searching its scripts
+    and PHP files, and those of its master page, for usage patterns. Only
+    libraries listed in `_USAGE_PATTERNS` are judged; others (e.g. jQuery,
+    which Leuce itself builds on) are assumed to be needed wherever they are
+    included. The result is a heuristic: code that builds class names or
+    widget calls dynamically is not recognized.
+    """
+    # Patterns that indicate usage, by library name.
+    _USAGE_PATTERNS: dict[str, list[str]] = {
+        'jquery-ui': [
+            r'\.(?:draggable|droppable|resizable|selectable|sortable|accordion'
+                r'|autocomplete|datepicker|dialog|progressbar|selectmenu'
+                r'|slider|spinner|tabs)\(',
+            r'\$\.ui\b',
+            r'\bui-(?:widget|helper|state|icon|corner|front)\b',
+            # Leuce modals, which message boxes are, are made draggable with
+            # jQuery UI.
+            r'\bLeuce\.UI\.(?:Modal|messageBox)\b'
+        ],
+        'bootstrap-icons': [
+            r'\bbi-[a-z0-9]+(?:-[a-z0-9]+)*\b',
+            # Leuce tables render their toolbar and paginator with icons.
+            r'\bLeuce\.UI\.Table(?:Controller)?\b',
+            r'\.leuceTable\('
+        ],
+        'gsi': [
+            r'\bgoogle\.accounts\b',
+            r'\.gsiButton\(',
+            r'\bgsi-[a-z]+(?:-[a-z]+)*\b'
+        ]
+    }
+    _CODE_SUFFIXES = {'.js', '.php'}
+    _MASTERPAGE_PATTERN = re.compile(r'->\s*SetMasterPage\(\s*[\'"]([^\'"]+)[\'"]')
+    _ADD_LIBRARY_PATTERN = re.compile(r'->\s*AddLibrary\(\s*[\'"]([^\'"]+)[\'"]')
+    _REMOVE_LIBRARY_PATTERN = re.compile(r'->\s*RemoveLibrary\(\s*[\'"]([^\'"]+)[\'"]')
+    _REMOVE_ALL_LIBRARIES_PATTERN = re.compile(r'->\s*RemoveAllLibraries\(')
+    _INCLUDE_PATTERN = re.compile(
+        r'\b(?:include|require)(?:_once)?\b\s*\(?\s*[\'"]([^\'"]+)[\'"]')
+    _libraries: dict[str, ManifestBlock]
+    _masterpagesDirectoryPath: Path
+    _patterns: dict[str, re.Pattern]
+
+    def __init__(
+        self,
+        libraries: dict[str, ManifestBlock],
+        masterpagesDirectoryPath: Path
+    ):
+        self._libraries = libraries
+        self._masterpagesDirectoryPath = masterpagesDirectoryPath
+        self._patterns = {
+            name: re.compile('|'.join(patterns))
+            for name, patterns in self._USAGE_PATTERNS.items()
+            if name in libraries
+        }
+
+    def analyzePage(self, filePaths: list[Path]) -> PageLibraries:
+        """
+        Analyzes a page given the paths of its files. Only scripts and PHP
+        files are searched; the page's "index.php" also declares the master
+        page and the libraries it adds or removes.
+        """
+        filePaths = [filePath for filePath in filePaths
+            if filePath.suffix in self._CODE_SUFFIXES]
+        contents = [filePath.read_text(encoding='utf-8', errors='replace')
+            for filePath in filePaths]
+        includedNames, masterpageName = self._declarations([content
+            for filePath, content in zip(filePaths, contents)
+            if filePath.suffix == '.php'])
+        if masterpageName is not None:
+            contents += self._masterpageContents(masterpageName)
+        result = PageLibraries()
+        result.included = [name for name in self._libraries
+            if name in includedNames]
+        result.used = [name for name, pattern in self._patterns.items()
+            if any(pattern.search(content) for content in contents)]
+        result.unused = [name for name in result.included
+            if name in self._patterns and name not in result.used]
+        result.missing = [name for name in result.used
+            if name not in includedNames]
+        return result
+
+    def includedLibraries(self, filePaths: list[Path]) -> list[str]:
+        """
+        Returns the libraries a page loads, in manifest order, given the paths
+        of its files, without searching them for usage patterns.
+        """
+        includedNames, _ = self._declarations([
+            filePath.read_text(encoding='utf-8', errors='replace')
+            for filePath in filePaths if filePath.suffix == '.php'])
+        return [name for name in self._libraries if name in includedNames]
+
+    #region private ------------------------------------------------------------
+
+    def _declarations(self, contents: list[str]) -> tuple[set[str], str | None]:
+        # The libraries a page includes and the master page it declares,
+        # given the contents of its PHP files.
+        includedNames = {name for name, block in self._libraries.items()
+            if block.default_}
+        masterpageName = None
+        for content in contents:
+            if self._REMOVE_ALL_LIBRARIES_PATTERN.search(content):
+                includedNames.clear()
+            includedNames.update(self._ADD_LIBRARY_PATTERN.findall(content))
+            includedNames.difference_update(
+                self._REMOVE_LIBRARY_PATTERN.findall(content))
+            match = self._MASTERPAGE_PATTERN.search(content)
+            if match is not None:
+                masterpageName = match.group(1)
+        return includedNames, masterpageName
+
+
+    def _masterpageContents(self, masterpageName: str) -> list[str]:
+        # The master page and the files it includes, e.g. its header.
+        result = []
+        pendingPaths = [self._masterpagesDirectoryPath / f'{masterpageName}.php']
+        visitedPaths = set()
+        while pendingPaths:
+            filePath = pendingPaths.pop()
+            if filePath in visitedPaths or not filePath.is_file():
+                continue
+            visitedPaths.add(filePath)
+            content = filePath.read_text(encoding='utf-8', errors='replace')
+            result.append(content)
+            for includedPath in self._INCLUDE_PATTERN.findall(content):
+                pendingPaths.append(filePath.parent / includedPath)
+        return result
+
+    #endregion private
@@ -0,0 +1,109 @@
+##
+# LibraryUsageStage.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .Context import Context
+from .DeployFrontendStage import DeployFrontendStage
+from .DeployPagesStage import DeployPagesStage
+from .LibraryUsage import LibraryUsage, PageLibraries
+from .ManifestService import ManifestService
+from .Stage import Stage
+from dataclasses import asdict
+from pathlib import Path
+import json
+
+class LibraryUsageStage(Stage):
+    """
+    Reports, for each page, the frontend libraries it includes but does not
+    appear to use, and those it appears to use but does not include, so that
+    pages can load only the libraries they need. Optionally saves the
+    library list each page needs as JSON.
+    """
+    _FRONTEND_DIRECTORY_NAME = 'frontend'
+    _PAGES_DIRECTORY_NAME = 'pages'
+    _MASTERPAGES_DIRECTORY_NAME = 'masterpages'
+    _MANIFEST_FILENAME = 'manifest.json'
+    _reportFilePath: Path | None
+    _pages: dict[str, PageLibraries]
+
+    def __init__(self, reportFilePath: Path | None = None):
+        self._reportFilePath = reportFilePath
+        self._pages = {}
+
+    def run(self, context: Context) -> None:
+        libraries = ManifestService.loadFrontendManifest(
+            context.sourceDirectoryPath / self._FRONTEND_DIRECTORY_NAME /
+                self._MANIFEST_FILENAME)
+        libraryUsage = LibraryUsage(
+            libraries,
+            context.sourceDirectoryPath / self._MASTERPAGES_DIRECTORY_NAME
+        )
+        self._pages = {}
+        pagesDirectoryPath = context.sourceDirectoryPath / self._PAGES_DIRECTORY_NAME
+        for pageDirectoryPath in sorted(pagesDirectoryPath.iterdir()):
+            if not pageDirectoryPath.is_dir() or context.ignoreRules.isIgnored(
+                pageDirectoryPath, isDirectory=True):
+                continue
+            self._pages[pageDirectoryPath.name] = libraryUsage.analyzePage(
+                context.ignoreRules.filePaths(pageDirectoryPath))
+        for pageName, page in self._pages.items():
+            for name in page.unused:
+                print(f"Warning: Page '{pageName}' includes library '{name}' "
+                    'but does not appear to use it.')
+            for name in page.missing:
+                print(f"Warning: Page '{pageName}' appears to use library "
+                    f"'{name}' but does not include it.")
+        # A default library that most pages do not use is better added by the
+        # pages that do.
+        for name, block in libraries.items():
+            if not block.default_:
+                continue
+            unusedCount = sum(name in page.unused for page in self._pages.values())
+            if unusedCount > len(self._pages) / 2:
+                print(f"Warning: Library '{name}' is unused by {unusedCount} "
+                    f'of {len(self._pages)} pages; consider not making it a '
+                    'default library.')
+        if self._reportFilePath is not None:
+            self._saveReport()
+
+    def status(self) -> str:
+        return 'Analyzing library usage...'
+
+    def dependencies(self) -> list[type[Stage]]:
+        return [DeployFrontendStage, DeployPagesStage]
+
+    def summary(self) -> str | None:
+        unusedCount = sum(len(page.unused) for page in self._pages.values())
+        missingCount = sum(len(page.missing) for page in self._pages.values())
+        return (f'{len(self._pages)} pages analyzed, {unusedCount} unused and '
+            f'{missingCount} missing libraries')
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        if not self.affectsAny(context, changedPaths, [
+            self._FRONTEND_DIRECTORY_NAME,
+            self._PAGES_DIRECTORY_NAME,
+            self._MASTERPAGES_DIRECTORY_NAME
+        ]):
+            return False
+        self.run(context)
+        return True
+
+    #region private ------------------------------------------------------------
+
+    def _saveReport(self) -> None:
+        report = {
+            pageName: {'required': page.required(), **asdict(page)}
+            for pageName, page in self._pages.items()
+        }
+        self._reportFilePath.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._reportFilePath, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+    #endregion private
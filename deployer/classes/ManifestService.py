@@ -9,6 +9,7 @@
 # see <http://creativecommons.org/licenses/by/4.0/>.
 ##
 
+from .Utility import Utility
 from dataclasses import dataclass
 from pathlib import Path
 import json
@@ -57,13 +58,22 @@ class ManifestService:
         manifestBlock: ManifestBlock,
         path: Path
     ) -> None:
-        data = {}
-        if manifestBlock.css is not None:
-            data['css'] = manifestBlock.css
-        if manifestBlock.js is not None:
-            data['js'] = manifestBlock.js
         with open(path, 'w', encoding='utf-8') as file:
-            json.dump(data, file, separators=(',', ':'))
+            json.dump(cls._blockData(manifestBlock, withDefault=False), file,
+                separators=(',', ':'))
+
+    @classmethod
+    def savePageManifestPhp(
+        cls,
+        manifestBlock: ManifestBlock,
+        path: Path
+    ) -> None:
+        """
+        Saves a page manifest as a PHP file that returns it as an array,
+        which OPcache can keep in shared memory instead of the JSON being
+        decoded on every request.
+        """
+        cls.savePhpArray(cls._blockData(manifestBlock, withDefault=False), path)
 
     @classmethod
     def saveFrontendManifest(
@@ -71,21 +81,65 @@ class ManifestService:
         manifestBlocks: dict[str, ManifestBlock],
         path: Path
     ) -> None:
-        data = {}
-        for name, block in manifestBlocks.items():
-            blockData = {}
-            if block.css is not None:
-                blockData['css'] = block.css
-            if block.js is not None:
-                blockData['js'] = block.js
-            if block.default_ is not None:
-                blockData['default'] = block.default_
-            data[name] = blockData
+        data = {name: cls._blockData(block)
+            for name, block in manifestBlocks.items()}
         with open(path, 'w', encoding='utf-8') as file:
             json.dump(data, file, separators=(',', ':'))
 
+    @classmethod
+    def saveFrontendManifestPhp(
+        cls,
+        manifestBlocks: dict[str, ManifestBlock],
+        path: Path
+    ) -> None:
+        """
+        Saves a frontend manifest as a PHP file that returns it as an array.
+        """
+        cls.savePhpArray({name: cls._blockData(block)
+            for name, block in manifestBlocks.items()}, path)
+
+    @classmethod
+    def savePhpArray(
+        cls,
+        data: dict[str, object] | list[object],
+        path: Path
+    ) -> None:
+        content = ('<?php return '
+            f'{cls._phpValue(data)};\n').encode('utf-8')
+        Utility.replaceFile(path, content)
+
     #region private ------------------------------------------------------------
 
+    @classmethod
+    def _blockData(
+        cls,
+        block: ManifestBlock,
+        *,
+        withDefault: bool = True
+    ) -> dict[str, object]:
+        data = {}
+        if block.css is not None:
+            data['css'] = block.css
+        if block.js is not None:
+            data['js'] = block.js
+        if withDefault and block.default_ is not None:
+            data['default'] = block.default_
+        return data
+
+    @classmethod
+    def _phpValue(cls, value: object) -> str:
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        if isinstance(value, str):
+            escaped = value.replace('\\', '\\\\').replace("'", "\\'")
+            return f"'{escaped}'"
+        if isinstance(value, list):
+            return f"[{','.join(cls._phpValue(element) for element in value)}]"
+        if isinstance(value, dict):
+            return '[' + ','.join(f'{cls._phpValue(key)}=>{cls._phpValue(element)}'
+                for key, element in value.items()) + ']'
+        raise ValueError(f'Unsupported manifest value: {value!r}')
+
     @classmethod
     def _loadJson(cls, path: Path) -> dict[str, object]:
         if not path.is_file():
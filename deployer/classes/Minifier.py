@@ -9,56 +9,144 @@
 # see <http://creativecommons.org/licenses/by/4.0/>.
 ##
 
-from .Esbuild import Esbuild
+from .BuildCache import BuildCache
+from .MinifierBackend import MinifierBackend, MinifyJob
+from .Profiler import Profiler
 from pathlib import Path
-import uuid
 
 class Minifier:
-    _esbuild: Esbuild
+    _backends: dict[str, MinifierBackend]
+    _cache: BuildCache | None
+    _smallFileBackend: MinifierBackend | None
+    _smallFileThreshold: int
 
-    def __init__(self, rootPath: Path):
-        self._esbuild = Esbuild(rootPath)
+    def __init__(
+        self,
+        backends: dict[str, MinifierBackend],
+        cache: BuildCache | None = None,
+        *,
+        smallFileBackend: MinifierBackend | None = None,
+        smallFileThreshold: int = 0
+    ):
+        """
+        Minifies each asset type ("js", "css") with the backend given for it
+        in `backends`. If `smallFileBackend` is given, it handles the jobs
+        whose inputs total at most `smallFileThreshold` bytes instead.
+        """
+        self._backends = backends
+        self._cache = cache
+        self._smallFileBackend = smallFileBackend
+        self._smallFileThreshold = smallFileThreshold
+
+    def close(self) -> None:
+        backends = [*self._backends.values(), self._smallFileBackend]
+        for backend in dict.fromkeys(backends):
+            if backend is not None:
+                backend.close()
 
     def minifyJs(
         self,
         inputFilePathOrPaths: Path | list[Path],
         outputFilePath: Path
     ) -> None:
-        self._minify(inputFilePathOrPaths, outputFilePath, suffix='js')
+        self.minifyBatch([MinifyJob(inputFilePathOrPaths, outputFilePath, 'js')])
 
     def minifyCss(
         self,
         inputFilePathOrPaths: Path | list[Path],
         outputFilePath: Path
     ) -> None:
-        self._minify(inputFilePathOrPaths, outputFilePath, suffix='css')
+        self.minifyBatch([MinifyJob(inputFilePathOrPaths, outputFilePath, 'css')])
 
-    def _minify(
+    def minifyBatch(
         self,
-        inputFilePathOrPaths: Path | list[Path],
-        outputFilePath: Path,
-        *,
-        suffix: str
+        jobs: list[MinifyJob],
+        sourceBaseDirectoryPath: Path | None = None,
+        targetBaseDirectoryPath: Path | None = None
     ) -> None:
-        # Ensure the output directory exists.
-        outputFilePath.parent.mkdir(parents=True, exist_ok=True)
-        # If there's only one input file, run esbuild directly.
-        if isinstance(inputFilePathOrPaths, Path):
-            self._esbuild.run(inputFilePathOrPaths, outputFilePath)
-            return
-        # If there are multiple input files, create a temporary file by
-        # concatenating their contents and then run esbuild on it. Note
-        # that the temporary file's suffix determines how esbuild handles
-        # the input.
-        tempFilePath = outputFilePath.parent / f'temp-{uuid.uuid4().hex}.{suffix}'
+        """
+        Minifies several outputs at once. Single-file jobs whose output mirrors
+        the input's location (`<source base>/x/y.js` to `<target base>/x/y.min.js`)
+        are handed to their backend together, which lets esbuild process them
+        as multiple entry points of a single process. Other jobs are processed
+        one by one.
+        """
+        pendingJobs: list[tuple[MinifyJob, str | None]] = []
+        for job in jobs:
+            # Ensure the output directory exists.
+            job.outputFilePath.parent.mkdir(parents=True, exist_ok=True)
+            cacheKey = self._cacheKey(job)
+            # If an identical build was done before, reuse its output.
+            if cacheKey and self._cache.fetch(cacheKey, job.suffix, job.outputFilePath):
+                Profiler.count(Profiler.CACHE_HITS)
+                Profiler.count(Profiler.BYTES_WRITTEN,
+                    job.outputFilePath.stat().st_size)
+                continue
+            if cacheKey:
+                Profiler.count(Profiler.CACHE_MISSES)
+            pendingJobs.append((job, cacheKey))
+        mirroredJobs: dict[MinifierBackend, list[MinifyJob]] = {}
+        for job, _ in pendingJobs:
+            backend = self._backend(job)
+            if self._isMirrored(job, sourceBaseDirectoryPath, targetBaseDirectoryPath):
+                mirroredJobs.setdefault(backend, []).append(job)
+            else:
+                backend.minify(job)
+        for backend, backendJobs in mirroredJobs.items():
+            backend.minifyMirrored(
+                backendJobs,
+                sourceBaseDirectoryPath,
+                targetBaseDirectoryPath
+            )
+        for job, cacheKey in pendingJobs:
+            Profiler.count(Profiler.BYTES_WRITTEN,
+                job.outputFilePath.stat().st_size)
+            if cacheKey:
+                self._cache.store(cacheKey, job.suffix, job.outputFilePath)
+
+    #region private ------------------------------------------------------------
+
+    def _backend(self, job: MinifyJob) -> MinifierBackend:
+        if self._smallFileBackend is not None and self._smallFileThreshold > 0:
+            size = sum(path.stat().st_size for path in job.inputFilePaths())
+            if size <= self._smallFileThreshold:
+                return self._smallFileBackend
+        backend = self._backends.get(job.suffix)
+        if backend is None:
+            raise ValueError(f'Unknown asset type: {job.suffix}')
+        return backend
+
+    def _cacheKey(self, job: MinifyJob) -> str | None:
+        if self._cache is None:
+            return None
+        # Backends minify a single file directly but concatenate a list of
+        # files, even one, so the two yield different outputs.
+        shape = 'file' if isinstance(job.inputFilePathOrPaths, Path) else 'files'
+        return self._cache.computeKey(
+            [job.suffix, shape, *self._backend(job).cacheParameters()],
+            job.inputFilePaths()
+        )
+
+    def _isMirrored(
+        self,
+        job: MinifyJob,
+        sourceBaseDirectoryPath: Path | None,
+        targetBaseDirectoryPath: Path | None
+    ) -> bool:
+        if sourceBaseDirectoryPath is None or targetBaseDirectoryPath is None:
+            return False
+        inputFilePath = job.inputFilePathOrPaths
+        if not isinstance(inputFilePath, Path):
+            return False
         try:
-            with open(tempFilePath, 'w', encoding='utf-8') as tempFile:
-                for inputFile in inputFilePathOrPaths:
-                    with open(inputFile, 'r', encoding='utf-8') as f:
-                        tempFile.write(f.read() + '\n')
-            self._esbuild.run(tempFilePath, outputFilePath)
-        finally:
-            try:
-                tempFilePath.unlink()
-            except Exception as e:
-                print(f'Warning: Failed to delete temporary file: {tempFilePath} ({e})')
+            expectedOutputFilePath = MinifierBackend.mirroredOutputFilePath(
+                inputFilePath,
+                job.suffix,
+                sourceBaseDirectoryPath,
+                targetBaseDirectoryPath
+            )
+        except ValueError:
+            return False
+        return job.outputFilePath == expectedOutputFilePath
+
+    #endregion private
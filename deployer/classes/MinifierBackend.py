@@ -0,0 +1,72 @@
+##
+# MinifierBackend.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .Utility import Utility
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+
+@dataclass
+class MinifyJob:
+    inputFilePathOrPaths: Path | list[Path]
+    outputFilePath: Path
+    suffix: str
+
+    def inputFilePaths(self) -> list[Path]:
+        if isinstance(self.inputFilePathOrPaths, Path):
+            return [self.inputFilePathOrPaths]
+        return self.inputFilePathOrPaths
+
+class MinifierBackend(ABC):
+    @abstractmethod
+    def cacheParameters(self) -> list[str]:
+        """
+        Returns the values besides the input that determine the output, such
+        as the tool's version and options. They are part of the cache key.
+        """
+        pass
+
+    @abstractmethod
+    def minify(self, job: MinifyJob) -> None:
+        """
+        Writes the minified inputs of the job, concatenated in order, to its
+        output file.
+        """
+        pass
+
+    def minifyMirrored(
+        self,
+        jobs: list[MinifyJob],
+        sourceBaseDirectoryPath: Path,
+        targetBaseDirectoryPath: Path
+    ) -> None:
+        """
+        Minifies single-file jobs whose outputs mirror their inputs' locations
+        (`<source base>/x/y.js` to `<target base>/x/y.min.js`). Backends that
+        can process such jobs together override this; by default they are
+        processed one by one.
+        """
+        for job in jobs:
+            self.minify(job)
+
+    def close(self) -> None:
+        pass
+
+    @staticmethod
+    def mirroredOutputFilePath(
+        inputFilePath: Path,
+        suffix: str,
+        sourceBaseDirectoryPath: Path,
+        targetBaseDirectoryPath: Path
+    ) -> Path:
+        relativePath = inputFilePath.relative_to(sourceBaseDirectoryPath)
+        return targetBaseDirectoryPath / Utility.addSuffix(
+            relativePath.with_suffix(''), suffix, isMinified=True)
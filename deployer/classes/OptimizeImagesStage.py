@@ -0,0 +1,237 @@
+##
+# OptimizeImagesStage.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .BuildCache import BuildCache
+from .Context import Context
+from .DeployDirectoryStage import DeployDirectoryStage
+from .DeployFrontendStage import DeployFrontendStage
+from .DeployPagesStage import DeployPagesStage
+from .DeployRootStage import DeployRootStage
+from .Htaccess import Htaccess
+from .ImageOptimizer import ImageOptimizer
+from .Profiler import Profiler
+from .Stage import Stage
+from .Utility import Utility
+from .WorkerPool import WorkerPool
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import os
+
+class OptimizeImagesStage(Stage):
+    """
+    Optimizes deployed PNG, JPEG and SVG images with `ImageOptimizer`, and
+    optionally writes WebP variants (e.g. "logo.png.webp") next to PNG and
+    JPEG images, along with rewrite rules in ".htaccess" that serve them to
+    clients accepting WebP. Results are cached by the content of the image,
+    so unchanged images are not processed again on later deployments.
+
+    Images are optimized in worker processes, since most of the work (PNG and
+    JPEG segment handling, SVG regular expressions) is pure Python code that
+    holds the GIL. Reading, writing and caching stay on threads of the main
+    process, which hand the image data to the workers.
+    """
+    _SUBDIRECTORY_NAMES = ['assets', 'frontend', 'pages']
+    _HTACCESS_FILENAME = '.htaccess'
+    _HTACCESS_SECTION = 'WebP images'
+    _OPTIMIZERS: dict[str, Callable[[bytes], bytes]] = {
+        'png': ImageOptimizer.optimizePng,
+        'jpg': ImageOptimizer.optimizeJpeg,
+        'jpeg': ImageOptimizer.optimizeJpeg,
+        'svg': ImageOptimizer.minifySvg
+    }
+    # Extensions of images that get WebP variants, and whether the variant
+    # is lossless.
+    _WEBP_EXTENSIONS = {'png': True, 'jpg': False, 'jpeg': False}
+    _WEBP_SUFFIX = 'webp'
+    _VERSION = '1'
+    _cache: BuildCache | None
+    _webp: bool
+    # Sizes and modification times of the images already optimized, so that
+    # updates do not process them again.
+    _optimizedFiles: dict[Path, tuple[int, int]]
+    _fileCount: int
+    _savedByteCount: int
+    _variantCount: int
+
+    def __init__(self, cache: BuildCache | None = None, *, webp: bool = False):
+        self._cache = cache
+        self._webp = webp
+        self._optimizedFiles = {}
+        self._fileCount = 0
+        self._savedByteCount = 0
+        self._variantCount = 0
+
+    def run(self, context: Context) -> None:
+        if self._webp and not ImageOptimizer.isWebpAvailable():
+            print('Warning: The "PIL" module (Pillow) is not installed; WebP '
+                'variants are not written.')
+        self._optimize(context, removeOrphans=False)
+
+    def status(self) -> str:
+        return 'Optimizing images...'
+
+    def dependencies(self) -> list[type[Stage]]:
+        # The rewrite rules go into the ".htaccess" file that `DeployRootStage`
+        # copies.
+        return [
+            DeployDirectoryStage,
+            DeployFrontendStage,
+            DeployPagesStage,
+            DeployRootStage
+        ]
+
+    def summary(self) -> str | None:
+        summary = (f'{self._fileCount} images optimized, '
+            f'{Utility.formatBytes(self._savedByteCount)} saved')
+        if self._webp:
+            summary += f', {self._variantCount} WebP variants written'
+        return summary
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        if not self.affectsAny(context, changedPaths, self._SUBDIRECTORY_NAMES,
+            rootFilePatterns=[self._HTACCESS_FILENAME]):
+            return False
+        # Deleted images may have left WebP variants behind, which the rewrite
+        # rules would still serve.
+        self._optimize(context, removeOrphans=True)
+        return True
+
+    #region private ------------------------------------------------------------
+
+    def _optimize(self, context: Context, *, removeOrphans: bool) -> None:
+        self._fileCount = 0
+        self._savedByteCount = 0
+        self._variantCount = 0
+        webp = self._webp and ImageOptimizer.isWebpAvailable()
+        # Worker processes are started on the first cache miss. The thread pool
+        # is left first, as its tasks wait for the worker processes.
+        with ProcessPoolExecutor(max_workers=max(1, context.jobs)) as processPool, \
+            WorkerPool(context.jobs) as pool:
+            for subdirectoryName in self._SUBDIRECTORY_NAMES:
+                for parentPath, _, fileNames in os.walk(
+                    context.targetDirectoryPath / subdirectoryName):
+                    parentPath = Path(parentPath)
+                    for fileName in fileNames:
+                        filePath = parentPath / fileName
+                        extension = filePath.suffix[1:].lower()
+                        if extension == self._WEBP_SUFFIX:
+                            if removeOrphans:
+                                self._removeOrphan(filePath)
+                            continue
+                        if extension in self._OPTIMIZERS:
+                            pool.submit(self._optimizeFile, processPool,
+                                filePath, webp)
+            for savedByteCount, variantWritten in pool.wait():
+                if savedByteCount:
+                    self._fileCount += 1
+                    self._savedByteCount += savedByteCount
+                if variantWritten:
+                    self._variantCount += 1
+        Htaccess.replaceSection(
+            context.targetDirectoryPath / self._HTACCESS_FILENAME,
+            self._HTACCESS_SECTION,
+            self._htaccessRules() if webp else []
+        )
+
+    def _optimizeFile(
+        self,
+        processPool: ProcessPoolExecutor,
+        filePath: Path,
+        webp: bool
+    ) -> tuple[int, bool]:
+        """
+        Optimizes an image in place and writes its WebP variant. Returns the
+        number of bytes saved and whether a variant exists.
+        """
+        fileStat = filePath.stat()
+        extension = filePath.suffix[1:].lower()
+        variantFilePath = filePath.with_name(f'{filePath.name}.{self._WEBP_SUFFIX}')
+        isOptimized = self._optimizedFiles.get(filePath) == \
+            (fileStat.st_size, fileStat.st_mtime_ns)
+        if isOptimized:
+            return 0, variantFilePath.is_file()
+        data = filePath.read_bytes()
+        optimizer = self._OPTIMIZERS[extension]
+        optimized = self._cachedResult(
+            ['image', self._VERSION, extension], filePath, extension,
+            lambda: processPool.submit(optimizer, data).result())
+        variant = None
+        if webp and extension in self._WEBP_EXTENSIONS:
+            lossless = self._WEBP_EXTENSIONS[extension]
+            variant = self._cachedResult(
+                ['image-webp', self._VERSION, str(lossless)], filePath,
+                self._WEBP_SUFFIX,
+                lambda: processPool.submit(ImageOptimizer.toWebp, data,
+                    lossless=lossless).result())
+        if len(optimized) < len(data):
+            Utility.replaceFile(filePath, optimized)
+            # The image keeps its timestamps, as it still shows the same.
+            os.utime(filePath, ns=(fileStat.st_atime_ns, fileStat.st_mtime_ns))
+            Profiler.count(Profiler.BYTES_WRITTEN, len(optimized))
+        # A variant that is not smaller than the image is of no use.
+        if variant is not None and len(variant) < len(optimized):
+            Utility.replaceFile(variantFilePath, variant)
+            Profiler.count(Profiler.BYTES_WRITTEN, len(variant))
+            variantWritten = True
+        else:
+            variantFilePath.unlink(missing_ok=True)
+            variantWritten = False
+        self._optimizedFiles[filePath] = (len(optimized), fileStat.st_mtime_ns)
+        return len(data) - len(optimized), variantWritten
+
+    def _cachedResult(
+        self,
+        parameters: list[str],
+        filePath: Path,
+        suffix: str,
+        produce: Callable[[], bytes]
+    ) -> bytes:
+        if self._cache is None:
+            return produce()
+        key = self._cache.computeKey(parameters, [filePath])
+        result = self._cache.fetchBytes(key, suffix)
+        if result is not None:
+            Profiler.count(Profiler.CACHE_HITS)
+            return result
+        Profiler.count(Profiler.CACHE_MISSES)
+        result = produce()
+        self._cache.storeBytes(key, suffix, result)
+        return result
+
+    def _removeOrphan(self, variantFilePath: Path) -> None:
+        # Only variants of images this stage converts are removed; other WebP
+        # images may be deployed on purpose.
+        originalFilePath = variantFilePath.with_suffix('')
+        if originalFilePath.suffix[1:].lower() in self._WEBP_EXTENSIONS \
+            and not originalFilePath.exists():
+            variantFilePath.unlink(missing_ok=True)
+
+    def _htaccessRules(self) -> list[str]:
+        extensions = '|'.join(self._WEBP_EXTENSIONS)
+        return [
+            '<IfModule mod_rewrite.c>',
+            '  RewriteEngine On',
+            '',
+            '  # Serve "x.png.webp" for "x.png" if the client accepts WebP.',
+            '  RewriteCond %{HTTP_ACCEPT} \\bimage/webp\\b',
+            '  RewriteCond %{REQUEST_FILENAME}.webp -s',
+            f'  RewriteRule ^(.+)\\.({extensions})$ $1.$2.webp [T=image/webp,L]',
+            '</IfModule>',
+            '',
+            '<IfModule mod_headers.c>',
+            f'  <FilesMatch "\\.({extensions})(\\.webp)?$">',
+            '    Header append Vary Accept',
+            '  </FilesMatch>',
+            '</IfModule>'
+        ]
+
+    #endregion private
@@ -0,0 +1,202 @@
+##
+# PathMatcher.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from dataclasses import dataclass, field
+import re
+
+@dataclass
+class _Rule:
+    index: int
+    negated: bool
+    directoryOnly: bool
+
+@dataclass
+class _TrieNode:
+    children: dict[str, '_TrieNode'] = field(default_factory=dict)
+    rules: list[_Rule] = field(default_factory=list)
+
+class PathMatcher:
+    """
+    Matches relative, slash-separated paths against gitignore-style patterns.
+
+    - A leading "!" negates a pattern; the last matching pattern wins.
+    - A trailing "/" restricts a pattern to directories.
+    - A pattern containing a "/" other than a trailing one is anchored to the
+      base directory; otherwise it matches a name at any depth.
+    - "*" and "?" do not cross "/"; "**" spans any number of directories.
+    - A path inside a matched directory is matched as well, and a negation
+      cannot bring it back.
+
+    Patterns are compiled once: literal anchored patterns go into a trie of
+    path segments, literal names into a lookup table, and all wildcard
+    patterns into a single regular expression. Results for directories are
+    memoized, so checking a path costs time proportional to its length
+    rather than to the number of patterns.
+    """
+    _trie: _TrieNode
+    _names: dict[str, list[_Rule]]
+    _fileRegex: re.Pattern | None
+    _fileRegexRules: list[_Rule]
+    _directoryRegex: re.Pattern | None
+    _directoryRegexRules: list[_Rule]
+    _directoryCache: dict[str, bool]
+
+    def __init__(self, patterns: list[str]):
+        self._trie = _TrieNode()
+        self._names = {}
+        self._directoryCache = {}
+        wildcardRules: list[tuple[_Rule, str]] = []
+        for index, pattern in enumerate(patterns):
+            self._addPattern(index, pattern, wildcardRules)
+        self._fileRegex, self._fileRegexRules = self._compile(
+            [entry for entry in wildcardRules if not entry[0].directoryOnly])
+        self._directoryRegex, self._directoryRegexRules = self._compile(
+            wildcardRules)
+
+    def isMatched(self, path: str, isDirectory: bool = False) -> bool:
+        parentPath, _, _ = path.rpartition('/')
+        if parentPath and self._isDirectoryMatched(parentPath):
+            return True
+        if isDirectory:
+            return self._isDirectoryMatched(path)
+        return self._decide(path, isDirectory=False)
+
+    #region private ------------------------------------------------------------
+
+    def _addPattern(
+        self,
+        index: int,
+        pattern: str,
+        wildcardRules: list[tuple[_Rule, str]]
+    ) -> None:
+        pattern = self._stripTrailingSpaces(pattern)
+        negated = pattern.startswith('!')
+        if negated or pattern.startswith('\\!') or pattern.startswith('\\#'):
+            pattern = pattern[1:]
+        directoryOnly = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        if not pattern:
+            return
+        anchored = '/' in pattern
+        pattern = pattern.lstrip('/')
+        rule = _Rule(index, negated, directoryOnly)
+        if re.search(r'[*?\[\\]', pattern):
+            wildcardRules.append((rule, self._translate(pattern, anchored)))
+        elif anchored:
+            node = self._trie
+            for segment in pattern.split('/'):
+                node = node.children.setdefault(segment, _TrieNode())
+            node.rules.append(rule)
+        else:
+            self._names.setdefault(pattern, []).append(rule)
+
+    def _stripTrailingSpaces(self, pattern: str) -> str:
+        stripped = pattern.rstrip(' ')
+        # A backslash keeps the space that follows it.
+        if stripped.endswith('\\') and len(stripped) < len(pattern):
+            stripped += ' '
+        return stripped
+
+    def _translate(self, pattern: str, anchored: bool) -> str:
+        result = '' if anchored else '(?:.*/)?'
+        i, n = 0, len(pattern)
+        while i < n:
+            c = pattern[i]
+            if c == '*':
+                j = i
+                while j < n and pattern[j] == '*':
+                    j += 1
+                atStart = i == 0 or pattern[i - 1] == '/'
+                atEnd = j == n or pattern[j] == '/'
+                if j - i >= 2 and atStart and atEnd:
+                    if j == n:
+                        result += '.*'             # "a/**"
+                    else:
+                        result += '(?:.*/)?'       # "**/a" or "a/**/b"
+                        j += 1
+                else:
+                    result += '[^/]*'
+                i = j
+                continue
+            if c == '?':
+                result += '[^/]'
+            elif c == '[':
+                j = pattern.find(']', i + 2 if pattern[i + 1:i + 2] in ('!', '^') else i + 1)
+                if j < 0:
+                    result += re.escape(c)
+                else:
+                    body = pattern[i + 1:j]
+                    if body[:1] in ('!', '^'):
+                        body = '^/' + body[1:]
+                    result += '[' + body.replace('\\', '\\\\') + ']'
+                    i = j
+            elif c == '\\' and i + 1 < n:
+                i += 1
+                result += re.escape(pattern[i])
+            else:
+                result += re.escape(c)
+            i += 1
+        return result
+
+    def _compile(
+        self,
+        wildcardRules: list[tuple[_Rule, str]]
+    ) -> tuple[re.Pattern | None, list[_Rule]]:
+        if not wildcardRules:
+            return None, []
+        # Alternatives are tried from left to right, so listing the rules in
+        # reverse makes the first matching group the last matching rule.
+        ordered = list(reversed(wildcardRules))
+        regex = re.compile('|'.join(f'({source})' for _, source in ordered),
+            re.DOTALL)
+        return regex, [rule for rule, _ in ordered]
+
+    def _isDirectoryMatched(self, path: str) -> bool:
+        result = self._directoryCache.get(path)
+        if result is None:
+            parentPath, _, _ = path.rpartition('/')
+            result = (bool(parentPath) and self._isDirectoryMatched(parentPath)) \
+                or self._decide(path, isDirectory=True)
+            self._directoryCache[path] = result
+        return result
+
+    def _decide(self, path: str, *, isDirectory: bool) -> bool:
+        # Collect the last matching rule from each index and let the one that
+        # appears last in the pattern list decide.
+        best: _Rule | None = None
+        def consider(rules: list[_Rule]) -> None:
+            nonlocal best
+            for rule in rules:
+                if rule.directoryOnly and not isDirectory:
+                    continue
+                if best is None or rule.index > best.index:
+                    best = rule
+        node = self._trie
+        for segment in path.split('/'):
+            node = node.children.get(segment)
+            if node is None:
+                break
+        else:
+            consider(node.rules)
+        name = path.rpartition('/')[2]
+        if name in self._names:
+            consider(self._names[name])
+        regex, rules = (
+            (self._directoryRegex, self._directoryRegexRules) if isDirectory
+            else (self._fileRegex, self._fileRegexRules)
+        )
+        if regex is not None:
+            match = regex.fullmatch(path)
+            if match is not None:
+                consider([rules[match.lastindex - 1]])
+        return best is not None and not best.negated
+
+    #endregion private
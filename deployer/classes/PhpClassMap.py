@@ -0,0 +1,135 @@
+##
+# PhpClassMap.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .Profiler import Profiler
+from .Utility import Utility
+from pathlib import Path
+import posixpath
+import re
+
+class PhpClassMap:
+    """
+    Maps the fully qualified names of the classes, interfaces, traits and
+    enums declared in PHP files to those files, and saves the map as a PHP
+    file that returns it as an array.
+
+    Declarations are found by scanning the files with comments and string
+    literals blanked out, which is enough for well-formed library code;
+    conditional declarations (e.g. inside `if (!class_exists(...))`) are
+    mapped like any other.
+    """
+    _STRIP_PATTERN = re.compile(
+        r'\?>.*?(?:<\?php|<\?=|\Z)'  # inline HTML
+        r'|<<<[ \t]*(["\']?)([A-Za-z_]\w*)\1\r?\n.*?^[ \t]*\2\b'  # heredoc
+        r'|/\*.*?\*/'
+        r'|(?://|#(?!\[))[^\r\n]*'
+        r"|'(?:\\.|[^\\'])*'"
+        r'|"(?:\\.|[^\\"])*"',
+        re.DOTALL | re.MULTILINE
+    )
+    _DECLARATION_PATTERN = re.compile(
+        r'(?<![\w$\\])namespace\s+(?P<namespace>[A-Za-z_][\w\\]*)\s*[;{]'
+        r'|(?<![\w$\\])(?P<globalNamespace>namespace)\s*\{'
+        r'|(?<![\w$:>\\])(?P<new>new\s+)?(?:(?:abstract|final|readonly)\s+)*'
+        r'(?:class|interface|trait|enum)\s+(?P<name>[A-Za-z_]\w*)',
+        re.IGNORECASE
+    )
+    _classes: dict[str, Path]
+
+    def __init__(self):
+        self._classes = {}
+
+    @classmethod
+    def declaredClassNames(cls, code: str) -> list[str]:
+        """
+        Returns the fully qualified names of the types declared in PHP code,
+        without a leading backslash.
+        """
+        code = cls.strippedCode(code)
+        result = []
+        namespace = ''
+        for match in cls._DECLARATION_PATTERN.finditer(code):
+            if match.group('namespace') is not None:
+                namespace = match.group('namespace').strip('\\')
+            elif match.group('globalNamespace') is not None:
+                namespace = ''
+            elif match.group('new') is None:  # Not an anonymous class
+                name = match.group('name')
+                result.append(f'{namespace}\\{name}' if namespace else name)
+        return result
+
+    @classmethod
+    def strippedCode(cls, code: str) -> str:
+        """
+        Returns PHP code with comments, string literals and inline HTML
+        replaced by spaces.
+        """
+        return cls._STRIP_PATTERN.sub(' ', code)
+
+    @classmethod
+    def scanDirectory(cls, directoryPath: Path) -> 'PhpClassMap':
+        """
+        Returns a map of the types declared in the PHP files below the
+        directory.
+        """
+        classMap = cls()
+        for filePath in sorted(directoryPath.rglob('*.php')):
+            classMap.addFile(filePath)
+        return classMap
+
+    def addFile(self, filePath: Path) -> int:
+        """
+        Maps the types declared in a PHP file to it, and returns how many
+        there are. A type that is already mapped keeps its first file.
+        """
+        code = filePath.read_text(encoding='utf-8', errors='replace')
+        classNames = self.declaredClassNames(code)
+        for className in classNames:
+            existingPath = self._classes.get(className)
+            if existingPath is not None:
+                if existingPath != filePath:
+                    print(f"Warning: Class '{className}' is declared in both "
+                        f'"{existingPath}" and "{filePath}".')
+                continue
+            self._classes[className] = filePath
+        return len(classNames)
+
+    def classes(self) -> dict[str, Path]:
+        return self._classes
+
+    def save(self, filePath: Path) -> None:
+        """
+        Saves the map as a PHP file that returns an array of file paths by
+        class name. Paths are built from `__DIR__` of the saved file, so that
+        the deployment can be moved.
+        """
+        lines = [
+            '<?php declare(strict_types=1);',
+            '// Generated by the deployer; do not edit.',
+            'return ['
+        ]
+        for className, classFilePath in sorted(self._classes.items()):
+            relativePath = posixpath.relpath(
+                classFilePath.as_posix(), filePath.parent.as_posix())
+            lines.append(f"    {self.phpString(className)} => "
+                f"__DIR__ . {self.phpString(f'/{relativePath}')},")
+        lines.append('];')
+        data = ('\n'.join(lines) + '\n').encode('utf-8')
+        Utility.replaceFile(filePath, data)
+        Profiler.count(Profiler.BYTES_WRITTEN, len(data))
+
+    @staticmethod
+    def phpString(value: str) -> str:
+        """
+        Returns a single-quoted PHP string literal of the value.
+        """
+        escaped = value.replace('\\', '\\\\').replace("'", "\\'")
+        return f"'{escaped}'"
@@ -0,0 +1,231 @@
+##
+# PhpPreloader.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .PhpClassMap import PhpClassMap
+from .Profiler import Profiler
+from .Utility import Utility
+from pathlib import Path
+import fnmatch
+import posixpath
+import re
+
+class PhpPreloader:
+    """
+    Selects the class files to preload with OPcache, and saves a script for
+    the `opcache.preload` setting that compiles them.
+
+    Files are ordered so that the parent classes, interfaces and traits of a
+    class are compiled before it, which lets OPcache link the class at
+    preload time. References are found by a static scan of `use` imports,
+    `extends` and `implements` clauses, trait uses, and class names in
+    `new`, `::` and fully qualified expressions; names that are only known
+    at runtime (e.g. `new $className`) are not followed.
+    """
+    _REFERENCE_PATTERN = re.compile(
+        r'(?<![\w$\\])namespace\s+(?P<namespace>[A-Za-z_][\w\\]*)\s*[;{]'
+        r'|(?<![\w$\\])(?P<globalNamespace>namespace)\s*\{'
+        r'|(?<![\w$\\>:])use\s+(?P<use>[A-Za-z_\\](?:\\\{[^}]*\}|[^;{(])*?)\s*[;{]'
+        r'|(?<![\w$:>\\])(?:class|interface|trait|enum)\s+[A-Za-z_]\w*'
+            r'(?:\s*:\s*[\w\\]+)?'
+            r'(?:\s+extends\s+(?P<extends>[\w\\\s,]+?))?'
+            r'(?:\s+implements\s+(?P<implements>[\w\\\s,]+?))?\s*\{'
+        r'|(?<![\w$\\>])new\s+(?P<new>\\?[A-Za-z_][\w\\]*)'
+        r'|(?<![\w$\\>])(?P<static>\\?[A-Za-z_][\w\\]*)\s*::'
+        r'|(?<![\w$\\])(?P<qualified>\\[A-Za-z_]\w*(?:\\[A-Za-z_]\w*)+)',
+        re.IGNORECASE
+    )
+    _GROUP_USE_PATTERN = re.compile(r'^(?P<prefix>[\w\\]+)\\\{(?P<items>.*)\}$',
+        re.DOTALL)
+    _RESERVED_NAMES = {'self', 'static', 'parent'}
+    _classMap: PhpClassMap
+    _references: dict[Path, tuple[set[str], set[str]]]
+    _rootClassNames: set[str]
+
+    def __init__(self, classMap: PhpClassMap):
+        self._classMap = classMap
+        self._references = {}
+        self._rootClassNames = set()
+
+    @classmethod
+    def references(cls, code: str) -> tuple[set[str], set[str]]:
+        """
+        Returns the fully qualified names of the types that PHP code refers
+        to: those it extends, implements or uses as traits, which must be
+        loaded before it can be linked, and all others.
+        """
+        code = PhpClassMap.strippedCode(code)
+        parents: set[str] = set()
+        others: set[str] = set()
+        namespace = ''
+        imports: dict[str, str] = {}
+        inClass = False
+        for match in cls._REFERENCE_PATTERN.finditer(code):
+            if match.group('namespace') is not None \
+                or match.group('globalNamespace') is not None:
+                namespace = (match.group('namespace') or '').strip('\\')
+                imports = {}
+                inClass = False
+            elif match.group('use') is not None:
+                if inClass:  # Trait use
+                    for name in match.group('use').split(','):
+                        parents.add(cls._resolve(name, namespace, imports))
+                else:
+                    for alias, name in cls._imports(match.group('use')):
+                        imports[alias.lower()] = name
+                        others.add(name)
+            elif match.group('new') is not None:
+                others.add(cls._resolve(match.group('new'), namespace, imports))
+            elif match.group('static') is not None:
+                others.add(cls._resolve(match.group('static'), namespace, imports))
+            elif match.group('qualified') is not None:
+                others.add(match.group('qualified').lstrip('\\'))
+            else:  # Class declaration
+                inClass = True
+                for clause in [match.group('extends'), match.group('implements')]:
+                    if clause is None:
+                        continue
+                    for name in clause.split(','):
+                        parents.add(cls._resolve(name, namespace, imports))
+        parents.discard('')
+        others.discard('')
+        return parents, others - parents
+
+    def addEntryFile(self, filePath: Path) -> None:
+        """
+        Adds the classes that a script refers to, such as "api.php", to the
+        classes to preload. The script itself is not preloaded.
+        """
+        parents, others = self._fileReferences(filePath)
+        self._rootClassNames |= parents | others
+
+    def addClasses(self, patterns: list[str]) -> None:
+        """
+        Adds the classes whose names match the patterns (e.g. "Harmonia\\*")
+        to the classes to preload.
+        """
+        if not patterns:
+            return
+        pattern = re.compile('|'.join(
+            fnmatch.translate(pattern.lstrip('\\')) for pattern in patterns))
+        self._rootClassNames |= {className
+            for className in self._classMap.classes()
+            if pattern.match(className)}
+
+    def filePaths(self, *, followReferences: bool = True) -> list[Path]:
+        """
+        Returns the files of the added classes and of the classes they
+        depend on, with each file after the files of its parent classes.
+        If `followReferences` is set, all referenced classes are added, and
+        not only those needed for linking.
+        """
+        classes = self._classMap.classes()
+        visiting: set[Path] = set()
+        visited: set[Path] = set()
+        result: list[Path] = []
+        def visit(filePath: Path) -> None:
+            if filePath in visited or filePath in visiting:
+                return  # Cycles are not valid PHP; they are ignored.
+            visiting.add(filePath)
+            parents, others = self._fileReferences(filePath)
+            for className in sorted(parents):
+                if className in classes:
+                    visit(classes[className])
+            visiting.discard(filePath)
+            visited.add(filePath)
+            result.append(filePath)
+            if followReferences:
+                for className in sorted(others):
+                    if className in classes:
+                        visit(classes[className])
+        for className in sorted(self._rootClassNames):
+            if className in classes:
+                visit(classes[className])
+        return result
+
+    def save(self, filePath: Path, classFilePaths: list[Path]) -> None:
+        """
+        Saves a preload script that compiles the files in order. Paths are
+        built from `__DIR__` of the script, so that the deployment can be
+        moved.
+        """
+        lines = [
+            '<?php declare(strict_types=1);',
+            '// Generated by the deployer; do not edit. Set `opcache.preload`',
+            '// to this file to compile these classes when PHP starts.',
+            'if (!\\function_exists(\'opcache_compile_file\')) {',
+            '    return;',
+            '}'
+        ]
+        for classFilePath in classFilePaths:
+            relativePath = posixpath.relpath(
+                classFilePath.as_posix(), filePath.parent.as_posix())
+            lines.append('\\opcache_compile_file(__DIR__ . '
+                f"{PhpClassMap.phpString(f'/{relativePath}')});")
+        data = ('\n'.join(lines) + '\n').encode('utf-8')
+        Utility.replaceFile(filePath, data)
+        Profiler.count(Profiler.BYTES_WRITTEN, len(data))
+
+    #region private ------------------------------------------------------------
+
+    def _fileReferences(self, filePath: Path) -> tuple[set[str], set[str]]:
+        references = self._references.get(filePath)
+        if references is None:
+            references = self.references(
+                filePath.read_text(encoding='utf-8', errors='replace'))
+            self._references[filePath] = references
+        return references
+
+    @classmethod
+    def _imports(cls, clause: str) -> list[tuple[str, str]]:
+        """
+        Returns the aliases and names that a `use` statement imports, e.g.
+        "A\\{B, C as D}" imports "B" as "A\\B" and "D" as "A\\C".
+        """
+        clause = clause.strip()
+        kind = clause.split(None, 1)[0].lower()
+        if kind in ('function', 'const'):
+            return []
+        match = cls._GROUP_USE_PATTERN.match(clause)
+        if match is not None:
+            prefix = match.group('prefix').strip('\\') + '\\'
+            items = match.group('items').split(',')
+        else:
+            prefix = ''
+            items = clause.split(',')
+        result = []
+        for item in items:
+            parts = item.split()
+            if not parts or parts[0].lower() in ('function', 'const'):
+                continue
+            name = prefix + parts[0].strip('\\')
+            if len(parts) == 3 and parts[1].lower() == 'as':
+                alias = parts[2]
+            else:
+                alias = name.rsplit('\\', 1)[-1]
+            result.append((alias, name))
+        return result
+
+    @classmethod
+    def _resolve(cls, name: str, namespace: str, imports: dict[str, str]) -> str:
+        name = name.strip()
+        if not name or name.lower() in cls._RESERVED_NAMES:
+            return ''
+        if name.startswith('\\'):
+            return name[1:]
+        first, _, rest = name.partition('\\')
+        if first.lower() == 'namespace':
+            return f'{namespace}\\{rest}' if namespace else rest
+        imported = imports.get(first.lower())
+        if imported is not None:
+            return f'{imported}\\{rest}' if rest else imported
+        return f'{namespace}\\{name}' if namespace else name
+
+    #endregion private
@@ -10,17 +10,120 @@
 ##
 
 from .Context import Context
+from .Profiler import Profiler
 from .Stage import Stage
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
 
 class Pipeline:
+    _PENDING = 'pending'
+    _RUNNING = 'running'
+    _SUCCEEDED = 'succeeded'
+    _FAILED = 'failed'
+
     def __init__(self, stages: list[Stage]):
         self.stages = stages
 
-    def run(self, context: Context) -> None:
+    def run(self, context: Context) -> bool:
+        """
+        Runs the stages as a dependency graph, starting each stage as soon as
+        its prerequisites have succeeded. Status lines and errors are printed
+        in declaration order. After a failure no further stages are started.
+        Returns whether every stage succeeded.
+        """
+        prerequisites = self._resolvePrerequisites()
+        states = [self._PENDING] * len(self.stages)
+        errors: list[Exception | None] = [None] * len(self.stages)
+        running: dict[Future, int] = {}
+        printed = 0
+        with ThreadPoolExecutor(max_workers=max(1, context.jobs)) as executor:
+            while True:
+                if self._FAILED not in states:
+                    for index, stage in enumerate(self.stages):
+                        if states[index] != self._PENDING:
+                            continue
+                        if all(states[prerequisite] == self._SUCCEEDED
+                            for prerequisite in prerequisites[index]):
+                            states[index] = self._RUNNING
+                            running[executor.submit(
+                                self._runStage, stage, context)] = index
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = running.pop(future)
+                    errors[index] = future.exception()
+                    states[index] = (self._SUCCEEDED if errors[index] is None
+                        else self._FAILED)
+                printed = self._printResults(states, errors, printed)
+        # Report stages that finished after an earlier one was left pending.
+        for index in range(printed, len(self.stages)):
+            if states[index] != self._PENDING:
+                self._printResult(index, errors[index])
+        return all(state == self._SUCCEEDED for state in states)
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        """
+        Lets each stage, in declaration order, redeploy what the changed
+        source paths affect. Errors are printed and do not stop later stages.
+        Returns whether every stage succeeded.
+        """
+        success = True
         for stage in self.stages:
             try:
-                print(stage.status())
-                stage.run(context)
+                if stage.update(context, changedPaths):
+                    print(stage.status())
             except Exception as error:
+                print(stage.status())
                 print(error)
+                success = False
+        return success
+
+    #region private ------------------------------------------------------------
+
+    def _runStage(self, stage: Stage, context: Context) -> None:
+        if context.profiler is None:
+            stage.run(context)
+            return
+        with context.profiler.measureStage(stage.status().rstrip('.')):
+            Profiler.call(stage.run, context)
+
+    def _resolvePrerequisites(self) -> list[set[int]]:
+        result = []
+        for index, stage in enumerate(self.stages):
+            prerequisites = set()
+            for dependency in stage.dependencies():
+                matches = [i for i, other in enumerate(self.stages)
+                    if isinstance(other, dependency)]
+                if any(i >= index for i in matches):
+                    raise ValueError(
+                        f'Stage {type(stage).__name__} must be declared after '
+                        f'its dependency {dependency.__name__}.')
+                prerequisites.update(matches)
+            result.append(prerequisites)
+        return result
+
+    def _printResults(
+        self,
+        states: list[str],
+        errors: list[Exception | None],
+        printed: int
+    ) -> int:
+        while printed < len(self.stages):
+            if states[printed] not in (self._SUCCEEDED, self._FAILED):
                 break
+            self._printResult(printed, errors[printed])
+            printed += 1
+        return printed
+
+    def _printResult(self, index: int, error: Exception | None) -> None:
+        stage = self.stages[index]
+        print(stage.status())
+        if error is not None:
+            print(error)
+            return
+        summary = stage.summary()
+        if summary:
+            print(f'  {summary}')
+
+    #endregion private
@@ -0,0 +1,260 @@
+##
+# PrecompressStage.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .BuildCache import BuildCache
+from .Context import Context
+from .DeployDirectoryStage import DeployDirectoryStage
+from .DeployFrontendStage import DeployFrontendStage
+from .DeployPagesStage import DeployPagesStage
+from .DeployRootStage import DeployRootStage
+from .Htaccess import Htaccess
+from .OptimizeImagesStage import OptimizeImagesStage
+from .Profiler import Profiler
+from .Stage import Stage
+from .Utility import Utility
+from .WorkerPool import WorkerPool
+from pathlib import Path
+import gzip
+import os
+import zlib
+try:
+    import brotli
+except ImportError:
+    brotli = None  # Optional; only gzip variants are written without it
+
+class PrecompressStage(Stage):
+    """
+    Writes gzip and, if the `brotli` module is installed, Brotli variants
+    (".gz", ".br") next to deployed text and font files, and adds rewrite
+    rules to ".htaccess" that serve them to clients accepting the encoding.
+    The web server then neither compresses on every request nor falls back
+    to sending the files uncompressed. Variants are cached by the content of
+    the file, since Brotli at its highest quality is slow. WOFF2 fonts are
+    left alone, as they are Brotli-compressed already, and a variant is only
+    written if it is at least 5% smaller than the file.
+    """
+    _SUBDIRECTORY_NAMES = ['assets', 'frontend', 'pages']
+    _HTACCESS_FILENAME = '.htaccess'
+    _HTACCESS_SECTION = 'Precompressed assets'
+    _CONTENT_TYPES = {
+        'js': 'text/javascript',
+        'css': 'text/css',
+        'json': 'application/json',
+        'svg': 'image/svg+xml',
+        'ttf': 'font/ttf',
+        'otf': 'font/otf',
+        'eot': 'application/vnd.ms-fontobject',
+        'woff': 'font/woff'
+    }
+    # Content encodings by suffix, in order of preference.
+    _ENCODINGS = {'br': 'br', 'gz': 'gzip'}
+    _MINIMUM_SAVING = 0.05
+    _VERSION = '1'
+    _cache: BuildCache | None
+    _minimumSize: int
+    _fileCount: int
+    _variantCount: int
+
+    def __init__(
+        self,
+        cache: BuildCache | None = None,
+        *,
+        minimumSize: int = 1024
+    ):
+        self._cache = cache
+        self._minimumSize = minimumSize
+        self._fileCount = 0
+        self._variantCount = 0
+
+    def run(self, context: Context) -> None:
+        self._compress(context, removeOrphans=False)
+
+    def status(self) -> str:
+        return 'Precompressing assets...'
+
+    def dependencies(self) -> list[type[Stage]]:
+        # The rewrite rules go into the ".htaccess" file that `DeployRootStage`
+        # copies. Minified SVG images are compressed, not the originals.
+        return [
+            DeployDirectoryStage,
+            DeployFrontendStage,
+            DeployPagesStage,
+            DeployRootStage,
+            OptimizeImagesStage
+        ]
+
+    def summary(self) -> str | None:
+        return (f'{self._fileCount} files compressed, '
+            f'{self._variantCount} variants written')
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        # Deployed file names do not necessarily match their sources (e.g.
+        # "page.min.js"), so affected directories are rescanned as a whole;
+        # variants that are up to date are kept.
+        if not self.affectsAny(context, changedPaths, self._SUBDIRECTORY_NAMES,
+            rootFilePatterns=[self._HTACCESS_FILENAME]):
+            return False
+        # Deleted files may have left variants behind, which the rewrite rules
+        # would still serve.
+        self._compress(context, removeOrphans=True)
+        return True
+
+    #region private ------------------------------------------------------------
+
+    def _compress(self, context: Context, *, removeOrphans: bool) -> None:
+        self._fileCount = 0
+        self._variantCount = 0
+        with WorkerPool(context.jobs) as pool:
+            for subdirectoryName in self._SUBDIRECTORY_NAMES:
+                self._compressDirectory(
+                    context,
+                    pool,
+                    context.targetDirectoryPath / subdirectoryName,
+                    removeOrphans
+                )
+            for variantCount in pool.wait():
+                if variantCount:
+                    self._fileCount += 1
+                    self._variantCount += variantCount
+        Htaccess.replaceSection(
+            context.targetDirectoryPath / self._HTACCESS_FILENAME,
+            self._HTACCESS_SECTION,
+            self._htaccessRules()
+        )
+
+    def _compressDirectory(
+        self,
+        context: Context,
+        pool: WorkerPool,
+        directoryPath: Path,
+        removeOrphans: bool
+    ) -> None:
+        for parentPath, _, fileNames in os.walk(directoryPath):
+            parentPath = Path(parentPath)
+            fileNameSet = set(fileNames)
+            for fileName in fileNames:
+                filePath = parentPath / fileName
+                extension = filePath.suffix[1:]
+                if extension in self._ENCODINGS:
+                    if removeOrphans and filePath.stem not in fileNameSet:
+                        self._removeOrphan(filePath)
+                    continue
+                if extension.lower() not in self._CONTENT_TYPES:
+                    continue
+                pool.submit(self._compressFile, context, filePath)
+
+    def _compressFile(self, context: Context, filePath: Path) -> int:
+        """
+        Writes the variants of a file and returns how many were written.
+        """
+        fileStat = filePath.stat()
+        variantCount = 0
+        data = None
+        for suffix in self._ENCODINGS:
+            variantFilePath = filePath.with_name(f'{filePath.name}.{suffix}')
+            if fileStat.st_size < self._minimumSize or \
+                (suffix == 'br' and brotli is None):
+                variantFilePath.unlink(missing_ok=True)
+                continue
+            if self._isUpToDate(variantFilePath, fileStat):
+                variantCount += 1
+                continue
+            if context.copier.linkDerivedFile(variantFilePath, filePath):
+                variantCount += 1
+                continue
+            if data is None:
+                data = filePath.read_bytes()
+            compressed = self._compressedData(filePath, data, suffix)
+            # Compression does not pay off for data that is already
+            # compressed, such as WOFF fonts, and a variant that is barely
+            # smaller is not worth serving.
+            if len(data) - len(compressed) < len(data) * self._MINIMUM_SAVING:
+                variantFilePath.unlink(missing_ok=True)
+                continue
+            Utility.replaceFile(variantFilePath, compressed)
+            # The variant takes the original's timestamps, which tells
+            # whether it is up to date.
+            os.utime(variantFilePath,
+                ns=(fileStat.st_atime_ns, fileStat.st_mtime_ns))
+            Profiler.count(Profiler.BYTES_WRITTEN, len(compressed))
+            variantCount += 1
+        return variantCount
+
+    def _compressedData(self, filePath: Path, data: bytes, suffix: str) -> bytes:
+        key = None
+        if self._cache is not None:
+            key = self._cache.computeKey(
+                ['precompress', self._VERSION, suffix, self._encoderVersion(suffix)],
+                [filePath]
+            )
+            compressed = self._cache.fetchBytes(key, suffix)
+            if compressed is not None:
+                Profiler.count(Profiler.CACHE_HITS)
+                return compressed
+            Profiler.count(Profiler.CACHE_MISSES)
+        if suffix == 'br':
+            compressed = brotli.compress(data, quality=11)
+        else:
+            # A fixed timestamp keeps the output reproducible.
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if key is not None:
+            self._cache.storeBytes(key, suffix, compressed)
+        return compressed
+
+    def _encoderVersion(self, suffix: str) -> str:
+        if suffix == 'br':
+            return getattr(brotli, '__version__', '')
+        return zlib.ZLIB_VERSION
+
+    def _removeOrphan(self, variantFilePath: Path) -> None:
+        # Only variants of files this stage compresses are removed; other
+        # files with these suffixes may be deployed on purpose.
+        originalExtension = Path(variantFilePath.stem).suffix[1:]
+        if originalExtension.lower() in self._CONTENT_TYPES:
+            variantFilePath.unlink(missing_ok=True)
+
+    def _isUpToDate(self, variantFilePath: Path, fileStat: os.stat_result) -> bool:
+        try:
+            return variantFilePath.stat().st_mtime_ns == fileStat.st_mtime_ns
+        except FileNotFoundError:
+            return False
+
+    def _htaccessRules(self) -> list[str]:
+        extensions = '|'.join(self._CONTENT_TYPES)
+        lines = ['<IfModule mod_rewrite.c>', '  RewriteEngine On']
+        for suffix, encoding in self._ENCODINGS.items():
+            lines += [
+                '',
+                f'  # Serve "x.js.{suffix}" for "x.js" if the client accepts '
+                    f'{encoding}.',
+                f'  RewriteCond %{{HTTP:Accept-Encoding}} \\b{encoding}\\b',
+                f'  RewriteCond %{{REQUEST_FILENAME}}.{suffix} -s',
+                f'  RewriteRule ^(.+)\\.({extensions})$ $1.$2.{suffix} [L]'
+            ]
+        lines += ['']
+        # Keep the original content type, and prevent mod_deflate from
+        # compressing the response a second time.
+        for suffix in self._ENCODINGS:
+            for extension, contentType in self._CONTENT_TYPES.items():
+                lines.append(f'  RewriteRule \\.{extension}\\.{suffix}$ - '
+                    f'[T={contentType},E=no-gzip:1,E=no-brotli:1]')
+        lines += ['</IfModule>', '', '<IfModule mod_headers.c>']
+        for suffix, encoding in self._ENCODINGS.items():
+            lines += [
+                f'  <FilesMatch "\\.({extensions})\\.{suffix}$">',
+                f'    Header set Content-Encoding {encoding}',
+                '    Header append Vary Accept-Encoding',
+                '  </FilesMatch>'
+            ]
+        lines.append('</IfModule>')
+        return lines
+
+    #endregion private
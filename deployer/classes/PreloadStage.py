@@ -0,0 +1,98 @@
+##
+# PreloadStage.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .ClassMapStage import ClassMapStage
+from .Context import Context
+from .DeployDirectoryStage import DeployDirectoryStage
+from .DeployRootStage import DeployRootStage
+from .PhpClassMap import PhpClassMap
+from .PhpPreloader import PhpPreloader
+from .Stage import Stage
+from pathlib import Path
+
+class PreloadStage(Stage):
+    """
+    Saves "preload.php" in the deployment root, a script for the
+    `opcache.preload` setting that compiles the backend classes the
+    application uses, so that PHP workers start with them already compiled
+    and linked.
+
+    The classes are those that "autoload.php", "api.php" and the master
+    pages refer to, and the classes these refer to in turn. If the source
+    root contains ".preloadlist", the class names or wildcard patterns it
+    lists (e.g. "Harmonia\\*"), one per line, are preloaded instead, along
+    with their parent classes.
+    """
+    _LIST_FILENAME = '.preloadlist'
+    _FILENAME = 'preload.php'
+    _SUBDIRECTORY_NAME = 'backend'
+    _ENTRY_FILENAMES = ['autoload.php', 'api.php']
+    _MASTERPAGES_DIRECTORY_NAME = 'masterpages'
+    _fileCount: int
+
+    def __init__(self):
+        self._fileCount = 0
+
+    def run(self, context: Context) -> None:
+        classMap = context.classMap
+        if classMap is None:
+            classMap = PhpClassMap.scanDirectory(
+                context.targetDirectoryPath / self._SUBDIRECTORY_NAME)
+        preloader = PhpPreloader(classMap)
+        patterns = self._loadList(context.sourceDirectoryPath / self._LIST_FILENAME)
+        if patterns is not None:
+            preloader.addClasses(patterns)
+        else:
+            for filename in self._ENTRY_FILENAMES:
+                filePath = context.targetDirectoryPath / filename
+                if filePath.is_file():
+                    preloader.addEntryFile(filePath)
+            for filePath in sorted((context.targetDirectoryPath /
+                self._MASTERPAGES_DIRECTORY_NAME).rglob('*.php')):
+                preloader.addEntryFile(filePath)
+        filePaths = preloader.filePaths(followReferences=patterns is None)
+        preloader.save(context.targetDirectoryPath / self._FILENAME, filePaths)
+        self._fileCount = len(filePaths)
+
+    def status(self) -> str:
+        return 'Generating preload script...'
+
+    def dependencies(self) -> list[type[Stage]]:
+        return [ClassMapStage, DeployDirectoryStage, DeployRootStage]
+
+    def summary(self) -> str | None:
+        return f'{self._fileCount} files preloaded'
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        if not self.affectsAny(
+            context,
+            changedPaths,
+            [self._SUBDIRECTORY_NAME, self._MASTERPAGES_DIRECTORY_NAME],
+            rootFilePatterns=['*']
+        ):
+            return False
+        self.run(context)
+        return True
+
+    #region private ------------------------------------------------------------
+
+    def _loadList(self, filePath: Path) -> list[str] | None:
+        if not filePath.is_file():
+            return None
+        result = []
+        with open(filePath, 'r', encoding='utf-8') as file:
+            for line in file:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    result.append(line)
+        return result
+
+    #endregion private
@@ -0,0 +1,188 @@
+##
+# Profiler.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .Utility import Utility
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+import cProfile
+import json
+import pstats
+import threading
+import time
+
+@dataclass
+class _StageRecord:
+    name: str
+    owner: 'Profiler'
+    wallSeconds: float = 0.0
+    cpuSeconds: float = 0.0
+    counters: dict[str, int] = field(default_factory=dict)
+    esbuildSeconds: list[float] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+class Profiler:
+    """
+    Collects per-stage measurements: wall time, CPU time of the Python threads
+    working on the stage, counters such as files copied and bytes written, and
+    the duration of every esbuild invocation.
+
+    Code deep in the call chain (Copier, Minifier, Esbuild) reports through the
+    class methods `count` and `recordEsbuild`, which attribute the numbers to
+    the stage running in the current context and do nothing when no stage is
+    being measured. WorkerPool carries the context over to its threads.
+    """
+    FILES_VISITED = 'filesVisited'
+    FILES_COPIED = 'filesCopied'
+    FILES_LINKED = 'filesLinked'
+    FILES_SKIPPED = 'filesSkipped'
+    BYTES_WRITTEN = 'bytesWritten'
+    CACHE_HITS = 'cacheHits'
+    CACHE_MISSES = 'cacheMisses'
+    ESBUILD_SPAWNS = 'esbuildSpawns'
+    _current: ContextVar[_StageRecord | None] = ContextVar(
+        'Profiler._current', default=None)
+    _records: list[_StageRecord]
+    _profiles: list[cProfile.Profile] | None
+    _lock: threading.Lock
+    _startTime: float
+
+    def __init__(self, *, withCProfile: bool = False):
+        self._records = []
+        self._profiles = [] if withCProfile else None
+        self._lock = threading.Lock()
+        self._startTime = time.perf_counter()
+
+    @contextmanager
+    def measureStage(self, name: str) -> Iterator[None]:
+        record = _StageRecord(name, self)
+        with self._lock:
+            self._records.append(record)
+        token = self._current.set(record)
+        startTime = time.perf_counter()
+        try:
+            yield
+        finally:
+            record.wallSeconds = time.perf_counter() - startTime
+            self._current.reset(token)
+
+    @classmethod
+    def call(cls, function: Callable, *args, **kwargs) -> object:
+        """
+        Calls the function, adding the CPU time it takes on this thread to the
+        current stage (and profiling it with cProfile if enabled).
+        """
+        record = cls._current.get()
+        if record is None:
+            return function(*args, **kwargs)
+        return record.owner._callMeasured(record, function, args, kwargs)
+
+    @classmethod
+    def count(cls, name: str, amount: int = 1) -> None:
+        record = cls._current.get()
+        if record is None:
+            return
+        with record.lock:
+            record.counters[name] = record.counters.get(name, 0) + amount
+
+    @classmethod
+    def recordEsbuild(cls, seconds: float) -> None:
+        record = cls._current.get()
+        if record is None:
+            return
+        with record.lock:
+            record.esbuildSeconds.append(seconds)
+
+    def report(self) -> dict[str, object]:
+        return {
+            'totalWallSeconds': time.perf_counter() - self._startTime,
+            'stages': [
+                {
+                    'name': record.name,
+                    'wallSeconds': record.wallSeconds,
+                    'cpuSeconds': record.cpuSeconds,
+                    **record.counters,
+                    'esbuildCalls': len(record.esbuildSeconds),
+                    'esbuildSeconds': record.esbuildSeconds
+                }
+                for record in self._records
+            ]
+        }
+
+    def saveReport(self, path: Path) -> None:
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.report(), file, indent=2)
+
+    def saveCProfile(self, path: Path) -> None:
+        if not self._profiles:
+            return
+        stats = pstats.Stats(self._profiles[0])
+        for profile in self._profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+
+    def summary(self) -> str:
+        header = ('Stage', 'Wall s', 'CPU s', 'Visited', 'Copied', 'Linked',
+            'Skipped', 'Written', 'esbuild', 'esbuild s')
+        rows = [header]
+        for record in self._records:
+            counters = record.counters
+            rows.append((
+                record.name,
+                f'{record.wallSeconds:.3f}',
+                f'{record.cpuSeconds:.3f}',
+                str(counters.get(self.FILES_VISITED, 0)),
+                str(counters.get(self.FILES_COPIED, 0)),
+                str(counters.get(self.FILES_LINKED, 0)),
+                str(counters.get(self.FILES_SKIPPED, 0)),
+                Utility.formatBytes(counters.get(self.BYTES_WRITTEN, 0)),
+                str(len(record.esbuildSeconds)),
+                f'{sum(record.esbuildSeconds):.3f}'
+            ))
+        widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+        lines = []
+        for index, row in enumerate(rows):
+            cells = [row[0].ljust(widths[0])]
+            cells += [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+            lines.append('  '.join(cells))
+            if index == 0:
+                lines.append('  '.join('-' * width for width in widths))
+        lines.append(
+            f'Total wall time: {time.perf_counter() - self._startTime:.3f} s')
+        return '\n'.join(lines)
+
+    #region private ------------------------------------------------------------
+
+    def _callMeasured(
+        self,
+        record: _StageRecord,
+        function: Callable,
+        args: tuple,
+        kwargs: dict
+    ) -> object:
+        startTime = time.thread_time()
+        try:
+            if self._profiles is None:
+                return function(*args, **kwargs)
+            # A cProfile.Profile only sees the thread that enabled it, so each
+            # call gets its own; they are merged when saved.
+            profile = cProfile.Profile()
+            with self._lock:
+                self._profiles.append(profile)
+            return profile.runcall(function, *args, **kwargs)
+        finally:
+            elapsed = time.thread_time() - startTime
+            with record.lock:
+                record.cpuSeconds += elapsed
+
+    #endregion private
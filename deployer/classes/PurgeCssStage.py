@@ -0,0 +1,69 @@
+##
+# PurgeCssStage.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .Context import Context
+from .CssPurger import CssPurger
+from .Stage import Stage
+from pathlib import Path
+
+class PurgeCssStage(Stage):
+    """
+    Collects the tokens (possible class names, IDs and element names) that
+    occur in the application's markup and scripts, and sets up
+    `context.cssPurger`, with which `DeployFrontendStage` and
+    `DeployPagesStage` strip unused rules from the stylesheets they deploy,
+    before fingerprinting them.
+
+    Besides pages, master pages and templates, the frontend libraries'
+    scripts and the backend's PHP files are scanned too, since they build
+    markup (e.g. Bootstrap's "show" or a component's "form-floating").
+    Class names that are built in ways the scan cannot see are listed in
+    ".purgesafelist" in the source root.
+    """
+    _tokens: set[str]
+    _safelist: list[str]
+    _fileCount: int
+
+    def __init__(self):
+        self._tokens = set()
+        self._safelist = []
+        self._fileCount = 0
+
+    def run(self, context: Context) -> None:
+        filePaths = []
+        for directoryName, suffixes in CssPurger.SOURCE_SUFFIXES.items():
+            filePaths += context.ignoreRules.filePaths(
+                context.sourceDirectoryPath / directoryName, suffixes)
+        tokens = CssPurger.collectTokens(filePaths)
+        safelist = CssPurger.loadSafelist(
+            context.sourceDirectoryPath / CssPurger.SAFELIST_FILENAME)
+        self._fileCount = len(filePaths)
+        if context.cssPurger is None or tokens != self._tokens \
+            or safelist != self._safelist:
+            context.cssPurger = CssPurger(tokens, safelist)
+        self._tokens = tokens
+        self._safelist = safelist
+
+    def status(self) -> str:
+        return 'Collecting names used in markup and scripts...'
+
+    def summary(self) -> str | None:
+        return f'{len(self._tokens)} tokens collected from {self._fileCount} files'
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        # If the tokens change, `context.cssPurger` is replaced, which makes
+        # the deploy stages purge all stylesheets again.
+        if not self.affectsAny(context, changedPaths,
+            list(CssPurger.SOURCE_SUFFIXES),
+            rootFilePatterns=[CssPurger.SAFELIST_FILENAME]):
+            return False
+        self.run(context)
+        return True
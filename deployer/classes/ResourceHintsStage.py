@@ -0,0 +1,237 @@
+##
+# ResourceHintsStage.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .Context import Context
+from .DeployFrontendStage import DeployFrontendStage
+from .DeployPagesStage import DeployPagesStage
+from .LibraryUsage import LibraryUsage
+from .ManifestService import ManifestService, ManifestBlock
+from .Stage import Stage
+from .Utility import Utility
+from pathlib import Path
+import posixpath
+import re
+
+class ResourceHintsStage(Stage):
+    """
+    Saves "preloads.php" in each deployed page directory, which returns the
+    resources the page is known to need, so that the master page can announce
+    them up front as `<link rel="preload">` tags or a `Link` header instead of
+    the browser discovering them one hop at a time:
+
+        <?php return [
+          ['href'=>'frontend/app/app.min.css','as'=>'style'],
+          ['href'=>'frontend/bootstrap-icons-1.13.1/fonts/bootstrap-icons.woff2?e348',
+           'as'=>'font','type'=>'font/woff2','crossorigin'=>true],
+          ['href'=>'pages/home/page.min.js','as'=>'script']
+        ];
+
+    The resources are the stylesheets and scripts of the libraries the page
+    includes (the default libraries, plus those it adds, minus those it
+    removes) and of the page itself, along with the stylesheets these import
+    and the fonts their `@font-face` rules prefer. Paths are relative to the
+    deployment root, and font URLs keep their query string, since a preload
+    is only used if it matches the URL the stylesheet requests. URLs are kept
+    as they are.
+    """
+    _FRONTEND_DIRECTORY_NAME = 'frontend'
+    _PAGES_DIRECTORY_NAME = 'pages'
+    _MASTERPAGES_DIRECTORY_NAME = 'masterpages'
+    _MANIFEST_FILENAME = 'manifest.json'
+    _FILENAME = 'preloads.php'
+    _ASSET_TYPES = {'css': 'style', 'js': 'script'}
+    _FONT_TYPES = {
+        '.woff2': 'font/woff2',
+        '.woff': 'font/woff',
+        '.ttf': 'font/ttf',
+        '.otf': 'font/otf'
+    }
+    _FONT_FACE_PATTERN = re.compile(r'@font-face\s*\{[^}]*\}', re.IGNORECASE)
+    _URL_PATTERN = re.compile(r'url\(\s*(["\']?)([^"\')]+)\1\s*\)', re.IGNORECASE)
+    _IMPORT_PATTERN = re.compile(
+        r'@import\s+(?:url\(\s*)?(["\']?)([^"\')\s;]+)\1', re.IGNORECASE)
+    # URLs that do not refer to a file relative to the stylesheet.
+    _NON_RELATIVE_URL_PATTERN = re.compile(r'^(?:[a-z][a-z0-9+.-]*:|/|#)', re.IGNORECASE)
+    _pageCount: int
+    _hintCount: int
+
+    def __init__(self):
+        self._pageCount = 0
+        self._hintCount = 0
+
+    def run(self, context: Context) -> None:
+        self._pageCount = 0
+        self._hintCount = 0
+        pagesDirectoryPath = context.targetDirectoryPath / self._PAGES_DIRECTORY_NAME
+        if not pagesDirectoryPath.is_dir():
+            return
+        frontendManifestPath = (context.targetDirectoryPath /
+            self._FRONTEND_DIRECTORY_NAME / self._MANIFEST_FILENAME)
+        libraries: dict[str, ManifestBlock] = {}
+        if frontendManifestPath.is_file():
+            libraries = ManifestService.loadFrontendManifest(frontendManifestPath)
+        libraryUsage = LibraryUsage(
+            libraries,
+            context.targetDirectoryPath / self._MASTERPAGES_DIRECTORY_NAME
+        )
+        for pageDirectoryPath in sorted(pagesDirectoryPath.iterdir()):
+            if not pageDirectoryPath.is_dir():
+                continue
+            assets: list[tuple[str, str]] = []
+            for name in libraryUsage.includedLibraries(
+                sorted(pageDirectoryPath.glob('*.php'))):
+                self._appendAssets(assets, libraries[name],
+                    self._FRONTEND_DIRECTORY_NAME)
+            manifestPath = pageDirectoryPath / self._MANIFEST_FILENAME
+            if manifestPath.is_file():
+                self._appendAssets(assets,
+                    ManifestService.loadPageManifest(manifestPath),
+                    f'{self._PAGES_DIRECTORY_NAME}/{pageDirectoryPath.name}')
+            hints = self._hints(context.targetDirectoryPath, assets)
+            ManifestService.savePhpArray(
+                hints, pageDirectoryPath / self._FILENAME)
+            self._pageCount += 1
+            self._hintCount += len(hints)
+
+    def status(self) -> str:
+        return 'Generating resource hints...'
+
+    def dependencies(self) -> list[type[Stage]]:
+        return [DeployFrontendStage, DeployPagesStage]
+
+    def summary(self) -> str | None:
+        return f'{self._hintCount} resources hinted for {self._pageCount} pages'
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        if not self.affectsAny(context, changedPaths, [
+            self._FRONTEND_DIRECTORY_NAME,
+            self._PAGES_DIRECTORY_NAME
+        ]):
+            return False
+        self.run(context)
+        return True
+
+    #region private ------------------------------------------------------------
+
+    def _appendAssets(
+        self,
+        assets: list[tuple[str, str]],
+        manifestBlock: ManifestBlock,
+        directoryPath: str
+    ) -> None:
+        """
+        Appends the assets of a manifest block as (type, path) pairs, with
+        suffixless paths resolved to the minified files they are deployed as.
+        """
+        for assetType in self._ASSET_TYPES:
+            assetPaths = getattr(manifestBlock, assetType)
+            if assetPaths is None:
+                continue
+            for assetPath in Utility.ensureList(assetPaths):
+                if not Utility.isUrl(assetPath):
+                    if Path(assetPath).suffix != f'.{assetType}':
+                        assetPath = Utility.normalizeSlashes(Utility.addSuffix(
+                            Path(assetPath), assetType, isMinified=True))
+                    assetPath = f'{directoryPath}/{assetPath}'
+                assets.append((assetType, assetPath))
+
+    def _hints(
+        self,
+        targetDirectoryPath: Path,
+        assets: list[tuple[str, str]]
+    ) -> list[dict[str, object]]:
+        # Stylesheets come first, as they block rendering, then the fonts
+        # they refer to, then scripts.
+        styles: list[str] = []
+        fonts: list[str] = []
+        scripts: list[str] = []
+        for assetType, assetPath in assets:
+            if assetType == 'js':
+                if assetPath not in scripts:
+                    scripts.append(assetPath)
+            else:
+                self._collectStylesheet(
+                    targetDirectoryPath, assetPath, styles, fonts)
+        result: list[dict[str, object]] = []
+        for href in styles:
+            result.append({'href': href, 'as': self._ASSET_TYPES['css']})
+        for href in fonts:
+            result.append({
+                'href': href,
+                'as': 'font',
+                'type': self._FONT_TYPES[posixpath.splitext(
+                    href.split('?', 1)[0])[1].lower()],
+                # Fonts are always fetched in CORS mode, and a preload that
+                # is not would be fetched twice.
+                'crossorigin': True
+            })
+        for href in scripts:
+            result.append({'href': href, 'as': self._ASSET_TYPES['js']})
+        return result
+
+    def _collectStylesheet(
+        self,
+        targetDirectoryPath: Path,
+        href: str,
+        styles: list[str],
+        fonts: list[str]
+    ) -> None:
+        if href in styles:
+            return
+        styles.append(href)
+        if Utility.isUrl(href):
+            return
+        filePath = targetDirectoryPath / href
+        if not filePath.is_file():
+            return
+        css = filePath.read_text(encoding='utf-8', errors='replace')
+        baseDirectory = posixpath.dirname(href)
+        for match in self._IMPORT_PATTERN.finditer(css):
+            importHref = self._resolveUrl(
+                targetDirectoryPath, baseDirectory, match.group(2))
+            if importHref is not None:
+                self._collectStylesheet(
+                    targetDirectoryPath, importHref, styles, fonts)
+        for fontFace in self._FONT_FACE_PATTERN.findall(css):
+            # The first source is the one browsers that support it pick,
+            # e.g. WOFF2 before WOFF.
+            match = self._URL_PATTERN.search(fontFace)
+            if match is None:
+                continue
+            fontHref = self._resolveUrl(
+                targetDirectoryPath, baseDirectory, match.group(2))
+            if fontHref is None or fontHref in fonts:
+                continue
+            extension = posixpath.splitext(fontHref.split('?', 1)[0])[1]
+            if extension.lower() in self._FONT_TYPES:
+                fonts.append(fontHref)
+
+    def _resolveUrl(
+        self,
+        targetDirectoryPath: Path,
+        baseDirectory: str,
+        url: str
+    ) -> str | None:
+        """
+        Resolves a URL relative to a stylesheet to a path relative to the
+        deployment root, keeping its query string. Returns `None` if the URL
+        is not relative or the file is not deployed.
+        """
+        url = url.strip().split('#', 1)[0]
+        if not url or self._NON_RELATIVE_URL_PATTERN.match(url):
+            return None
+        path, separator, query = url.partition('?')
+        path = posixpath.normpath(posixpath.join(baseDirectory, path))
+        if path.startswith('../') or not (targetDirectoryPath / path).is_file():
+            return None
+        return f'{path}{separator}{query}'
+
+    #endregion private
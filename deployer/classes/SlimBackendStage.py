@@ -0,0 +1,164 @@
+##
+# SlimBackendStage.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .Context import Context
+from .DeployDirectoryStage import DeployDirectoryStage
+from .PathMatcher import PathMatcher
+from .PhpClassMap import PhpClassMap
+from .PhpPreloader import PhpPreloader
+from .Utility import Utility
+from pathlib import Path
+import json
+
+class SlimBackendStage(DeployDirectoryStage):
+    """
+    Deploys the "backend" directory with only the files each library needs
+    at runtime, leaving out tests, documentation and development tooling.
+
+    By default, a library keeps the PHP files of the classes reachable from
+    the application: those that the root scripts, master pages, pages and
+    templates refer to, and the classes these refer to in turn. Libraries
+    that load files by path (e.g. language files) or build class names at
+    runtime need a profile in ".backendprofiles.json" in the source root,
+    which maps a library to the patterns of the files to keep, in
+    ".deployignore" syntax, relative to the library, or to null to keep it
+    whole. A library without a profile none of whose files are reachable is
+    deployed whole, with a warning:
+
+        {
+          "PHPMailer": ["/src/", "/language/phpmailer.lang-de.php"],
+          "Harmonia": null
+        }
+    """
+    _PROFILES_FILENAME = '.backendprofiles.json'
+    _SUBDIRECTORY_NAME = 'backend'
+    _ENTRY_DIRECTORY_NAMES = ['masterpages', 'pages', 'templates']
+    _PHP_SUFFIXES = {'.php'}
+    # Files and bytes left out, by library name.
+    _omitted: dict[str, tuple[int, int]]
+
+    def __init__(self):
+        super().__init__(self._SUBDIRECTORY_NAME)
+        self._omitted = {}
+
+    def run(self, context: Context) -> None:
+        self._statistics = context.copier.copyFilesRecursive(
+            context.sourceDirectoryPath / self._SUBDIRECTORY_NAME,
+            context.targetDirectoryPath / self._SUBDIRECTORY_NAME,
+            excludePatterns=self._omittedPatterns(context)
+        )
+
+    def status(self) -> str:
+        return f"Deploying '{self._SUBDIRECTORY_NAME}' directory (slim)..."
+
+    def summary(self) -> str | None:
+        lines = [str(self._statistics)] if self._statistics else []
+        for name, (fileCount, byteCount) in self._omitted.items():
+            lines.append(f'{name}: {fileCount} files, '
+                f'{Utility.formatBytes(byteCount)} omitted')
+        return '\n  '.join(lines) if lines else None
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        # Any change to the backend or to the code that refers to it may
+        # change which files are reachable, so the directory is redeployed.
+        if not self.affectsAny(
+            context,
+            changedPaths,
+            [self._SUBDIRECTORY_NAME, *self._ENTRY_DIRECTORY_NAMES],
+            rootFilePatterns=['*']
+        ):
+            return False
+        context.copier.removePath(
+            context.targetDirectoryPath / self._SUBDIRECTORY_NAME)
+        self.run(context)
+        return True
+
+    #region private ------------------------------------------------------------
+
+    def _omittedPatterns(self, context: Context) -> set[str]:
+        """
+        Returns patterns, relative to the backend directory, of the library
+        files to leave out, and tallies them by library.
+        """
+        subdirectoryPath = context.sourceDirectoryPath / self._SUBDIRECTORY_NAME
+        profiles = self._loadProfiles(
+            context.sourceDirectoryPath / self._PROFILES_FILENAME)
+        reachablePaths = None
+        result = set()
+        self._omitted = {}
+        if not subdirectoryPath.is_dir():
+            return result
+        for libraryPath in sorted(subdirectoryPath.iterdir()):
+            if not libraryPath.is_dir() or context.ignoreRules.isIgnored(
+                libraryPath, isDirectory=True):
+                continue
+            if libraryPath.name in profiles:
+                patterns = profiles[libraryPath.name]
+                if patterns is None:
+                    continue  # Kept whole
+                matcher = PathMatcher(patterns)
+                isKept = lambda filePath: matcher.isMatched(
+                    filePath.relative_to(libraryPath).as_posix())
+            else:
+                if reachablePaths is None:
+                    reachablePaths = self._reachablePaths(context)
+                isKept = lambda filePath: filePath in reachablePaths
+            filePaths = context.ignoreRules.filePaths(libraryPath)
+            omittedPaths = [filePath for filePath in filePaths
+                if not isKept(filePath)]
+            if filePaths and len(omittedPaths) == len(filePaths):
+                # The library may well be loaded in ways the analysis cannot
+                # see; leaving it out would break the application.
+                print(f"Warning: No files of backend library '{libraryPath.name}' "
+                    'are reachable or listed in its profile; it is deployed '
+                    f'whole. Add a profile to {self._PROFILES_FILENAME} to '
+                    'slim it down.')
+                continue
+            for filePath in omittedPaths:
+                result.add(f'/{filePath.relative_to(subdirectoryPath).as_posix()}')
+            if omittedPaths:
+                self._omitted[libraryPath.name] = (len(omittedPaths),
+                    sum(filePath.stat().st_size for filePath in omittedPaths))
+        return result
+
+    def _reachablePaths(self, context: Context) -> set[Path]:
+        classMap = PhpClassMap()
+        for filePath in context.ignoreRules.filePaths(
+            context.sourceDirectoryPath / self._SUBDIRECTORY_NAME,
+            self._PHP_SUFFIXES):
+            classMap.addFile(filePath)
+        preloader = PhpPreloader(classMap)
+        for filePath in sorted(context.sourceDirectoryPath.iterdir()):
+            if filePath.suffix.lower() in self._PHP_SUFFIXES \
+                and filePath.is_file() \
+                and not context.ignoreRules.isIgnored(filePath, isDirectory=False):
+                preloader.addEntryFile(filePath)
+        for directoryName in self._ENTRY_DIRECTORY_NAMES:
+            for filePath in context.ignoreRules.filePaths(
+                context.sourceDirectoryPath / directoryName, self._PHP_SUFFIXES):
+                preloader.addEntryFile(filePath)
+        return set(preloader.filePaths(followReferences=True))
+
+    def _loadProfiles(self, filePath: Path) -> dict[str, list[str] | None]:
+        if not filePath.is_file():
+            return {}
+        with open(filePath, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        if not isinstance(data, dict):
+            raise ValueError(f'{self._PROFILES_FILENAME} must contain a JSON object.')
+        for name, patterns in data.items():
+            if patterns is not None and (not isinstance(patterns, list)
+                or not all(isinstance(pattern, str) for pattern in patterns)):
+                raise ValueError(f'Profile of backend library "{name}" must be '
+                    'an array of patterns or null.')
+        return data
+
+    #endregion private
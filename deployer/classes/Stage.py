@@ -11,6 +11,8 @@
 
 from .Context import Context
 from abc import ABC, abstractmethod
+from pathlib import Path
+import fnmatch
 
 class Stage(ABC):
     @abstractmethod
@@ -20,3 +22,55 @@ class Stage(ABC):
     @abstractmethod
     def status(self) -> str:
         pass
+
+    def dependencies(self) -> list[type['Stage']]:
+        """
+        Returns the stage types that must complete before this stage can run.
+        Every earlier stage in the pipeline that is an instance of one of
+        these types becomes a prerequisite. Stages without dependencies may
+        run concurrently with any other stage.
+        """
+        return []
+
+    def summary(self) -> str | None:
+        """
+        Returns an optional line describing the work done by the last run,
+        printed after the stage's status.
+        """
+        return None
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        """
+        Brings the deployed files up to date after the given source paths have
+        changed (been created, modified, or deleted), and returns whether
+        anything was redeployed. A directory among the paths means anything
+        below it may have changed. By default, changes are ignored.
+        """
+        return False
+
+    def affectsAny(
+        self,
+        context: Context,
+        changedPaths: set[Path],
+        subdirectoryNames: list[str],
+        *,
+        rootFilePatterns: list[str] | None = None
+    ) -> bool:
+        """
+        Returns whether any of the changed source paths is in, or contains,
+        one of the given subdirectories of the source root, or is directly
+        in the source root with a name matching one of the given wildcard
+        patterns (e.g. "*" for any root file, ".htaccess" for just that).
+        """
+        subdirectoryPaths = [context.sourceDirectoryPath / name
+            for name in subdirectoryNames]
+        for changedPath in changedPaths:
+            if rootFilePatterns and changedPath.parent == context.sourceDirectoryPath \
+                and any(fnmatch.fnmatchcase(changedPath.name, pattern)
+                    for pattern in rootFilePatterns):
+                return True
+            if any(subdirectoryPath.is_relative_to(changedPath)
+                or changedPath.is_relative_to(subdirectoryPath)
+                for subdirectoryPath in subdirectoryPaths):
+                return True
+        return False
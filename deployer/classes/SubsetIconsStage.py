@@ -0,0 +1,82 @@
+##
+# SubsetIconsStage.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .BuildCache import BuildCache
+from .Context import Context
+from .CssPurger import CssPurger
+from .IconSubsetter import IconSubsetter
+from .Stage import Stage
+from pathlib import Path
+
+class SubsetIconsStage(Stage):
+    """
+    Collects the Bootstrap Icons class names ("bi-*") that occur in the
+    application's markup and scripts, and sets up `context.iconSubsetter`,
+    with which `DeployFrontendStage` trims the icon stylesheet and subsets
+    its fonts before fingerprinting them.
+
+    Icon names that are built dynamically (e.g. `bi-${icon}`) cannot be
+    collected; unless ".purgesafelist" lists some "bi-*" names or patterns
+    for them, every icon is then kept.
+    """
+    _SAFELIST_PREFIX = 'bi-'
+    _cache: BuildCache | None
+    _names: set[str] | None
+    _safelist: list[str]
+
+    def __init__(self, cache: BuildCache | None = None):
+        self._cache = cache
+        self._names = set()
+        self._safelist = []
+
+    def run(self, context: Context) -> None:
+        filePaths = []
+        for directoryName, suffixes in CssPurger.SOURCE_SUFFIXES.items():
+            filePaths += context.ignoreRules.filePaths(
+                context.sourceDirectoryPath / directoryName, suffixes)
+        names, dynamicFilePaths = IconSubsetter.collectNames(filePaths)
+        safelist = [pattern for pattern in CssPurger.loadSafelist(
+                context.sourceDirectoryPath / CssPurger.SAFELIST_FILENAME)
+            if pattern.startswith(self._SAFELIST_PREFIX)]
+        if dynamicFilePaths and not safelist:
+            for filePath in dynamicFilePaths:
+                print('Warning: Icon names are built dynamically in '
+                    f'"{filePath.relative_to(context.sourceDirectoryPath)}"; '
+                    'all icons are kept. List the icons in '
+                    f'"{CssPurger.SAFELIST_FILENAME}" to subset them.')
+            names = None
+        if context.iconSubsetter is None \
+            and not IconSubsetter.isFontSubsettingAvailable():
+            print('Warning: The "fontTools" module is not installed; icon '
+                'fonts are deployed in full.')
+        if context.iconSubsetter is None or names != self._names \
+            or safelist != self._safelist:
+            context.iconSubsetter = IconSubsetter(names, safelist, self._cache)
+        self._names = names
+        self._safelist = safelist
+
+    def status(self) -> str:
+        return 'Collecting icons used in markup and scripts...'
+
+    def summary(self) -> str | None:
+        if self._names is None:
+            return 'all icons kept'
+        return f'{len(self._names)} icons in use'
+
+    def update(self, context: Context, changedPaths: set[Path]) -> bool:
+        # If the icons change, `context.iconSubsetter` is replaced, which
+        # makes `DeployFrontendStage` subset the fonts again.
+        if not self.affectsAny(context, changedPaths,
+            list(CssPurger.SOURCE_SUFFIXES),
+            rootFilePatterns=[CssPurger.SAFELIST_FILENAME]):
+            return False
+        self.run(context)
+        return True
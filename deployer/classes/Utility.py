@@ -10,8 +10,15 @@
 ##
 
 from pathlib import Path
+import hashlib
+import os
+import re
+import uuid
 
 class Utility:
+    _CSS_SOURCE_MAP_PATTERN = re.compile(
+        r'/\*[#@][ \t]*sourceMappingURL=.*?\*/', re.DOTALL)
+
     @staticmethod
     def isUrl(value: str) -> bool:
         return value.lower().startswith(('http://', 'https://'))
@@ -40,3 +47,49 @@ class Utility:
         # using `with_suffix(".min.js")` would incorrectly produce "bootstrap.min.js",
         # interpreting "bundle" as a suffix.
         return path.with_name(path.name + suffix)
+
+    @staticmethod
+    def formatBytes(value: int) -> str:
+        for unit in ['B', 'KB', 'MB', 'GB']:
+            if value < 1024 or unit == 'GB':
+                return f'{value} B' if unit == 'B' else f'{value:.1f} {unit}'
+            value /= 1024
+
+    @staticmethod
+    def replaceFile(path: Path, content: bytes) -> None:
+        """
+        Writes the content to a temporary file and renames it over `path`.
+        Deployed files may be hardlinks shared with a previous deployment, so
+        they must never be modified in place; this also ensures that a failed
+        write never leaves a truncated file behind.
+        """
+        tempFilePath = path.with_name(f'.{path.name}.{uuid.uuid4().hex}.tmp')
+        try:
+            tempFilePath.write_bytes(content)
+            os.replace(tempFilePath, path)
+        finally:
+            tempFilePath.unlink(missing_ok=True)
+
+    @staticmethod
+    def fingerprintedPath(path: Path) -> Path:
+        """
+        Returns the path with a hash of the file's content inserted before its
+        suffix, e.g. "page.min.js" becomes "page.1a2b3c4d.min.js" and
+        "app.css" becomes "app.1a2b3c4d.css".
+        """
+        with open(path, 'rb') as file:
+            digest = hashlib.file_digest(file, 'sha256').hexdigest()[:8]
+        suffix = path.suffix
+        stem = path.name[:-len(suffix)] if suffix else path.name
+        if stem.endswith('.min'):
+            stem = stem[:-len('.min')]
+            suffix = f'.min{suffix}'
+        return path.with_name(f'{stem}.{digest}{suffix}')
+
+    @classmethod
+    def removeSourceMapComment(cls, css: str) -> str:
+        """
+        Removes the "sourceMappingURL" comment from a stylesheet, for when its
+        content no longer matches the source map.
+        """
+        return cls._CSS_SOURCE_MAP_PATTERN.sub('', css)
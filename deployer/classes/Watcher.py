@@ -0,0 +1,176 @@
+##
+# Watcher.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from collections.abc import Iterator
+from pathlib import Path
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+class _InotifyBackend:
+    _IN_MODIFY = 0x00000002
+    _IN_ATTRIB = 0x00000004
+    _IN_CLOSE_WRITE = 0x00000008
+    _IN_MOVED_FROM = 0x00000040
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+    _IN_DELETE = 0x00000200
+    _IN_DELETE_SELF = 0x00000400
+    _IN_Q_OVERFLOW = 0x00004000
+    _IN_IGNORED = 0x00008000
+    _IN_ISDIR = 0x40000000
+    _IN_CLOEXEC = 0o2000000
+    _MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM
+        | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF)
+    _EVENT_HEADER = struct.Struct('iIII')
+    _rootPath: Path
+    _libc: ctypes.CDLL
+    _fd: int
+    _watches: dict[int, Path]
+
+    def __init__(self, rootPath: Path):
+        self._rootPath = rootPath
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(self._IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._watches = {}
+        self._addWatchRecursive(rootPath)
+
+    def poll(self, timeout: float) -> set[Path]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = os.read(self._fd, 64 * 1024)
+        changedPaths = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self._EVENT_HEADER.unpack_from(data, offset)
+            offset += self._EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & self._IN_Q_OVERFLOW:
+                # Events were lost; treat everything as changed.
+                changedPaths.add(self._rootPath)
+                continue
+            if mask & self._IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directoryPath = self._watches.get(wd)
+            if directoryPath is None:
+                continue
+            path = directoryPath / os.fsdecode(name) if name else directoryPath
+            if mask & self._IN_ISDIR and mask & (self._IN_CREATE | self._IN_MOVED_TO):
+                self._addWatchRecursive(path)
+            changedPaths.add(path)
+        return changedPaths
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+    def _addWatchRecursive(self, directoryPath: Path) -> None:
+        pendingDirectoryPaths = [directoryPath]
+        while pendingDirectoryPaths:
+            path = pendingDirectoryPaths.pop()
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(path), self._MASK)
+            if wd < 0:
+                print(f'Warning: Cannot watch directory: {path}')
+                continue
+            self._watches[wd] = path
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pendingDirectoryPaths.append(Path(entry.path))
+            except OSError:
+                pass  # Removed in the meantime
+
+class _PollingBackend:
+    _INTERVAL = 1.0  # seconds
+    _rootPath: Path
+    _snapshot: dict[str, tuple[int, int, bool]]
+
+    def __init__(self, rootPath: Path):
+        self._rootPath = rootPath
+        self._snapshot = self._scan()
+
+    def poll(self, timeout: float) -> set[Path]:
+        time.sleep(min(timeout, self._INTERVAL))
+        snapshot = self._scan()
+        changedPaths = {
+            Path(path) for path in snapshot.keys() | self._snapshot.keys()
+            if snapshot.get(path) != self._snapshot.get(path)
+                and not (snapshot.get(path, (0, 0, False))[2]
+                    and self._snapshot.get(path, (0, 0, False))[2])
+        }
+        self._snapshot = snapshot
+        return changedPaths
+
+    def close(self) -> None:
+        pass
+
+    def _scan(self) -> dict[str, tuple[int, int, bool]]:
+        snapshot = {}
+        pendingDirectoryPaths = [str(self._rootPath)]
+        while pendingDirectoryPaths:
+            try:
+                with os.scandir(pendingDirectoryPaths.pop()) as entries:
+                    for entry in entries:
+                        try:
+                            isDirectory = entry.is_dir(follow_symlinks=False)
+                            stat = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        snapshot[entry.path] = (
+                            stat.st_mtime_ns, stat.st_size, isDirectory)
+                        if isDirectory:
+                            pendingDirectoryPaths.append(entry.path)
+            except OSError:
+                pass  # Removed in the meantime
+        return snapshot
+
+class Watcher:
+    """
+    Reports changes below a directory, using inotify on Linux and periodic
+    scanning elsewhere. Changes are debounced: a burst of events is reported
+    as one set once no further event has arrived for the debounce interval.
+    Reported paths may be files or directories, and may no longer exist.
+    """
+    _backend: _InotifyBackend | _PollingBackend
+    _debounceInterval: float
+
+    def __init__(self, rootPath: Path, debounceInterval: float = 0.3):
+        self._debounceInterval = debounceInterval
+        self._backend = None
+        if sys.platform.startswith('linux'):
+            try:
+                self._backend = _InotifyBackend(rootPath)
+            except (OSError, AttributeError) as e:
+                print(f'Warning: inotify unavailable, falling back to polling ({e})')
+        if self._backend is None:
+            self._backend = _PollingBackend(rootPath)
+
+    def changes(self) -> Iterator[set[Path]]:
+        while True:
+            changedPaths = self._backend.poll(3600)
+            if not changedPaths:
+                continue
+            while more := self._backend.poll(self._debounceInterval):
+                changedPaths |= more
+            yield changedPaths
+
+    def close(self) -> None:
+        self._backend.close()
@@ -0,0 +1,84 @@
+##
+# WorkerPool.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from .Profiler import Profiler
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_EXCEPTION
+import contextvars
+import os
+
+class WorkerPoolError(Exception):
+    errors: list[Exception]
+
+    def __init__(self, errors: list[Exception]):
+        super().__init__('\n'.join(str(error) for error in errors))
+        self.errors = errors
+
+class WorkerPool:
+    """
+    Runs tasks on a bounded number of threads. Results and errors are reported
+    in submission order regardless of completion order. The first failure
+    cancels every task that has not started yet.
+    """
+    _executor: ThreadPoolExecutor
+    _futures: list[Future]
+
+    def __init__(self, maxWorkers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, maxWorkers))
+        self._futures = []
+
+    @staticmethod
+    def defaultWorkerCount() -> int:
+        return os.cpu_count() or 1
+
+    def __enter__(self) -> 'WorkerPool':
+        return self
+
+    def __exit__(self, excType, excValue, traceback) -> None:
+        if excType is None:
+            self.wait()
+        else:
+            self._cancel()
+        self._executor.shutdown(wait=True)
+
+    def submit(self, function: Callable, *args, **kwargs) -> None:
+        # Run the task in a copy of the caller's context so that it is
+        # attributed to the caller's stage when profiling.
+        context = contextvars.copy_context()
+        self._futures.append(self._executor.submit(
+            context.run, Profiler.call, function, *args, **kwargs))
+
+    def wait(self) -> list[object]:
+        futures, self._futures = self._futures, []
+        # Block until either everything finishes or the first task fails.
+        _, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        if pending:
+            for future in pending:
+                future.cancel()
+            wait(pending)
+        errors = [
+            future.exception() for future in futures
+            if not future.cancelled() and future.exception() is not None
+        ]
+        if len(errors) == 1:
+            raise errors[0]
+        if errors:
+            raise WorkerPoolError(errors)
+        return [future.result() for future in futures]
+
+    #region private ------------------------------------------------------------
+
+    def _cancel(self) -> None:
+        for future in self._futures:
+            future.cancel()
+        self._futures = []
+
+    #endregion private
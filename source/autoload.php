@@ -44,8 +44,19 @@ function joinPath(string ...$segments): string {
     return $joined;
 }
 
-// Register autoloader for loading classes from the backend directory
+// Register autoloader for loading classes from the backend directory. Classes
+// are looked up first in the class map that the deployer generates, which
+// saves a file system lookup per class.
 \spl_autoload_register(function(string $className): void {
+    static $classMap = null;
+    if ($classMap === null) {
+        $classMapPath = joinPath(__DIR__, 'classmap.php');
+        $classMap = \is_file($classMapPath) ? require $classMapPath : [];
+    }
+    if (isset($classMap[$className])) {
+        require $classMap[$className];
+        return;
+    }
     $className = \str_replace('\\', '/', $className);
     $classPath = joinPath(__DIR__, 'backend', "{$className}.php");
     if (!\is_file($classPath)) {
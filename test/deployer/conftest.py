@@ -0,0 +1,16 @@
+##
+# conftest.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from pathlib import Path
+import sys
+
+# Makes the deployer's "classes" package importable, as it is for "app.py".
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'deployer'))
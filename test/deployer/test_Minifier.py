@@ -0,0 +1,25 @@
+##
+# test_Minifier.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from classes.BuildCache import BuildCache
+from classes.Minifier import Minifier
+from classes.MinifierBackend import MinifyJob
+from classes.PythonMinifierBackend import PythonMinifierBackend
+
+def test_cacheKey_differsBetweenFileAndListOfOneFile(tmp_path):
+    filePath = tmp_path / 'a.js'
+    filePath.write_text('var a = 1;')
+    backend = PythonMinifierBackend()
+    minifier = Minifier({'js': backend},
+        BuildCache(tmp_path / 'cache', 1024 * 1024))
+    fileJob = MinifyJob(filePath, tmp_path / 'b.min.js', 'js')
+    listJob = MinifyJob([filePath], tmp_path / 'c.min.js', 'js')
+    assert minifier._cacheKey(fileJob) != minifier._cacheKey(listJob)
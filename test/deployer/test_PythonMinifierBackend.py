@@ -0,0 +1,131 @@
+##
+# test_PythonMinifierBackend.py
+#
+# (C) 2025 by Eylem Ugurel
+#
+# Licensed under a Creative Commons Attribution 4.0 International License.
+#
+# You should have received a copy of the license along with this work. If not,
+# see <http://creativecommons.org/licenses/by/4.0/>.
+##
+
+from classes.PythonMinifierBackend import PythonMinifierBackend
+import pytest
+
+#region minifyJs ---------------------------------------------------------------
+
+@pytest.mark.parametrize('source, expected', [
+    # Division
+    ('a = b / c / d;', 'a=b/c/d;'),
+    ('a = (b) / 2 / (c);', 'a=(b)/2/(c);'),
+    ('a = b[0] / 2;', 'a=b[0]/2;'),
+    ('a = b / /c/.source.length;', 'a=b/ /c/.source.length;'),
+    # Regular expressions
+    ('a = /b + c/g.test(d);', 'a=/b + c/g.test(d);'),
+    ('return /a b/.test(c);', 'return/a b/.test(c);'),
+    ('if (a) /b c/.exec(d);', 'if(a)/b c/.exec(d);'),
+    ('a = [/ b /, / c /];', 'a=[/ b /,/ c /];'),
+    ('a = /[/ ]/;', 'a=/[/ ]/;'),
+    ('a = /\\/ \\//;', 'a=/\\/ \\//;'),
+    ('a = /b/ /* c */ ;', 'a=/b/;'),
+])
+def test_minifyJs_regexVersusDivision(source, expected):
+    assert PythonMinifierBackend.minifyJs(source) == expected + '\n'
+
+@pytest.mark.parametrize('source, expected', [
+    ('a = `b  c`;', 'a=`b  c`;'),
+    ('a = `b ${ c + d } e`;', 'a=`b ${c+d} e`;'),
+    ('a = `b ${ {c: 1}.c } d`;', 'a=`b ${{c:1}.c} d`;'),
+    ('a = `b ${ `c ${ d } e` } f`;', 'a=`b ${`c ${d} e`} f`;'),
+    ('a = `${ b }/ c /${ d }`;', 'a=`${b}/ c /${d}`;'),
+    ('a = `${ b / c }`;', 'a=`${b/c}`;'),
+    ('a = `/* b */ // c`;', 'a=`/* b */ // c`;'),
+    ('a = `b\\` c`;', 'a=`b\\` c`;'),
+    ('a = `b\n  c`;', 'a=`b\n  c`;'),
+])
+def test_minifyJs_templateLiterals(source, expected):
+    assert PythonMinifierBackend.minifyJs(source) == expected + '\n'
+
+@pytest.mark.parametrize('source, expected', [
+    ('a = b\n++c', 'a=b\n++c'),
+    ('return\na', 'return\na'),
+    ('let a = 1\nlet b = 2', 'let a=1\nlet b=2'),
+    ('a = 1 // b\nc = 2', 'a=1\nc=2'),
+    ('a = 1 /* b\n */ c = 2', 'a=1\nc=2'),
+    ('a = 1 /* b */ c', 'a=1 c'),
+    ('a = b\n\n\n(c)', 'a=b\n(c)'),
+    ('#!/usr/bin/env node\na = 1', '#!/usr/bin/env node\na=1'),
+])
+def test_minifyJs_lineBreaks(source, expected):
+    assert PythonMinifierBackend.minifyJs(source) == expected + '\n'
+
+@pytest.mark.parametrize('source, expected', [
+    ('var a = "b  c", d = \'e // f\';', 'var a="b  c",d=\'e // f\';'),
+    ('a = b + +c;', 'a=b+ +c;'),
+    ('a = b - -c;', 'a=b- -c;'),
+    ('a = 1 .toString();', 'a=1 .toString();'),
+    ('a = "/* b */";', 'a="/* b */";'),
+])
+def test_minifyJs_tokens(source, expected):
+    assert PythonMinifierBackend.minifyJs(source) == expected + '\n'
+
+@pytest.mark.parametrize('source, expected', [
+    ('/*! a */\nvar b;', '/*! a */\nvar b;'),
+    ('/* @license MIT */ var a;', '/* @license MIT */var a;'),
+    ('/** @preserve */\nvar a;', '/** @preserve */\nvar a;'),
+    ('/* a */\nvar b;', 'var b;'),
+])
+def test_minifyJs_legalComments(source, expected):
+    assert PythonMinifierBackend.minifyJs(source) == expected + '\n'
+
+#endregion minifyJs
+
+#region minifyCss --------------------------------------------------------------
+
+@pytest.mark.parametrize('source, expected', [
+    ('.a/**/.b{color:red}', '.a.b{color:red}'),
+    ('.a /**/ .b{color:red}', '.a .b{color:red}'),
+    ('.a/**/ .b{color:red}', '.a .b{color:red}'),
+    ('a{margin:0/**/auto}', 'a{margin:0/**/auto}'),
+    ('a{margin:0 /* b */ auto}', 'a{margin:0 auto}'),
+    ('.a { color: red; } /* b */ .c { color: blue; }',
+        '.a{color:red}.c{color:blue}'),
+])
+def test_minifyCss_comments(source, expected):
+    assert PythonMinifierBackend.minifyCss(source) == expected + '\n'
+
+@pytest.mark.parametrize('source, expected', [
+    # The space after a comment may separate selectors.
+    ('/*! a */\n.b { color: red; }', '/*! a */ .b{color:red}'),
+    ('.a/*! b */.c { }', '.a/*! b */.c{}'),
+    ('/* @license MIT */ .a { }', '/* @license MIT */ .a{}'),
+])
+def test_minifyCss_legalComments(source, expected):
+    assert PythonMinifierBackend.minifyCss(source) == expected + '\n'
+
+@pytest.mark.parametrize('source, expected', [
+    ('a { background: url( b/c.png ); }', 'a{background:url( b/c.png )}'),
+    ('a { background: url(b/*c*/d.png); }', 'a{background:url(b/*c*/d.png)}'),
+    ('a { background: url("b c.png"); }', 'a{background:url("b c.png")}'),
+    ('a { background: url(\'b;c.png\') }', 'a{background:url(\'b;c.png\')}'),
+    ('a { background: URL(b.png) }', 'a{background:URL(b.png)}'),
+    ('a { content: "b  { c }"; }', 'a{content:"b  { c }"}'),
+])
+def test_minifyCss_urlsAndStrings(source, expected):
+    assert PythonMinifierBackend.minifyCss(source) == expected + '\n'
+
+@pytest.mark.parametrize('source, expected', [
+    ('a { width: calc(100% - 2px); }', 'a{width:calc(100% - 2px)}'),
+    ('a { width: calc(1px + (2px * 3)); }', 'a{width:calc(1px + (2px * 3))}'),
+    ('@media screen and (min-width: 100px) { a { b: c; } }',
+        '@media screen and (min-width:100px){a{b:c}}'),
+    ('@media (min-width: 1px) and (max-width: 2px) { }',
+        '@media (min-width:1px) and (max-width:2px){}'),
+    ('.a :hover { }', '.a :hover{}'),
+    ('.a > .b , .c { }', '.a>.b,.c{}'),
+    ('a { color: red !important; }', 'a{color:red!important}'),
+])
+def test_minifyCss_spacing(source, expected):
+    assert PythonMinifierBackend.minifyCss(source) == expected + '\n'
+
+#endregion minifyCss